@@ -0,0 +1,634 @@
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+from api.cache import normalize_question
+from api.circuit_breaker import CircuitOpenError
+from api.metrics import INDEX_QUERY_SECONDS, STAGE_SECONDS
+from api.singleflight import AsyncSingleFlight
+from api.rag_system import (
+    AgricultureRAGSystem,
+    VARIETY_NAMES_QUERY,
+    GRAPH_VERSION_QUERY,
+    HEALTH_QUERY,
+    BATCHED_FULLTEXT_QUERY,
+    BULK_FULLTEXT_QUERY,
+    LLM_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncAgricultureRAGSystem(AgricultureRAGSystem):
+    """
+    Async variant of AgricultureRAGSystem for the FastAPI app
+    Same retrieval and prompt logic, but Neo4j and OpenAI calls are awaited
+    so a slow query or LLM call never blocks the event loop
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        # Pool limits of the HTTP client shared by every OpenAI call
+        self.OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+        self.OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+
+        # Limits concurrent per-index queries in parallel mode
+        self._retrieval_semaphore = asyncio.Semaphore(self.RETRIEVAL_MAX_WORKERS)
+
+        # Batch answering: questions per bulk retrieval round trip, and LLM
+        # calls in flight at once across all batches
+        self.BATCH_RETRIEVAL_CHUNK = int(os.getenv("BATCH_RETRIEVAL_CHUNK", "25"))
+        self.BATCH_MAX_LLM_CALLS = int(os.getenv("BATCH_MAX_LLM_CALLS", "8"))
+        self._batch_llm_semaphore = asyncio.Semaphore(self.BATCH_MAX_LLM_CALLS)
+        self._refresh_task = None
+
+    def _create_single_flight(self):
+        return AsyncSingleFlight()
+
+    def _create_llm_client(self):
+        """AsyncOpenAI on one pooled HTTP client shared by the whole process"""
+        import httpx
+        import openai
+        http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=self.OPENAI_MAX_KEEPALIVE,
+            )
+        )
+        return openai.AsyncOpenAI(api_key=self.OPENAI_API_KEY, http_client=http_client)
+
+    def _create_driver(self):
+        """Create the async Neo4j driver"""
+        from neo4j import AsyncGraphDatabase
+        return AsyncGraphDatabase.driver(
+            self.NEO4J_URI,
+            auth=(self.NEO4J_USERNAME, self.NEO4J_PASSWORD),
+            database=self.NEO4J_DATABASE,
+            **self._driver_options()
+        )
+
+    async def get_all_variety_names(self) -> List[str]:
+        """
+        Fetch all unique variety names, served from the variety catalog
+        """
+        catalog = self.variety_catalog
+        if catalog.snapshot is None:
+            await self.refresh_variety_catalog()
+        elif catalog.is_stale() and catalog.begin_refresh():
+            self._refresh_task = asyncio.create_task(self._refresh_variety_catalog_in_background())
+        return catalog.snapshot.names
+
+    async def _refresh_variety_catalog_in_background(self):
+        try:
+            await self.refresh_variety_catalog()
+        except Exception as e:
+            print(f"Variety catalog refresh failed: {e}")
+        finally:
+            self.variety_catalog.end_refresh()
+
+    async def get_graph_version(self) -> str:
+        """Current graph version as seen by the catalog probe"""
+        with self.neo4j_breaker.guard():
+            async with self.driver.session() as session:
+                result = await session.run(GRAPH_VERSION_QUERY)
+                record = await result.single()
+        return f"{self.GRAPH_DATA_VERSION}:{record['count']}"
+
+    async def refresh_variety_catalog(self, force: bool = False):
+        """
+        Probe the graph version and reload the variety names if it changed or
+        the catalog is older than its reload interval
+        """
+        catalog = self.variety_catalog
+        graph_version = await self.get_graph_version()
+        if not force and not catalog.needs_reload(graph_version):
+            catalog.mark_checked()
+            return
+
+        previous = catalog.snapshot
+        with self.neo4j_breaker.guard():
+            async with self.driver.session() as session:
+                result = await session.run(VARIETY_NAMES_QUERY)
+                variety_names = [r["name"] async for r in result if r["name"]]
+        # The snapshot (matcher, JSON payload) is built off the event loop
+        await asyncio.to_thread(catalog.update, variety_names, graph_version)
+        print(f"Variety catalog loaded {len(variety_names)} names (graph version {graph_version})")
+        if previous is not None and previous.graph_version != graph_version:
+            self.invalidate_caches()
+
+    async def get_relevant_facts(self, user_query: str, top_n_each: int = 4,
+                                 mode: Optional[str] = None,
+                                 indexes: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Get relevant facts using Neo4j fulltext search
+        Same modes and retrieval cache as AgricultureRAGSystem.get_relevant_facts
+        """
+        results, missing = self._cached_index_results(user_query, top_n_each, indexes)
+        if missing:
+            try:
+                fetched = await self._fetch_indexes(missing, user_query, top_n_each, mode)
+            except CircuitOpenError as e:
+                fetched = self._stale_index_results(e, results, missing, user_query, top_n_each)
+            else:
+                if self.retrieval_cache is not None:
+                    self.retrieval_cache.set_many(fetched, user_query, top_n_each)
+            results.update(fetched)
+        self._record_index_hits(results)
+        if self.DENSE_RETRIEVAL:
+            # Embedding the question is CPU work (a model forward pass with
+            # sentence-transformers), so it stays off the event loop
+            results = await asyncio.to_thread(self._fuse_dense, results, user_query, top_n_each, indexes)
+        return self._merge_index_results(results)
+
+    async def _fetch_indexes(self, indexes: List[str], user_query: str, top_n_each: int,
+                             mode: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Query the given indexes with the selected retrieval mode; indexes the
+        local file does not hold still go to Neo4j
+        """
+        if self.RETRIEVAL_BACKEND != "local" or self.local_index is None:
+            return await self._fetch_neo4j_indexes(indexes, user_query, top_n_each, mode)
+        try:
+            # Sub-millisecond and in process, so it runs on the event loop
+            results = self._query_local_index(indexes, user_query, top_n_each)
+        except Exception as e:
+            print(f"Local fulltext index query failed, querying Neo4j: {e}")
+            return await self._fetch_neo4j_indexes(indexes, user_query, top_n_each, mode)
+        remaining = [ix for ix in indexes if ix not in results]
+        if remaining:
+            try:
+                results.update(await self._fetch_neo4j_indexes(remaining, user_query, top_n_each, mode))
+            except CircuitOpenError as e:
+                if not results:
+                    raise
+                print(f"{e}; answering from the local index without {len(remaining)} indexes")
+        return results
+
+    async def _fetch_neo4j_indexes(self, indexes: List[str], user_query: str, top_n_each: int,
+                                   mode: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """The Neo4j half of _fetch_indexes"""
+        self.neo4j_breaker.raise_if_open()
+        mode = (mode or self.RETRIEVAL_MODE).lower()
+        if mode == "parallel":
+            return await self._query_indexes_parallel(indexes, user_query, top_n_each)
+        if mode == "batched":
+            try:
+                return await self._query_indexes_batched(indexes, user_query, top_n_each)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                print(f"Batched fulltext query failed, falling back to per-index queries: {e}")
+        return await self._query_indexes_sequential(indexes, user_query, top_n_each)
+
+    async def _query_single_index(self, index_name: str, user_query: str, top_n_each: int) -> List[Dict]:
+        """Run one index lookup in its own session"""
+        with self.neo4j_breaker.guard(), INDEX_QUERY_SECONDS.time(index=index_name):
+            async with self.driver.session() as session:
+                result = await session.run(
+                    self._index_query(index_name),
+                    {"query": user_query, "limit": top_n_each}
+                )
+                return [self._tag_record(r["node"], index_name, r["score"]) async for r in result]
+
+    async def _query_indexes_sequential(self, indexes: List[str], user_query: str,
+                                        top_n_each: int) -> Dict[str, List[Dict]]:
+        """One fulltext query per index, one after another"""
+        results = {}
+        for position, index_name in enumerate(indexes):
+            try:
+                results[index_name] = await self._query_single_index(index_name, user_query, top_n_each)
+            except CircuitOpenError as e:
+                if not results:
+                    # Opened by this request's own failures; let the caller
+                    # serve cached hits instead
+                    raise
+                print(f"{e}; skipping the remaining {len(indexes) - position} indexes")
+                break
+            except Exception as e:
+                print(f"Neo4j query failed for index {index_name}: {e}")
+        return results
+
+    async def _query_indexes_parallel(self, indexes: List[str], user_query: str,
+                                      top_n_each: int) -> Dict[str, List[Dict]]:
+        """
+        Per-index queries run concurrently, at most RETRIEVAL_MAX_WORKERS at a
+        time. Each index gets INDEX_TIMEOUT once it holds a slot; indexes that
+        fail or overrun are skipped.
+        """
+        async def run(index_name):
+            async with self._retrieval_semaphore:
+                return await asyncio.wait_for(
+                    self._query_single_index(index_name, user_query, top_n_each),
+                    timeout=self.INDEX_TIMEOUT,
+                )
+
+        outcomes = await asyncio.gather(
+            *(run(index_name) for index_name in indexes),
+            return_exceptions=True,
+        )
+
+        results = {}
+        rejected = 0
+        timed_out = []
+        for index_name, outcome in zip(indexes, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                timed_out.append(index_name)
+                print(f"Neo4j query timed out for index {index_name}, skipping")
+            elif isinstance(outcome, CircuitOpenError):
+                rejected += 1
+            elif isinstance(outcome, BaseException):
+                print(f"Neo4j query failed for index {index_name}: {outcome}")
+            else:
+                results[index_name] = outcome
+        if timed_out:
+            # The guard sees the cancellation, not a failure. One slow request
+            # fanning out to many indexes counts once, not once per index.
+            self.neo4j_breaker.record_failure(TimeoutError(f"{', '.join(timed_out)} timed out"))
+        if rejected:
+            if not results:
+                self.neo4j_breaker.raise_if_open()
+            print(f"Neo4j circuit open; skipped {rejected} indexes")
+        return results
+
+    async def _query_indexes_batched(self, indexes: List[str], user_query: str,
+                                     top_n_each: int) -> Dict[str, List[Dict]]:
+        """All fulltext lookups in a single round trip"""
+        with self.neo4j_breaker.guard(), INDEX_QUERY_SECONDS.time(index="batched"):
+            async with self.driver.session() as session:
+                result = await session.run(
+                    BATCHED_FULLTEXT_QUERY,
+                    {"indexes": indexes, "query": user_query, "limit": top_n_each}
+                )
+                results = {index_name: [] for index_name in indexes}
+                async for r in result:
+                    results[r["index_name"]].append(
+                        self._tag_record(r["node"], r["index_name"], r["score"])
+                    )
+        return results
+
+    async def rag_answer(self, user_query: str, variety_list: List[str]) -> str:
+        """
+        Main RAG answer function, awaiting retrieval and the LLM call
+        """
+        messages = await self.retrieve_messages(user_query, variety_list)
+        return await self._complete(messages)
+
+    async def _complete(self, messages: List[Dict[str, str]]) -> str:
+        """One chat completion for prepared messages"""
+        with STAGE_SECONDS.time(stage="llm_call"):
+            response = await self.llm_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages
+            )
+        return response.choices[0].message.content
+
+    async def retrieve_messages(self, user_query: str, variety_list: List[str]) -> List[Dict[str, str]]:
+        """
+        Variety extraction and retrieval, returning the chat messages for the LLM
+        """
+        with STAGE_SECONDS.time(stage="variety_lookup"):
+            variety_name = self.extract_variety_from_question(user_query, variety_list)
+        with STAGE_SECONDS.time(stage="classify"):
+            intent = self.question_classifier.classify(user_query, variety_name)
+        plan = self.index_router.route(user_query)
+        with STAGE_SECONDS.time(stage="retrieval"):
+            facts = await self.get_relevant_facts(
+                user_query, top_n_each=intent.top_n_each, indexes=plan.indexes
+            )
+        return self.build_messages(user_query, variety_name, facts, plan, intent)
+
+    async def stream_rag_answer(self, user_query: str) -> AsyncIterator[str]:
+        """
+        Same as get_rag_answer, but yields the LLM output as it is generated
+        """
+        print(f"Processing streamed query: {user_query}")
+        all_varieties = await self.get_all_variety_names()
+        cached = self._cached_answer(user_query)
+        if cached is not None:
+            yield cached
+            return
+
+        messages = await self.retrieve_messages(user_query, all_varieties)
+        start = time.perf_counter()
+        stream = await self.llm_client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=messages,
+            stream=True
+        )
+        tokens = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not tokens:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_first_token")
+                tokens.append(chunk.choices[0].delta.content)
+                yield tokens[-1]
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_call")
+        if self.answer_cache is not None:
+            self.answer_cache.set(user_query, "".join(tokens))
+
+    async def get_rag_answer(self, user_query: str) -> str:
+        """
+        Public method to get RAG answer
+        """
+        print(f"Processing query: {user_query}")
+
+        all_varieties = await self.get_all_variety_names()
+        print(f"Loaded {len(all_varieties)} variety names.")
+
+        cached = self._cached_answer(user_query)
+        if cached is not None:
+            return cached
+
+        # Identical questions already being answered share that computation
+        return await self.in_flight.do(
+            normalize_question(user_query),
+            lambda: self._answer_and_cache(user_query, all_varieties),
+        )
+
+    async def _answer_and_cache(self, user_query: str, all_varieties: List[str]) -> str:
+        answer = await self.rag_answer(user_query, all_varieties)
+        if self.answer_cache is not None:
+            self.answer_cache.set(user_query, answer)
+        return answer
+
+    async def answer_batch(self, questions: List[str]) -> AsyncIterator[Dict]:
+        """
+        Answer many questions, yielding {"ids", "question", "answer"} (or
+        "error" instead of "answer") as each one completes. "ids" are the
+        positions in `questions` that the answer belongs to.
+
+        Identical questions are answered once. Variety extraction and
+        retrieval run in bulk, BATCH_RETRIEVAL_CHUNK questions per Neo4j
+        round trip. LLM calls start as soon as their chunk is retrieved, and
+        at most BATCH_MAX_LLM_CALLS are in flight at once.
+        """
+        all_varieties = await self.get_all_variety_names()
+        positions: Dict[str, List[int]] = {}
+        unique: List[Tuple[str, str]] = []
+        for position, question in enumerate(questions):
+            key = normalize_question(question)
+            if key not in positions:
+                positions[key] = []
+                unique.append((key, question))
+            positions[key].append(position)
+
+        pending: List[Tuple[str, str]] = []
+        for key, question in unique:
+            cached = self._cached_answer(question)
+            if cached is not None:
+                yield {"ids": positions[key], "question": question, "answer": cached}
+            else:
+                pending.append((key, question))
+
+        done: asyncio.Queue = asyncio.Queue()
+        tasks = []
+
+        async def answer(key: str, question: str, messages: List[Dict[str, str]]):
+            try:
+                async with self._batch_llm_semaphore:
+                    text = await self.in_flight.do(key, lambda: self._complete_and_cache(question, messages))
+                outcome = {"answer": text}
+            except Exception as e:
+                outcome = {"error": str(e)}
+            done.put_nowait({"ids": positions[key], "question": question, **outcome})
+
+        async def retrieve():
+            for start in range(0, len(pending), self.BATCH_RETRIEVAL_CHUNK):
+                chunk = pending[start:start + self.BATCH_RETRIEVAL_CHUNK]
+                try:
+                    chunk_messages = await self.retrieve_messages_bulk([q for _, q in chunk], all_varieties)
+                except Exception as e:
+                    for key, question in chunk:
+                        done.put_nowait({"ids": positions[key], "question": question, "error": str(e)})
+                    continue
+                for (key, question), messages in zip(chunk, chunk_messages):
+                    tasks.append(asyncio.create_task(answer(key, question, messages)))
+
+        producer = asyncio.create_task(retrieve())
+        try:
+            for _ in pending:
+                yield await done.get()
+        finally:
+            # The client went away or everything is answered
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+
+    async def _complete_and_cache(self, user_query: str, messages: List[Dict[str, str]]) -> str:
+        answer = await self._complete(messages)
+        if self.answer_cache is not None:
+            self.answer_cache.set(user_query, answer)
+        return answer
+
+    async def retrieve_messages_bulk(self, questions: List[str],
+                                     variety_list: List[str]) -> List[List[Dict[str, str]]]:
+        """retrieve_messages for many questions, with one bulk retrieval"""
+        matcher = self.get_variety_matcher(variety_list)
+        variety_names = [matcher.longest(question) for question in questions]
+        intents = [
+            self.question_classifier.classify(question, variety_name)
+            for question, variety_name in zip(questions, variety_names)
+        ]
+        plans = [self.index_router.route(question) for question in questions]
+        with STAGE_SECONDS.time(stage="bulk_retrieval"):
+            facts = await self.get_relevant_facts_bulk(
+                questions,
+                [intent.top_n_each for intent in intents],
+                [plan.indexes for plan in plans],
+            )
+        return [
+            self.build_messages(question, variety_name, question_facts, plan, intent)
+            for question, variety_name, question_facts, plan, intent
+            in zip(questions, variety_names, facts, plans, intents)
+        ]
+
+    async def get_relevant_facts_bulk(self, questions: List[str], top_ns: List[int],
+                                      index_lists: List[Optional[List[str]]]) -> List[List[Dict]]:
+        """
+        get_relevant_facts for many questions: every (question, index)
+        lookup missing from the retrieval cache goes to Neo4j in a single
+        BULK_FULLTEXT_QUERY round trip
+        """
+        results, missing = [], {}
+        for position, (question, top_n, indexes) in enumerate(zip(questions, top_ns, index_lists)):
+            cached, missing_indexes = self._cached_index_results(question, top_n, indexes)
+            results.append(cached)
+            if missing_indexes:
+                missing[position] = missing_indexes
+
+        if missing:
+            try:
+                fetched = await self._fetch_indexes_bulk(missing, questions, top_ns)
+            except CircuitOpenError as e:
+                # Serve whatever is cached, even expired; fail if that is nothing
+                for position, indexes in missing.items():
+                    if self.retrieval_cache is not None:
+                        results[position].update(self.retrieval_cache.get_many(
+                            indexes, questions[position], top_ns[position], stale=True
+                        ))
+                if not any(results):
+                    raise
+                logger.info("%s; answering the batch from cached index results", e)
+            else:
+                for position, question_results in fetched.items():
+                    if self.retrieval_cache is not None:
+                        self.retrieval_cache.set_many(question_results, questions[position], top_ns[position])
+                    results[position].update(question_results)
+
+        for question_results in results:
+            self._record_index_hits(question_results)
+        if self.DENSE_RETRIEVAL:
+            results = await asyncio.to_thread(self._fuse_dense_bulk, results, questions, top_ns, index_lists)
+        return [self._merge_index_results(question_results) for question_results in results]
+
+    async def _fetch_indexes_bulk(self, missing: Dict[int, List[str]], questions: List[str],
+                                  top_ns: List[int]) -> Dict[int, Dict[str, List[Dict]]]:
+        """
+        Hits per question position and index, for the given missing indexes;
+        indexes the local file does not hold still go to Neo4j
+        """
+        if self.RETRIEVAL_BACKEND != "local" or self.local_index is None:
+            return await self._fetch_neo4j_indexes_bulk(missing, questions, top_ns)
+        try:
+            results = {
+                position: self._query_local_index(indexes, questions[position], top_ns[position])
+                for position, indexes in missing.items()
+            }
+        except Exception as e:
+            print(f"Local fulltext index query failed, querying Neo4j: {e}")
+            return await self._fetch_neo4j_indexes_bulk(missing, questions, top_ns)
+        remaining = {
+            position: [ix for ix in indexes if ix not in results[position]]
+            for position, indexes in missing.items()
+        }
+        remaining = {position: indexes for position, indexes in remaining.items() if indexes}
+        if remaining:
+            try:
+                fetched = await self._fetch_neo4j_indexes_bulk(remaining, questions, top_ns)
+            except CircuitOpenError as e:
+                if not any(results.values()):
+                    raise
+                print(f"{e}; answering from the local index without "
+                      f"{sum(map(len, remaining.values()))} index lookups")
+                return results
+            for position, hits in fetched.items():
+                results[position].update(hits)
+        return results
+
+    async def _fetch_neo4j_indexes_bulk(self, missing: Dict[int, List[str]], questions: List[str],
+                                        top_ns: List[int]) -> Dict[int, Dict[str, List[Dict]]]:
+        """The Neo4j half of _fetch_indexes_bulk"""
+        self.neo4j_breaker.raise_if_open()
+        lookups = [(position, index_name) for position, indexes in missing.items() for index_name in indexes]
+        try:
+            return await self._query_indexes_bulk(lookups, questions, top_ns)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"Bulk fulltext query failed, falling back to per-question queries: {e}")
+        outcomes = await asyncio.gather(*(
+            self._fetch_neo4j_indexes(indexes, questions[position], top_ns[position])
+            for position, indexes in missing.items()
+        ))
+        return dict(zip(missing, outcomes))
+
+    async def _query_indexes_bulk(self, lookups: List[Tuple[int, str]], questions: List[str],
+                                  top_ns: List[int]) -> Dict[int, Dict[str, List[Dict]]]:
+        """All (question position, index) lookups in a single round trip"""
+        fetched: Dict[int, Dict[str, List[Dict]]] = {}
+        for position, index_name in lookups:
+            fetched.setdefault(position, {})[index_name] = []
+        with self.neo4j_breaker.guard(), INDEX_QUERY_SECONDS.time(index="bulk"):
+            async with self.driver.session() as session:
+                result = await session.run(
+                    BULK_FULLTEXT_QUERY,
+                    {
+                        "lookups": [
+                            {"id": i, "index_name": index_name, "query": questions[position]}
+                            for i, (position, index_name) in enumerate(lookups)
+                        ],
+                        "limit": max(top_ns),
+                    }
+                )
+                async for r in result:
+                    position, index_name = lookups[r["lookup_id"]]
+                    hits = fetched[position][index_name]
+                    if len(hits) < top_ns[position]:
+                        hits.append(self._tag_record(r["node"], index_name, r["score"]))
+        return fetched
+
+    def _fuse_dense_bulk(self, results: List[Dict[str, List[Dict]]], questions: List[str],
+                         top_ns: List[int], index_lists: List[Optional[List[str]]]) -> List[Dict[str, List[Dict]]]:
+        """_fuse_dense for many questions, embedding and scoring them together"""
+        retriever = self.dense_retriever
+        if retriever is None:
+            return results
+        try:
+            with INDEX_QUERY_SECONDS.time(index="dense"):
+                dense = retriever.search(questions, self.INDEXES, max(top_ns))
+        except Exception as e:
+            print(f"Dense retrieval failed, using fulltext results only: {e}")
+            return results
+        fused = []
+        for question_results, hits, top_n, indexes in zip(results, dense, top_ns, index_lists):
+            wanted = self.INDEXES if indexes is None else indexes
+            fused.append(retriever.fuse(
+                question_results, {ix: hits[ix][:top_n] for ix in wanted if ix in hits}, top_n
+            ))
+        return fused
+
+    async def get_all_varieties(self) -> List[str]:
+        """
+        Public method to get all varieties for API endpoint
+        """
+        return await self.get_all_variety_names()
+
+    async def check_health(self) -> Dict:
+        """Same probe as AgricultureRAGSystem.check_health, awaited with a hard timeout"""
+        from neo4j import Query
+        start = time.perf_counter()
+        health = {"neo4j": "up", "latency_ms": None, "error": None}
+
+        async def probe():
+            async with self.driver.session() as session:
+                result = await session.run(Query(HEALTH_QUERY, timeout=self.NEO4J_HEALTH_TIMEOUT))
+                await result.single()
+
+        try:
+            with self.neo4j_breaker.guard():
+                await asyncio.wait_for(probe(), timeout=self.NEO4J_HEALTH_TIMEOUT)
+            health["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        except CircuitOpenError:
+            health["neo4j"] = "circuit_open"
+        except Exception as e:
+            health["neo4j"] = "down"
+            health["error"] = str(e) or type(e).__name__
+        health["circuit"] = self.neo4j_breaker.stats()
+        return health
+
+    async def warm_up(self) -> Dict[str, float]:
+        """
+        Connect, check Neo4j is reachable and load the variety catalog.
+        Returns the time each step took, in milliseconds.
+        """
+        timings = {}
+        start = time.perf_counter()
+        self.connect()
+        timings["connect_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        with self.neo4j_breaker.guard():
+            await self.driver.verify_connectivity()
+        timings["neo4j_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        await self.get_all_variety_names()
+        timings["varieties_ms"] = (time.perf_counter() - start) * 1000
+        return {k: round(v, 1) for k, v in timings.items()}
+
+    async def close(self):
+        """Close the Neo4j driver and the shared HTTP client"""
+        if self._driver is not None:
+            await self._driver.close()
+        if self._llm_client is not None:
+            await self._llm_client.close()
@@ -0,0 +1,354 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Bangla digits ০-৯ fold onto ASCII so "ধান২৮" and "ধান28" share a key
+DIGIT_FOLD = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+
+def normalize_question(question: str, fold_digits: bool = True) -> str:
+    """
+    Canonical form of a question for cache lookups:
+    Unicode NFC, Bangla/English digit folding, punctuation (?, ।, ! ...)
+    removed, whitespace collapsed and case folded.
+    fold_digits=False keeps digits as typed, for keys whose result depends
+    on the raw tokens (the fulltext indexes do not fold digits).
+    """
+    text = unicodedata.normalize("NFC", question)
+    if fold_digits:
+        text = text.translate(DIGIT_FOLD)
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch
+        for ch in text
+    )
+    return " ".join(text.split()).casefold()
+
+def data_version(variety_names: Iterable[str], graph_version: str = "") -> str:
+    """
+    Fingerprint of the data an answer was built from. Changes whenever the
+    variety list or the configured graph data version changes.
+    """
+    digest = hashlib.sha1(graph_version.encode("utf-8"))
+    for name in variety_names:
+        digest.update(b"\0")
+        digest.update(name.encode("utf-8"))
+    return digest.hexdigest()
+
+class AnswerCache:
+    """
+    Base class for answer caches keyed on the normalized question.
+    Subclasses implement _get/_set/_clear; hit/miss counting, TTL handling
+    and version invalidation live here.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1000,
+                 clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def ensure_version(self, version: str):
+        """Drop every entry if the underlying data version has changed"""
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._clear()
+                    self.version = version
+
+    def get(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            value = self._get(key, self.clock())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, question: str, answer: str):
+        key = normalize_question(question)
+        with self._lock:
+            self._set(key, answer, self.clock())
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = len(self)
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+        }
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: str, now: float):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+class InMemoryAnswerCache(AnswerCache):
+    """Process-local LRU cache with a TTL"""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1000,
+                 clock: Callable[[], float] = time.time):
+        super().__init__(ttl, max_entries, clock)
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, created = entry
+        if now - created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: str, now: float):
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _clear(self):
+        self._entries.clear()
+
+class SQLiteAnswerCache(AnswerCache):
+    """
+    On-disk cache so answers survive restarts and can be shared by workers
+    on the same machine. LRU order is tracked with an access timestamp.
+    Each entry records the data version it was built from and is only
+    served to a worker on that version, so a worker whose variety list is
+    older or newer than the one that wrote an answer never serves it.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_entries: int = 1000,
+                 clock: Callable[[], float] = time.time):
+        super().__init__(ttl, max_entries, clock)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL, version TEXT)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(answers)")]
+        if "version" not in columns:
+            # File from before per-entry versions; its entries never match
+            self._conn.execute("ALTER TABLE answers ADD COLUMN version TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        self.version = row[0] if row else None
+
+    def ensure_version(self, version: str):
+        if version == self.version:
+            return
+        with self._lock:
+            # Another worker sharing the file may already have moved it on
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if not row or row[0] != version:
+                self._clear()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,)
+                )
+                self._conn.commit()
+            self.version = version
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value, created, version FROM answers WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created, version = row
+        if version != self.version:
+            # Written by a worker on other data; left for it to use or replace
+            return None
+        if now - created > self.ttl:
+            self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE answers SET accessed = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return value
+
+    def _set(self, key: str, value: str, now: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO answers (key, value, created, accessed, version) VALUES (?, ?, ?, ?, ?)",
+            (key, value, now, now, self.version),
+        )
+        self._conn.execute(
+            "DELETE FROM answers WHERE key IN ("
+            " SELECT key FROM answers ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def _clear(self):
+        self._conn.execute("DELETE FROM answers")
+        self._conn.commit()
+
+def create_answer_cache() -> Optional[AnswerCache]:
+    """
+    Build the answer cache from the environment:
+    ANSWER_CACHE_BACKEND = memory (default) | sqlite | none
+    ANSWER_CACHE_TTL (seconds), ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_PATH
+    """
+    backend = os.getenv("ANSWER_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    if backend == "memory":
+        return InMemoryAnswerCache(ttl, max_entries)
+    if backend == "sqlite":
+        path = os.getenv(
+            "ANSWER_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "krishibot_answer_cache.sqlite3"),
+        )
+        return SQLiteAnswerCache(path, ttl, max_entries)
+    return None
+
+def _estimate_size(records: List[Dict]) -> int:
+    """Rough memory footprint of a list of fact dicts, in bytes"""
+    size = sys.getsizeof(records)
+    for record in records:
+        size += sys.getsizeof(record)
+        for key, value in record.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+class RetrievalCache:
+    """
+    Memoizes per-index fulltext hits keyed by (index name, query, limit).
+    The query is kept exactly as sent to the index: Lucene reads -, ?, :
+    and quotes as query syntax, so "বারি আলু-৭" and "বারি আলু ৭" can hit
+    different nodes. Bounded by an approximate memory budget (least
+    recently used entries go first) and by entry age: entries older than
+    ttl are only served stale, and not at all once max_stale seconds past it.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 600,
+                 max_stale: float = 3600, clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._next_sweep = clock() + ttl
+        self._lock = threading.Lock()
+
+    def get_many(self, indexes: Iterable[str], query: str, limit: int,
+                 stale: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Fresh cached hits for each of the given indexes that has them.
+        stale=True also returns expired entries up to max_stale seconds past
+        the TTL (while Neo4j is unreachable).
+        """
+        now = self.clock()
+        found = {}
+        with self._lock:
+            for index_name in indexes:
+                key = (index_name, query, limit)
+                entry = self._entries.get(key)
+                age = now - entry[1] if entry is not None else 0.0
+                if entry is not None and age > self.ttl + self.max_stale:
+                    self._evict(key)
+                    entry = None
+                if entry is None or (not stale and age > self.ttl):
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                self._entries.move_to_end(key)
+                # Copies, so callers can annotate facts without touching the cache
+                found[index_name] = [dict(record) for record in entry[0]]
+        return found
+
+    def set_many(self, results: Dict[str, List[Dict]], query: str, limit: int):
+        """Store the hits of each index queried for this query and limit"""
+        now = self.clock()
+        with self._lock:
+            for index_name, records in results.items():
+                key = (index_name, query, limit)
+                if key in self._entries:
+                    self._evict(key)
+                records = [dict(record) for record in records]
+                size = _estimate_size(records)
+                if size > self.max_bytes:
+                    continue
+                self._entries[key] = (records, now, size)
+                self.size += size
+            while self.size > self.max_bytes and self._entries:
+                self._evict(next(iter(self._entries)))
+            if now >= self._next_sweep:
+                # Expired entries stay servable stale for max_stale; past
+                # that, drop them even if nothing asks for them again
+                self._next_sweep = now + self.ttl
+                for key in [k for k, entry in self._entries.items() if now - entry[1] > self.ttl + self.max_stale]:
+                    self._evict(key)
+
+    def invalidate(self):
+        """Drop everything, e.g. after the knowledge graph has been reloaded"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def _evict(self, key):
+        self.size -= self._entries.pop(key)[2]
+
+def create_retrieval_cache() -> Optional[RetrievalCache]:
+    """
+    Build the retrieval cache from the environment:
+    RETRIEVAL_CACHE_MAX_BYTES (0 disables it), RETRIEVAL_CACHE_TTL (seconds)
+    and RETRIEVAL_CACHE_MAX_STALE (seconds past the TTL that an entry may
+    still be served while Neo4j is unreachable)
+    """
+    max_bytes = int(os.getenv("RETRIEVAL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    if max_bytes <= 0:
+        return None
+    return RetrievalCache(
+        max_bytes,
+        float(os.getenv("RETRIEVAL_CACHE_TTL", "600")),
+        float(os.getenv("RETRIEVAL_CACHE_MAX_STALE", "3600")),
+    )
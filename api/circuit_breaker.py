@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from api.metrics import CIRCUIT_EVENTS
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker around calls to one dependency.
+
+    closed: calls go through; `failure_threshold` failures in a row open it.
+    open: calls fail fast with CircuitOpenError for `reset_timeout` seconds.
+    half_open: a single trial call goes through; success closes the circuit,
+    failure opens it for another `reset_timeout`.
+
+    Thread-safe; also used from the event loop, where no call blocks.
+    `clock` returns seconds (time.monotonic by default; tests pass a fake).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.clock = clock
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half_open this claims the trial call"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    CIRCUIT_EVENTS.inc(circuit=self.name, event="rejected")
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                CIRCUIT_EVENTS.inc(circuit=self.name, event="rejected")
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def raise_if_open(self):
+        """
+        Fail fast while the circuit is open and the trial call is not yet
+        due (or already running). Unlike allow(), does not claim the trial.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            waiting = (
+                self.state == self.OPEN and self.clock() - self._opened_at < self.reset_timeout
+            ) or (self.state == self.HALF_OPEN and self._trial_in_flight)
+            if not waiting:
+                return
+            CIRCUIT_EVENTS.inc(circuit=self.name, event="rejected")
+        raise CircuitOpenError(f"{self.name} circuit is open after repeated failures: {self.last_error}")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                CIRCUIT_EVENTS.inc(circuit=self.name, event="closed")
+                print(f"{self.name} recovered, circuit closed")
+
+    def record_failure(self, error: BaseException = None):
+        with self._lock:
+            self.failures += 1
+            if error is not None:
+                self.last_error = str(error)
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+                CIRCUIT_EVENTS.inc(circuit=self.name, event="opened")
+                print(f"{self.name} circuit opened after {self.failures} failures "
+                      f"(retrying in {self.reset_timeout:g}s): {self.last_error}")
+
+    @contextmanager
+    def guard(self):
+        """
+        Run the with-block as one call through the breaker: raises
+        CircuitOpenError instead of running it while open, and records its
+        outcome. Cancellation counts as neither success nor failure.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open after repeated failures: {self.last_error}")
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        self.record_success()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = round(max(0.0, self._opened_at + self.reset_timeout - self.clock()), 1)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in_s": retry_in,
+                "last_error": self.last_error,
+            }
+
+def create_neo4j_breaker() -> CircuitBreaker:
+    """
+    Breaker for Neo4j calls from the environment: NEO4J_BREAKER_FAILURES
+    (failures in a row that open it) and NEO4J_BREAKER_RESET_TIMEOUT (seconds
+    before a trial call)
+    """
+    return CircuitBreaker(
+        "neo4j",
+        failure_threshold=int(os.getenv("NEO4J_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("NEO4J_BREAKER_RESET_TIMEOUT", "30")),
+    )
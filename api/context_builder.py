@@ -0,0 +1,256 @@
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from api.variety_matcher import normalize_variety_text
+
+@lru_cache(maxsize=None)
+def _encoding():
+    """
+    The gpt-4o tokenizer, loaded on the first token count rather than at
+    import: get_encoding may download the vocabulary, which a cold start
+    should not wait for. None if tiktoken is missing or fails to load.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken is optional; fall back to a character-based estimate
+        return None
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count of text for the gpt-4o tokenizer. Uses tiktoken when it is
+    installed, otherwise ~4 characters per token for ASCII and ~2 for
+    Bangla and other non-ASCII script.
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars + 1) // 2
+
+def fact_identity(fact: Dict):
+    """Node identity of a fact: the Neo4j element id, or its properties"""
+    if fact.get("_id") is not None:
+        return fact["_id"]
+    return tuple(sorted((k, str(v)) for k, v in fact.items() if not k.startswith('_')))
+
+def dedupe_facts(facts: List[Dict]) -> List[Dict]:
+    """
+    Merge facts for the same node returned by several indexes. The merged
+    fact keeps the best score and its index, plus "_indexes" listing every
+    index that matched. Output is sorted by score, best first. Safe (and
+    cheap) to apply to already-deduplicated facts: a fact that already has
+    "_indexes" is only copied if another hit for its node turns up.
+    """
+    merged = {}
+    copied = set()  # keys whose merged fact was created here and may be modified
+    for fact in facts:
+        key = fact_identity(fact)
+        seen = merged.get(key)
+        if seen is None:
+            if fact.get("_indexes"):
+                merged[key] = fact
+            else:
+                merged[key] = dict(fact, _indexes=[fact["_index"]])
+                copied.add(key)
+            continue
+        if key not in copied:
+            seen = merged[key] = dict(seen, _indexes=list(seen["_indexes"]))
+            copied.add(key)
+        for index_name in fact.get("_indexes") or [fact["_index"]]:
+            if index_name not in seen["_indexes"]:
+                seen["_indexes"].append(index_name)
+        if fact["_score"] > seen["_score"]:
+            seen["_score"] = fact["_score"]
+            seen["_index"] = fact["_index"]
+    unique = list(merged.values())
+    unique.sort(key=lambda x: x["_score"], reverse=True)
+    return unique
+
+# Joins the normalized property values of a node's search text; never
+# produced by normalize_variety_text, so a match cannot span two values
+VALUE_SEPARATOR = "\x00"
+
+def display_props(fact: Dict) -> str:
+    """The node properties of a fact as "key:value, key:value" """
+    return ", ".join(f"{k}:{v}" for k, v in fact.items() if not k.startswith('_'))
+
+def search_text(fact: Dict) -> str:
+    """Every node property value of a fact in variety-matching form (see normalize_variety_text)"""
+    return VALUE_SEPARATOR.join(
+        normalize_variety_text(str(v)) for k, v in fact.items() if not k.startswith('_')
+    )
+
+class FactTextCache:
+    """
+    display_props and search_text of each node, computed once per node and
+    keyed by its element id, since the same nodes come back request after
+    request. Facts without an id are not cached. search_text is only built
+    when a variety filter first needs it. Bounded by an approximate memory
+    budget (oldest entries go first); call invalidate() after reloading
+    the knowledge graph.
+
+    Lookups take no lock: they run for every fact of every request, and a
+    dict read is atomic. Hit/miss counts are approximate under concurrency.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        # element id -> (display_props, search_text or None, size)
+        self._entries: Dict[Any, Tuple[str, Optional[str], int]] = {}
+        self._lock = threading.Lock()
+
+    def display(self, fact: Dict) -> str:
+        entry = self._entries.get(fact.get("_id"))
+        if entry is not None:
+            self.hits += 1
+            return entry[0]
+        return self._build(fact, search=False)[0]
+
+    def search(self, fact: Dict) -> str:
+        entry = self._entries.get(fact.get("_id"))
+        if entry is not None and entry[1] is not None:
+            self.hits += 1
+            return entry[1]
+        return self._build(fact, search=True)[1]
+
+    def _build(self, fact: Dict, search: bool) -> Tuple[str, Optional[str], int]:
+        self.misses += 1
+        node_id = fact.get("_id")
+        old = self._entries.get(node_id)
+        display = old[0] if old is not None else display_props(fact)
+        text = search_text(fact) if search else None
+        entry = (display, text, sys.getsizeof(display) + (sys.getsizeof(text) if text is not None else 0))
+        if node_id is None or entry[2] > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(node_id, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[node_id] = entry
+            self.size += entry[2]
+            while self.size > self.max_bytes:
+                self.size -= self._entries.pop(next(iter(self._entries)))[2]
+        return entry
+
+    def invalidate(self):
+        """Drop everything, e.g. after the knowledge graph has been reloaded"""
+        with self._lock:
+            self._entries = {}
+            self.size = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+def create_fact_text_cache() -> Optional[FactTextCache]:
+    """FactTextCache bounded by FACT_TEXT_CACHE_MAX_BYTES (0 disables it)"""
+    max_bytes = int(os.getenv("FACT_TEXT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    if max_bytes <= 0:
+        return None
+    return FactTextCache(max_bytes)
+
+@lru_cache(maxsize=256)
+def _variety_needles(variety_names: Tuple[str, ...]) -> List[Tuple[str, List[str], Any]]:
+    """
+    (normalized name, the names it stands for, boundary regex or None) per
+    distinct normalized name. As in VarietyMatcher, a name ending in a
+    digit must not match before another digit ("ধান২" inside "ধান২৯"), which
+    the boundary regex checks once the substring test has hit.
+    """
+    names_by_key: Dict[str, List[str]] = {}
+    for name in variety_names:
+        key = normalize_variety_text(name)
+        if key:
+            names_by_key.setdefault(key, []).append(name)
+    return [
+        (key, names, re.compile(re.escape(key) + r"(?!\d)") if key[-1].isdigit() else None)
+        for key, names in names_by_key.items()
+    ]
+
+def filter_facts_by_varieties(facts: List[Dict], variety_names: Sequence[str],
+                              texts: Optional[FactTextCache] = None) -> Dict[str, List[Dict]]:
+    """
+    The facts mentioning each variety in any node property, in fact order.
+    One pass over the facts; each fact's search text (from texts when
+    given) is built once and checked for every name with a substring test.
+    """
+    needles = _variety_needles(tuple(variety_names))
+    search = texts.search if texts is not None else search_text
+    filtered = {name: [] for name in variety_names}
+    if len(needles) == 1:
+        key, names, boundary = needles[0]
+        kept = []
+        for fact in facts:
+            text = search(fact)
+            if key in text and (boundary is None or boundary.search(text)):
+                kept.append(fact)
+        for name in names:
+            filtered[name] = list(kept)
+        return filtered
+    for fact in facts:
+        text = search(fact)
+        for key, names, boundary in needles:
+            if key in text and (boundary is None or boundary.search(text)):
+                for name in names:
+                    filtered[name].append(fact)
+    return filtered
+
+def render_fact(fact: Dict, texts: Optional[FactTextCache] = None) -> str:
+    """One context line: "[index, Score: s]: key:value, key:value" """
+    indexes = "+".join(fact.get("_indexes") or [fact["_index"]])
+    props = texts.display(fact) if texts is not None else display_props(fact)
+    return f"[{indexes}, Score: {fact['_score']}]: {props}"
+
+def build_context(facts: List[Dict], token_budget: int,
+                  texts: Optional[FactTextCache] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Deduplicate facts and pack the best-scoring ones into at most
+    token_budget tokens. Returns the context string and per-request stats,
+    including the (estimated) tokens saved against the old
+    one-line-per-hit context and how many packed facts each index matched.
+    texts, when given, serves each node's rendered properties.
+    """
+    unique = dedupe_facts(facts)
+
+    lines = []
+    packed_by_index = {}
+    used_tokens = 0
+    raw_tokens = 0
+    for fact in unique:
+        line = render_fact(fact, texts)
+        tokens = estimate_tokens(line) + 1  # + newline
+        # The old context repeated this line once per index that matched it
+        raw_tokens += tokens * len(fact["_indexes"])
+        if used_tokens + tokens > token_budget:
+            # A shorter, lower-scored fact may still fit
+            continue
+        lines.append(line)
+        used_tokens += tokens
+        for index_name in fact["_indexes"]:
+            packed_by_index[index_name] = packed_by_index.get(index_name, 0) + 1
+
+    stats = {
+        "facts": sum(len(fact["_indexes"]) for fact in unique),
+        "unique_facts": len(unique),
+        "packed_facts": len(lines),
+        "raw_tokens": raw_tokens,
+        "context_tokens": used_tokens,
+        "tokens_saved": raw_tokens - used_tokens,
+        "packed_by_index": packed_by_index,
+    }
+    return "".join(line + "\n" for line in lines), stats
@@ -0,0 +1,257 @@
+import json
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from api.local_index import export_fulltext_indexes, tokenize
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional; dense retrieval is disabled without it
+    np = None
+
+# Reciprocal rank fusion constant (Cormack et al.); larger values flatten
+# the advantage of the top ranks
+RRF_K = 60
+# Cosine floor for dense hits; below it the nearest nodes of an unrelated
+# index are noise that would only pad the context
+DENSE_MIN_SCORE = 0.1
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free embedding: words and character 3/4-grams
+    of the Bangla-aware terms are hashed (crc32, stable across processes)
+    into `dim` signed buckets and L2-normalized. Character n-grams let
+    inflected and compound forms ("সারের", "রাসায়নিক সার") land near each
+    other without a model download.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        features = []
+        for term in tokenize(text):
+            features.append(("w:" + term, 1.0))
+            padded = f"<{term}>"
+            for n in (3, 4):
+                for i in range(len(padded) - n + 1):
+                    features.append(("c:" + padded[i:i + n], 0.5))
+        return features
+
+    def embed(self, texts: Sequence[str]):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += weight if (h >> 16) & 1 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+class SentenceTransformerEmbedder:
+    """Local CPU embedding model via sentence-transformers (optional dependency)"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts: Sequence[str]):
+        return self.model.encode(
+            list(texts), batch_size=64, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+def create_embedder():
+    """
+    Embedding provider from the environment: DENSE_EMBEDDER=hashing
+    (default, DENSE_DIM buckets) or sentence-transformers (DENSE_MODEL)
+    """
+    provider = os.getenv("DENSE_EMBEDDER", "hashing").lower()
+    if provider == "sentence-transformers":
+        return SentenceTransformerEmbedder(
+            os.getenv("DENSE_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+        )
+    return HashingEmbedder(int(os.getenv("DENSE_DIM", "512")))
+
+def build_dense_index(prefix: str, exported: Dict[str, List[Tuple[str, Dict, str]]],
+                      embedder, batch_size: int = 256) -> Dict[str, int]:
+    """
+    Embed the nodes behind each fulltext index into <prefix>.npy (float32,
+    one row per index/node pair, rows grouped by index) with the row map
+    and node properties in <prefix>.json
+    """
+    texts, element_ids, ranges, nodes = [], [], {}, {}
+    for index_name, docs in exported.items():
+        start = len(texts)
+        for element_id, props, text in docs:
+            texts.append(text)
+            element_ids.append(element_id)
+            nodes.setdefault(element_id, props)
+        ranges[index_name] = [start, len(texts)]
+
+    dim = getattr(embedder, "dim", 0)
+    blocks = [embedder.embed(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    matrix = np.vstack(blocks).astype(np.float32) if blocks else np.zeros((0, dim), dtype=np.float32)
+
+    os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+    tmp = f"{prefix}.{os.getpid()}.tmp"
+    with open(tmp + ".npy", "wb") as f:
+        np.save(f, matrix)
+    with open(tmp + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "embedder": embedder.name,
+            "rows": len(texts),
+            "dim": int(matrix.shape[1]),
+            "built_at": time.time(),
+            "ranges": ranges,
+            "ids": element_ids,
+            "nodes": nodes,
+        }, f, ensure_ascii=False, default=str)
+    os.replace(tmp + ".npy", prefix + ".npy")
+    os.replace(tmp + ".json", prefix + ".json")
+    return {"rows": len(texts), "nodes": len(nodes), "dim": int(matrix.shape[1])}
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence], k: int = RRF_K) -> Dict:
+    """sum over rankings of 1 / (k + rank), rank starting at 1"""
+    fused: Dict = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
+
+class DenseRetriever:
+    """
+    Embedding matrix memory-mapped from <prefix>.npy, searched with one
+    matrix multiplication per batch of questions, and fused with the
+    fulltext hits per index by reciprocal rank fusion
+    """
+
+    def __init__(self, prefix: str, embedder, rrf_k: int = RRF_K,
+                 min_score: float = DENSE_MIN_SCORE):
+        with open(prefix + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["embedder"] != embedder.name:
+            raise ValueError(
+                f"{prefix} was built with {meta['embedder']}, not {embedder.name}; rebuild it"
+            )
+        self.matrix = np.load(prefix + ".npy", mmap_mode="r")
+        if self.matrix.shape[0] != meta["rows"]:
+            raise ValueError(f"{prefix}.npy and {prefix}.json are from different builds")
+        self.embedder = embedder
+        self.rrf_k = rrf_k
+        self.min_score = min_score
+        self.ranges = {name: tuple(r) for name, r in meta["ranges"].items()}
+        self.ids = meta["ids"]
+        self.nodes = meta["nodes"]
+
+    def search(self, queries: Sequence[str], indexes: Sequence[str], limit: int) -> List[Dict[str, List[Dict]]]:
+        """
+        Top `limit` nodes per index for every query, by cosine similarity
+        (at least self.min_score). All queries are embedded together and scored in a single matmul.
+        """
+        vectors = self.embedder.embed(queries)
+        scores = vectors @ self.matrix.T
+        results = [{} for _ in queries]
+        for index_name in indexes:
+            span = self.ranges.get(index_name)
+            if span is None or span[0] == span[1]:
+                continue
+            start, end = span
+            block = scores[:, start:end]
+            k = min(limit, end - start)
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            for q, rows in enumerate(top):
+                rows = rows[np.argsort(-block[q, rows])]
+                hits = [
+                    self._record(start + int(row), index_name, float(block[q, row]))
+                    for row in rows if block[q, row] >= self.min_score
+                ]
+                if hits:
+                    results[q][index_name] = hits
+        return results
+
+    def _record(self, row: int, index_name: str, score: float) -> Dict:
+        element_id = self.ids[row]
+        record = dict(self.nodes[element_id])
+        record["_id"] = element_id
+        record["_index"] = index_name
+        record["_score"] = score
+        return record
+
+    def fuse(self, fulltext: Dict[str, List[Dict]], dense: Dict[str, List[Dict]],
+             limit: int) -> Dict[str, List[Dict]]:
+        """
+        Per index, rank the union of fulltext and dense hits by RRF. The
+        fused _score is the RRF score; the originals are kept in
+        _fulltext_score and _dense_score.
+        """
+        fused_results = {}
+        for index_name in list(fulltext) + [ix for ix in dense if ix not in fulltext]:
+            text_hits = sorted(fulltext.get(index_name, []), key=lambda f: f["_score"], reverse=True)
+            dense_hits = dense.get(index_name, [])
+            by_id = {}
+            for fact in dense_hits:
+                by_id[fact["_id"]] = dict(fact, _dense_score=fact["_score"])
+            for fact in text_hits:
+                merged = dict(fact, _fulltext_score=fact["_score"])
+                if fact["_id"] in by_id:
+                    merged["_dense_score"] = by_id[fact["_id"]]["_dense_score"]
+                by_id[fact["_id"]] = merged
+            fused = reciprocal_rank_fusion(
+                [[f["_id"] for f in text_hits], [f["_id"] for f in dense_hits]], self.rrf_k
+            )
+            best = sorted(fused, key=fused.get, reverse=True)[:limit]
+            fused_results[index_name] = [
+                dict(by_id[node_id], _score=round(fused[node_id], 6)) for node_id in best
+            ]
+        return fused_results
+
+def create_dense_retriever(prefix: str) -> Optional[DenseRetriever]:
+    """DenseRetriever for <prefix>.npy/.json, or None (with a warning) if unavailable"""
+    if np is None:
+        print("Dense retrieval needs numpy (pip install numpy); continuing with fulltext only")
+        return None
+    try:
+        return DenseRetriever(
+            prefix,
+            create_embedder(),
+            rrf_k=int(os.getenv("DENSE_RRF_K", str(RRF_K))),
+            min_score=float(os.getenv("DENSE_MIN_SCORE", str(DENSE_MIN_SCORE))),
+        )
+    except Exception as e:
+        print(f"Dense index {prefix} unavailable, continuing with fulltext only: {e}")
+        return None
+
+def main(argv: Optional[List[str]] = None):
+    """python -m api.dense_index build [--prefix P]: embed the graph's indexed nodes"""
+    import argparse
+
+    from dotenv import load_dotenv
+    from api.rag_system import AgricultureRAGSystem
+
+    parser = argparse.ArgumentParser(description="Dense embedding index for the RAG system")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--prefix", help="output path without extension (default DENSE_INDEX_PATH)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    if np is None:
+        parser.error("numpy is required to build the dense index")
+    rag_system = AgricultureRAGSystem()
+    prefix = args.prefix or rag_system.DENSE_INDEX_PATH
+    try:
+        start = time.perf_counter()
+        embedder = create_embedder()
+        counts = build_dense_index(prefix, export_fulltext_indexes(rag_system.driver, rag_system.INDEXES), embedder)
+        print(f"Built {prefix}.npy with {embedder.name}: {counts['rows']} rows x {counts['dim']} "
+              f"({counts['nodes']} nodes) in {time.perf_counter() - start:.1f}s")
+    finally:
+        rag_system.close()
+
+if __name__ == "__main__":
+    main()
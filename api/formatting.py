@@ -0,0 +1,32 @@
+import json
+
+# Shared by api/main.py and api/index.py so the buffered and streamed
+# responses render identically
+
+RESPONSE_FOOTER = """
+
+---
+*উৎস: বাংলাদেশ কৃষি গবেষণা ইনস্টিটিউট*
+"""
+
+def format_response_header(question: str) -> str:
+    """
+    Markdown heading built from the last few words of the question
+    """
+    # Extract topic from question
+    topic = question.strip().rstrip('?।').split()[-3:]
+    topic = ' '.join(topic)
+    return f"## {topic} সম্পর্কে তথ্য:\n\n"
+
+def format_response_with_markdown(text: str, question: str) -> str:
+    """
+    Format the response with markdown for better presentation
+    """
+    return f"{format_response_header(question)}{text}{RESPONSE_FOOTER}"
+
+def sse_event(event: str, text: str = "") -> str:
+    """
+    Encode one Server-Sent Event. The payload is JSON so newlines in the
+    markdown survive the line-based SSE framing.
+    """
+    return f"event: {event}\ndata: {json.dumps({'text': text}, ensure_ascii=False)}\n\n"
@@ -12,16 +12,28 @@ sys.path.insert(0, str(project_root))
 from dotenv import load_dotenv
 load_dotenv()
 
-# Import the RAG system
-try:
+from api.formatting import (
+    format_response_header,
+    format_response_with_markdown,
+    sse_event,
+    RESPONSE_FOOTER,
+)
+
+from api.circuit_breaker import CircuitOpenError
+from api.metrics import REGISTRY, STAGE_SECONDS
+from api.runtime import LazyRAGSystem, configure_logging
+
+# LOG_LEVEL applies to the project's loggers only, not the root logger
+configure_logging()
+
+def create_rag_system():
+    # Imported here so neo4j/openai load on first use, not on every cold start
     from api.rag_system import AgricultureRAGSystem
-    rag_system = AgricultureRAGSystem()
-    print("✅ RAG System initialized successfully")
-    RAG_AVAILABLE = True
-except Exception as e:
-    print(f"⚠️ Warning: Could not initialize RAG system: {e}")
-    print("The API will run in demo mode")
-    RAG_AVAILABLE = False
+    return AgricultureRAGSystem()
+
+# RAG system is created on first use; failures are retried with backoff and
+# the API runs in demo mode meanwhile
+rag_runtime = LazyRAGSystem(create_rag_system)
 
 class Handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -32,27 +44,56 @@ class Handler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(b'{"message": "Bangladesh Agriculture RAG API is running"}')
         elif self.path == '/api/health':
-            self.send_response(200)
+            # Initializes the RAG system if needed and probes Neo4j with one
+            # cheap query; 503 when either is down
+            rag_system = rag_runtime.get()
+            neo4j = rag_system.check_health() if rag_system else None
+            healthy = neo4j is not None and neo4j["neo4j"] == "up"
+            self.send_response(200 if healthy else 503)
             self.send_header('Content-type', 'application/json')
             self.end_headers()
-            status = "connected" if RAG_AVAILABLE else "demo_mode"
-            self.wfile.write(json.dumps({"status": "healthy", "rag_system": status}).encode('utf-8'))
-        elif self.path == '/api/varieties':
+            cache_stats = rag_system.answer_cache.stats() if rag_system and rag_system.answer_cache else None
+            coalesced = rag_system.in_flight.stats() if rag_system else None
+            self.wfile.write(json.dumps({"status": "healthy" if healthy else "degraded", "rag_system": rag_runtime.status, "neo4j": neo4j, "answer_cache": cache_stats, "coalesced_requests": coalesced}).encode('utf-8'))
+        elif self.path == '/api/warmup':
+            self.warmup()
+        elif self.path == '/api/metrics':
+            # Counters are per process (per warm serverless instance)
             self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-type', 'text/plain; version=0.0.4; charset=utf-8')
             self.end_headers()
-            
-            if RAG_AVAILABLE:
+            self.wfile.write(REGISTRY.render().encode('utf-8'))
+        elif self.path == '/api/varieties':
+            rag_system = rag_runtime.get()
+            if rag_system:
                 try:
-                    # Get varieties from RAG system
-                    varieties = rag_system.get_all_varieties()
-                    self.wfile.write(json.dumps({"varieties": varieties}).encode('utf-8'))
+                    # Get varieties from RAG system; payload and ETag are
+                    # precomputed by the variety catalog
+                    rag_system.get_all_varieties()
+                    snapshot = rag_system.variety_catalog.snapshot
+                    if self.headers.get('If-None-Match') == snapshot.etag:
+                        self.send_response(304)
+                        self.send_header('ETag', snapshot.etag)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header('Content-type', 'application/json')
+                    self.send_header('ETag', snapshot.etag)
+                    self.send_header('Cache-Control', 'no-cache')
+                    self.end_headers()
+                    self.wfile.write(snapshot.payload)
                 except Exception as e:
+                    self.send_response(200)
+                    self.send_header('Content-type', 'application/json')
+                    self.end_headers()
                     # Fallback to demo varieties
                     demo_varieties = ["ব্রি ধান২৮", "ব্রি ধান২৯", "ব্রি ধান৫০", "ব্রি ধান৫৮", 
                                      "বারি আলু-৭", "বারি আলু-৮", "বারি টমেটো-২", "বারি টমেটো-৩"]
                     self.wfile.write(json.dumps({"varieties": demo_varieties, "error": str(e)}).encode('utf-8'))
             else:
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.end_headers()
                 # Demo varieties
                 demo_varieties = ["ব্রি ধান২৮", "ব্রি ধান২৯", "ব্রি ধান৫০", "ব্রি ধান৫৮", 
                                  "বারি আলু-৭", "বারি আলু-৮", "বারি টমেটো-২", "বারি টমেটো-৩"]
@@ -64,7 +105,9 @@ class Handler(BaseHTTPRequestHandler):
             self.wfile.write(b'{"error": "Endpoint not found"}')
             
     def do_POST(self):
-        if self.path == '/api/chat':
+        if self.path == '/api/chat/stream':
+            self.stream_chat()
+        elif self.path == '/api/chat':
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
@@ -76,22 +119,14 @@ class Handler(BaseHTTPRequestHandler):
                 approach = request_data.get('approach', 'GraphRAG')
                 model = request_data.get('model', 'GPT-4')
                 
-                if RAG_AVAILABLE and approach == 'GraphRAG':
+                rag_system = rag_runtime.get() if approach == 'GraphRAG' else None
+                if rag_system:
                     # Use the RAG system for responses
                     raw_answer = rag_system.get_rag_answer(question)
                     
                     # Format the answer with markdown
-                    # Extract topic from question
-                    topic = question.strip().rstrip('?।').split()[-3:]
-                    topic = ' '.join(topic)
-                    
-                    # Create a formatted response with markdown
-                    response = f"""## {topic} সম্পর্কে তথ্য:
-
-{raw_answer}
-
----
-*উৎস: বাংলাদেশ কৃষি গবেষণা ইনস্টিটিউট*"""
+                    with STAGE_SECONDS.time(stage="response_format"):
+                        response = format_response_with_markdown(raw_answer, question)
                 else:
                     # Demo response when RAG system is not available or approach is RAG
                     response = f"""## {question} সম্পর্কে তথ্য:
@@ -113,6 +148,12 @@ class Handler(BaseHTTPRequestHandler):
                     "model": model
                 }
                 self.wfile.write(json.dumps(response_data).encode('utf-8'))
+            except CircuitOpenError as e:
+                # Neo4j is down and nothing relevant is cached: fail fast
+                self.send_response(503)
+                self.send_header('Content-type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": f"Knowledge graph unavailable: {e}"}).encode('utf-8'))
             except Exception as e:
                 self.send_response(500)
                 self.send_header('Content-type', 'application/json')
@@ -124,5 +165,70 @@ class Handler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(b'{"error": "Endpoint not found"}')
 
+    def warmup(self):
+        """
+        Initialize the RAG system, check Neo4j and load the variety catalog,
+        so the first real request after a cold start does not pay for it
+        """
+        rag_system = rag_runtime.get()
+        body = {"status": "demo_mode", **rag_runtime.describe()}
+        code = 200
+        if rag_system:
+            try:
+                body = {"status": "warm", **rag_runtime.describe(), "timings": rag_system.warm_up()}
+            except Exception as e:
+                code = 503
+                body = {"status": "error", "error": f"Warm-up failed: {str(e)}"}
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode('utf-8'))
+
+    def stream_chat(self):
+        """
+        Server-Sent Events version of /api/chat: the markdown header is sent
+        immediately, LLM tokens as they arrive, and the source footer last
+        """
+        # Reply with a JSON error while the response can still be one
+        try:
+            content_length = int(self.headers['Content-Length'])
+            request_data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            question = request_data.get('question', '')
+            approach = request_data.get('approach', 'GraphRAG')
+        except (TypeError, ValueError, AttributeError) as e:
+            self.send_response(400)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": f"Invalid request body: {e}"}).encode('utf-8'))
+            return
+        except Exception as e:
+            self.send_response(500)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        def send(event, text=""):
+            self.wfile.write(sse_event(event, text).encode('utf-8'))
+            self.wfile.flush()
+
+        send("header", format_response_header(question))
+        try:
+            rag_system = rag_runtime.get() if approach == 'GraphRAG' else None
+            if rag_system:
+                for token in rag_system.stream_rag_answer(question):
+                    send("token", token)
+            else:
+                send("token", "[ডেমো মোড উত্তর] আপনার প্রশ্নের জন্য RAG সিস্টেম ব্যবহার করে উত্তর পাওয়া সম্ভব হয়নি।")
+        except Exception as e:
+            send("error", str(e))
+        send("footer", RESPONSE_FOOTER)
+        send("done")
+
 # Required Vercel handler
 handler = Handler 
\ No newline at end of file
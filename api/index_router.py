@@ -0,0 +1,333 @@
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from api.cache import normalize_question
+from api.metrics import REGISTRY, Counter
+
+ROUTER_DECISIONS = REGISTRY.register(Counter(
+    "rag_router_decisions_total",
+    "Index routing decisions (routed, fallback, explore, off)",
+    ["decision"],
+))
+
+# Queried for every routed question: they carry the crop/variety identity
+# that most answers hang off
+CORE_INDEXES = ("categoryFulltext", "cropNameFulltext", "varietyNameFulltext")
+
+# Intent keywords per index. Bangla keywords match whole words, optionally
+# followed by an inflectional suffix (BANGLA_SUFFIXES), so "সারের" and
+# "রোগে" hit but "সারাদেশে" does not; English keywords match whole words,
+# optionally pluralized ("seeds", but not "Thailand")
+INDEX_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "stanNirbachonFulltext": ("জমি", "মাটি", "স্থান", "soil", "land"),
+    "baponerShomoyFulltext": ("বপন", "বোনা", "সময়", "কখন", "মৌসুম", "sowing", "season", "when"),
+    "beejChararHarFulltext": ("বীজ", "চারা", "seed"),
+    "rogBalaiDomanFulltext": ("রোগ", "বালাই", "রোগবালাই", "ছত্রাকনাশক", "দমন", "প্রতিকার", "ছত্রাক", "disease", "control", "fungicide"),
+    "upojogiElakaFulltext": ("এলাকা", "অঞ্চল", "জেলা", "কোথায়", "area", "region", "district"),
+    "boishisthoFulltext": ("বৈশিষ্ট্য", "বৈশিষ্ট", "জীবনকাল", "উচ্চতা", "feature", "characteristic", "duration"),
+    "baponRoponerDurrottoFulltext": ("দূরত্ব", "রোপণ", "রোপন", "spacing", "transplant"),
+    "marairShomoyFulltext": ("মাড়াই", "কাটা", "সংগ্রহ", "harvest", "threshing"),
+    "antoporichorjaFulltext": ("পরিচর্যা", "আগাছা", "সেচ", "নিড়ানি", "irrigation", "weed"),
+    "folonFulltext": ("ফলন", "উৎপাদন", "yield", "production"),
+    "pokamakorFulltext": ("পোকা", "পোকামাকড়", "কীট", "insect", "pest"),
+    "pokamakorDomanFulltext": ("পোকা", "পোকামাকড়", "কীটনাশক", "দমন", "insecticide", "pest", "control"),
+    "rogBalaiFulltext": ("রোগ", "বালাই", "রোগবালাই", "লক্ষণ", "disease", "symptom"),
+    "sarBebosthaponaFulltext": ("সার", "ইউরিয়া", "টিএসপি", "এমওপি", "জিপসাম", "জৈব", "জৈবসার", "গোবর",
+                                "fertilizer", "fertiliser", "urea", "manure", "compost"),
+    "charaToriShomoyFulltext": ("চারা", "বীজতলা", "seedling", "nursery"),
+    "potNirbachonFulltext": ("টব", "পাত্র", "ছাদ", "pot", "rooftop", "container"),
+    "biseshUdyantattikBebosthaponaFulltext": ("উদ্যান", "ছাঁটাই", "ছাটাই", "কলম", "pruning", "grafting",
+                                              "horticulture", "horticultural"),
+    "mediaFulltext": ("মিডিয়া", "টব", "ছাদ", "media", "potting", "substrate"),
+}
+
+def compile_keyword_pattern(keywords: Iterable[str]) -> Optional["re.Pattern"]:
+    """
+    One alternation over normalized keywords (longest first, so the whole
+    question is scanned once): group 1 holds Bangla keywords, as whole
+    words with an optional BANGLA_SUFFIXES ending; group 2 English ones, as
+    whole words with an optional plural ending
+    """
+    keywords = sorted(set(keywords), key=len, reverse=True)
+    if not keywords:
+        return None
+    english = [w for w in keywords if w.isascii()]
+    bangla = [w for w in keywords if not w.isascii()]
+    alternatives = []
+    if bangla:
+        suffixes = sorted({normalize_question(x) for x in BANGLA_SUFFIXES}, key=len, reverse=True)
+        alternatives.append(
+            r"(?<!\S)(" + "|".join(map(re.escape, bangla)) + ")"
+            + "(?:" + "|".join(map(re.escape, suffixes)) + r")?(?!\S)"
+        )
+    if english:
+        alternatives.append(r"\b(" + "|".join(map(re.escape, english)) + r")(?:e?s)?\b")
+    return re.compile("|".join(alternatives))
+
+def find_keywords(pattern: Optional["re.Pattern"], text: str) -> List[str]:
+    """The keywords of compile_keyword_pattern found in normalized text, in order"""
+    if pattern is None:
+        return []
+    return [m.group(m.lastindex) for m in pattern.finditer(text)]
+
+# Case endings, classifiers and plural markers a Bangla keyword may carry
+BANGLA_SUFFIXES = (
+    "ের", "এর", "র", "য়ের", "য়", "ে", "এ", "তে", "কে", "দের", "ও", "ই", "েই", "রই",
+    "টি", "টা", "টির", "টার", "গুলো", "গুলোর", "গুলোতে", "গুলি", "গুলির", "সমূহ", "সমূহের",
+    "জনিত",
+)
+
+class RoutePlan:
+    """Indexes chosen for one question and why"""
+
+    def __init__(self, indexes: List[str], decision: str, matched: Sequence[str] = ()):
+        self.indexes = indexes
+        self.decision = decision
+        self.matched = list(matched)
+
+    @property
+    def full_fan_out(self) -> bool:
+        return self.decision != "routed"
+
+class IndexRouter:
+    """
+    Picks the fulltext indexes worth querying for a question.
+
+    Keyword/intent rules give the first cut. Hit statistics learned from
+    full fan-out questions add indexes that (a) reach the top_facts best
+    context facts of most questions or (b) did so whenever a question
+    contained one of its words.
+    When nothing matches, or the plan would still cover most indexes, the
+    router falls back to querying every index. A small share of routable
+    questions (explore_rate) also fans out fully so the statistics keep
+    learning from unbiased samples.
+    """
+
+    def __init__(self, indexes: Sequence[str], mode: str = "off",
+                 max_fraction: float = 0.6, explore_rate: float = 0.05,
+                 min_samples: int = 30, contribution_rate: float = 0.5,
+                 top_facts: int = 10, max_tokens: int = 5000):
+        self.indexes = list(indexes)
+        self.mode = mode
+        self.max_fraction = max_fraction
+        self.explore_rate = explore_rate
+        self.min_samples = min_samples
+        self.contribution_rate = contribution_rate
+        self.top_facts = top_facts
+        self.max_tokens = max_tokens
+
+        keywords = {}
+        for index_name, words in INDEX_KEYWORDS.items():
+            if index_name not in self.indexes:
+                continue
+            for word in words:
+                keywords.setdefault(normalize_question(word), []).append(index_name)
+        self._keyword_indexes = keywords
+        self._keyword_pattern = compile_keyword_pattern(keywords)
+
+        # Learned from full fan-out questions only
+        self.samples = 0
+        self.contributions: Dict[str, int] = {}
+        self.token_samples: Dict[str, int] = {}
+        self.token_contributions: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def route(self, question: str) -> RoutePlan:
+        """Plan the indexes to query for question"""
+        if self.mode == "off":
+            return self._finish(RoutePlan(list(self.indexes), "off"))
+
+        text = normalize_question(question)
+        matched = find_keywords(self._keyword_pattern, text)
+        selected = set(CORE_INDEXES)
+        for word in matched:
+            selected.update(self._keyword_indexes[word])
+        confident = bool(matched)
+
+        if self.mode == "adaptive":
+            # observe() updates the statistics from other request threads
+            with self._lock:
+                learned = self._learned_indexes(text.split())
+                always_useful = self._always_useful()
+            confident = confident or bool(learned - selected - always_useful)
+            selected |= learned
+
+        selected &= set(self.indexes)
+        if not confident or len(selected) > self.max_fraction * len(self.indexes):
+            return self._finish(RoutePlan(list(self.indexes), "fallback", matched))
+        if self.mode == "adaptive" and random.random() < self.explore_rate:
+            return self._finish(RoutePlan(list(self.indexes), "explore", matched))
+        # Keep the configured index order so merged results stay stable
+        return self._finish(RoutePlan([ix for ix in self.indexes if ix in selected], "routed", matched))
+
+    def _finish(self, plan: RoutePlan) -> RoutePlan:
+        ROUTER_DECISIONS.inc(decision=plan.decision)
+        return plan
+
+    def _always_useful(self) -> set:
+        """
+        Indexes that contributed to at least contribution_rate of contexts.
+        Callers hold self._lock, as for _learned_indexes.
+        """
+        if self.samples < self.min_samples:
+            return set()
+        return {
+            ix for ix, count in self.contributions.items()
+            if count >= self.contribution_rate * self.samples
+        }
+
+    def _learned_indexes(self, tokens: Iterable[str]) -> set:
+        learned = self._always_useful()
+        for token in tokens:
+            seen = self.token_samples.get(token, 0)
+            if seen < max(3, self.min_samples // 10):
+                continue
+            for ix, count in self.token_contributions.get(token, {}).items():
+                if count >= self.contribution_rate * seen:
+                    learned.add(ix)
+        return learned
+
+    def observe(self, question: str, plan: RoutePlan, facts: List[Dict]):
+        """
+        Learn from a full fan-out question which indexes matched its best
+        context facts (facts sorted by score, as built for the LLM).
+        Routed questions are ignored: they only saw a subset.
+        """
+        if self.mode != "adaptive" or not plan.full_fan_out:
+            return
+        contributed = {
+            ix for fact in facts[:self.top_facts]
+            for ix in fact.get("_indexes") or [fact["_index"]]
+        }
+        tokens = set(normalize_question(question).split())
+        with self._lock:
+            self.samples += 1
+            for ix in contributed:
+                self.contributions[ix] = self.contributions.get(ix, 0) + 1
+            for token in tokens:
+                if token not in self.token_samples and len(self.token_samples) >= self.max_tokens:
+                    continue
+                self.token_samples[token] = self.token_samples.get(token, 0) + 1
+                counts = self.token_contributions.setdefault(token, {})
+                for ix in contributed:
+                    counts[ix] = counts.get(ix, 0) + 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "samples": self.samples,
+                "learned_tokens": len(self.token_samples),
+                "always_useful": sorted(self._always_useful()),
+            }
+
+def create_index_router(indexes: Sequence[str]) -> IndexRouter:
+    """
+    Build the router from the environment: INDEX_ROUTING (off by default;
+    rules or adaptive to opt in), INDEX_ROUTING_MAX_FRACTION, INDEX_ROUTING_EXPLORE_RATE,
+    INDEX_ROUTING_MIN_SAMPLES, INDEX_ROUTING_CONTRIBUTION_RATE and
+    INDEX_ROUTING_TOP_FACTS
+    """
+    return IndexRouter(
+        indexes,
+        mode=os.getenv("INDEX_ROUTING", "off").lower(),
+        max_fraction=float(os.getenv("INDEX_ROUTING_MAX_FRACTION", "0.6")),
+        explore_rate=float(os.getenv("INDEX_ROUTING_EXPLORE_RATE", "0.05")),
+        min_samples=int(os.getenv("INDEX_ROUTING_MIN_SAMPLES", "30")),
+        contribution_rate=float(os.getenv("INDEX_ROUTING_CONTRIBUTION_RATE", "0.5")),
+        top_facts=int(os.getenv("INDEX_ROUTING_TOP_FACTS", "10")),
+    )
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def recall_report(rag_system, questions: Sequence[str], top_n_each: int = 3) -> Dict[str, object]:
+    """
+    Replay questions against rag_system with and without routing.
+    Recall is the share of the full fan-out's top_facts best facts that the
+    routed retrieval also returned; latencies are retrieval wall times.
+    The router keeps learning during the replay, as it would in production.
+    """
+    from api.context_builder import dedupe_facts, fact_identity
+
+    router = rag_system.index_router
+    rows = []
+    for question in questions:
+        start = time.perf_counter()
+        full = dedupe_facts(rag_system.get_relevant_facts(question, top_n_each, indexes=rag_system.INDEXES))
+        full_seconds = time.perf_counter() - start
+
+        plan = router.route(question)
+        if plan.full_fan_out:
+            routed, routed_seconds = full, full_seconds
+        else:
+            start = time.perf_counter()
+            routed = rag_system.get_relevant_facts(question, top_n_each, indexes=plan.indexes)
+            routed_seconds = time.perf_counter() - start
+        router.observe(question, plan, full)
+
+        expected = {fact_identity(f) for f in full[:router.top_facts]}
+        found = {fact_identity(f) for f in routed}
+        rows.append({
+            "decision": plan.decision,
+            "indexes": len(plan.indexes),
+            "recall": len(expected & found) / len(expected) if expected else 1.0,
+            "full_seconds": full_seconds,
+            "routed_seconds": routed_seconds,
+        })
+
+    if not rows:
+        return {"questions": 0}
+    full_times = [r["full_seconds"] for r in rows]
+    routed_times = [r["routed_seconds"] for r in rows]
+    recalls = [r["recall"] for r in rows]
+    return {
+        "questions": len(rows),
+        "routed_share": sum(r["decision"] == "routed" for r in rows) / len(rows),
+        "mean_indexes": sum(r["indexes"] for r in rows) / len(rows),
+        f"mean_recall_at_{router.top_facts}": sum(recalls) / len(recalls),
+        f"min_recall_at_{router.top_facts}": min(recalls),
+        "full_p50_ms": _percentile(full_times, 50) * 1000,
+        "full_p95_ms": _percentile(full_times, 95) * 1000,
+        "routed_p50_ms": _percentile(routed_times, 50) * 1000,
+        "routed_p95_ms": _percentile(routed_times, 95) * 1000,
+    }
+
+def main(argv: Optional[List[str]] = None):
+    """python -m api.index_router questions.txt: recall-vs-latency report"""
+    import argparse
+    import json
+
+    from dotenv import load_dotenv
+    from api.rag_system import AgricultureRAGSystem
+
+    parser = argparse.ArgumentParser(description="Index routing recall-vs-latency report")
+    parser.add_argument("questions", help="text file with one recorded question per line")
+    parser.add_argument("--top-n", type=int, default=3, help="hits per index (default 3)")
+    parser.add_argument("--mode", choices=["adaptive", "rules"], default="adaptive",
+                        help="routing mode to measure, whatever INDEX_ROUTING says (default adaptive)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    with open(args.questions, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    rag_system = AgricultureRAGSystem()
+    # Measure Neo4j, not the retrieval cache
+    rag_system.retrieval_cache = None
+    rag_system.index_router.mode = args.mode
+    try:
+        report = recall_report(rag_system, questions, args.top_n)
+    finally:
+        rag_system.close()
+    print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in report.items()}, indent=2))
+
+if __name__ == "__main__":
+    main()
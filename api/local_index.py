@@ -0,0 +1,400 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from heapq import nlargest
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from api.cache import DIGIT_FOLD
+
+MAGIC = b"KBFTIX01"
+HEADER = struct.Struct("<8sQ")
+
+# Lucene's BM25 defaults
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Every fulltext index definition, for export
+SHOW_FULLTEXT_INDEXES_QUERY = """
+SHOW FULLTEXT INDEXES YIELD name, entityType, labelsOrTypes, properties
+WHERE entityType = 'NODE'
+RETURN name, labelsOrTypes, properties
+"""
+
+# The nodes behind one fulltext index
+INDEX_NODES_QUERY = """
+MATCH (n)
+WHERE any(label IN labels(n) WHERE label IN $labels)
+RETURN elementId(n) AS id, properties(n) AS props
+"""
+
+# Zero-width joiner/non-joiner change how a conjunct renders, not the word
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200c\u200d\ufeff"), None)
+
+# Light Bangla stemming: inflection suffixes stripped from longer words so
+# "ধানের"/"ধান" and "জমিতে"/"জমি" share a term. Longest suffix first.
+_SUFFIXES = sorted(
+    (unicodedata.normalize("NFC", s) for s in (
+        "গুলোর", "গুলির", "গুলো", "গুলি", "দের", "য়ের", "ের", "টির", "টি", "টা", "কে", "তে",
+    )),
+    key=len, reverse=True,
+)
+_MIN_STEM = 2
+
+def tokenize(text: str) -> List[str]:
+    """
+    Bangla-aware terms for the local index: NFC, zero-width characters
+    dropped, Bangla digits folded to ASCII, split on whitespace and
+    punctuation (including the danda), case folded and lightly stemmed
+    """
+    text = unicodedata.normalize("NFC", text).translate(_ZERO_WIDTH).translate(DIGIT_FOLD)
+    text = "".join(
+        " " if unicodedata.category(ch)[0] in "PSZ" else ch
+        for ch in text
+    )
+    terms = []
+    for word in text.casefold().split():
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+                word = word[:-len(suffix)]
+                break
+        terms.append(word)
+    return terms
+
+def build_local_index(path: str, exported: Dict[str, List[Tuple[str, Dict, str]]],
+                      graph_version: str = "") -> Dict[str, int]:
+    """
+    Write the index file for exported = {index name: [(element id, node
+    properties, indexed text), ...]}. Written to a temporary file and
+    renamed, so workers with the old file mapped keep reading it.
+    Returns node and term counts.
+    """
+    node_ids: Dict[str, int] = {}
+    node_blobs: List[bytes] = []
+    sections: List[bytes] = []
+    offset = 0
+
+    def add_section(data: bytes) -> int:
+        nonlocal offset
+        start = offset
+        sections.append(data)
+        offset += len(data)
+        # Keep every section 8-byte aligned for memoryview casts
+        padding = -len(data) % 8
+        if padding:
+            sections.append(b"\0" * padding)
+            offset += padding
+        return start
+
+    indexes_meta = {}
+    for index_name, docs in exported.items():
+        doc_nodes = array("I")
+        doc_lengths = array("I")
+        postings: Dict[str, array] = {}
+        for element_id, props, text in docs:
+            terms = tokenize(text)
+            if not terms:
+                continue
+            if element_id not in node_ids:
+                node_ids[element_id] = len(node_blobs)
+                node_blobs.append(json.dumps(
+                    {"id": element_id, "props": props}, ensure_ascii=False, default=str
+                ).encode("utf-8"))
+            doc = len(doc_nodes)
+            doc_nodes.append(node_ids[element_id])
+            doc_lengths.append(len(terms))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                postings.setdefault(term, array("I")).extend((doc, tf))
+
+        terms_meta = {}
+        for term in sorted(postings):
+            terms_meta[term] = [add_section(postings[term].tobytes()), len(postings[term]) // 2]
+        avgdl = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 1.0
+        # BM25 length normalization, precomputed per document
+        doc_norms = array("d", (BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl) for dl in doc_lengths))
+        indexes_meta[index_name] = {
+            "docs": len(doc_nodes),
+            "avgdl": avgdl,
+            "doc_nodes_at": add_section(doc_nodes.tobytes()),
+            "doc_norms_at": add_section(doc_norms.tobytes()),
+            "terms": terms_meta,
+        }
+
+    node_offsets = array("Q", [0])
+    for blob in node_blobs:
+        node_offsets.append(node_offsets[-1] + len(blob))
+    nodes_at = add_section(b"".join(node_blobs))
+    offsets_at = add_section(node_offsets.tobytes())
+
+    meta = json.dumps({
+        "format": 1,
+        "byteorder": sys.byteorder,
+        "k1": BM25_K1,
+        "b": BM25_B,
+        "graph_version": graph_version,
+        "built_at": time.time(),
+        "nodes": {"count": len(node_blobs), "data_at": nodes_at, "offsets_at": offsets_at},
+        "indexes": indexes_meta,
+    }, ensure_ascii=False).encode("utf-8")
+    meta += b" " * (-(HEADER.size + len(meta)) % 8)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(meta)))
+        f.write(meta)
+        for section in sections:
+            f.write(section)
+    os.replace(tmp_path, path)
+    return {
+        "nodes": len(node_blobs),
+        "terms": sum(len(ix["terms"]) for ix in indexes_meta.values()),
+        "bytes": os.path.getsize(path),
+    }
+
+class _MappedFile:
+    """One opened version of the index file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        magic, meta_len = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a local fulltext index")
+        self.meta = json.loads(self.mm[HEADER.size:HEADER.size + meta_len])
+        if self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {self.meta['byteorder']}-endian machine")
+        self.base = HEADER.size + meta_len
+        view = memoryview(self.mm)
+        self.view = view
+        nodes = self.meta["nodes"]
+        self.node_offsets = self._array(nodes["offsets_at"], nodes["count"] + 1, "Q")
+        self.node_data_at = self.base + nodes["data_at"]
+        self.index_arrays = {
+            name: (
+                self._array(ix["doc_nodes_at"], ix["docs"], "I"),
+                self._array(ix["doc_norms_at"], ix["docs"], "d"),
+            )
+            for name, ix in self.meta["indexes"].items()
+        }
+
+    def _array(self, at: int, count: int, fmt: str) -> memoryview:
+        size = struct.calcsize(fmt)
+        start = self.base + at
+        return self.view[start:start + count * size].cast(fmt)
+
+class LocalFulltextIndex:
+    """
+    Read side of the local index. The file is memory-mapped, so every
+    worker process on the machine shares one copy in the page cache; only
+    the term dictionaries are parsed into memory. search() returns the same
+    _id/_index/_score-tagged records as the Neo4j queries, scored with BM25.
+
+    A rebuilt file (same path) is picked up within check_interval seconds.
+    """
+
+    def __init__(self, path: str, check_interval: float = 30):
+        self.path = path
+        self.check_interval = check_interval
+        self._file = _MappedFile(path)
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def meta(self) -> Dict:
+        return self._file.meta
+
+    def has_index(self, index_name: str) -> bool:
+        return index_name in self._file.meta["indexes"]
+
+    def maybe_reload(self):
+        """Swap in the file at self.path if it was rebuilt since it was opened"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return
+            if (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self._file.identity:
+                # The old mapping is released once in-flight searches drop it
+                self._file = _MappedFile(self.path)
+                print(f"Reloaded local fulltext index {self.path}")
+
+    def search(self, index_name: str, query: str, limit: int) -> List[Dict]:
+        """Top `limit` nodes of one index for query, best first"""
+        return self._search(self._file, index_name, set(tokenize(query)), limit)
+
+    def search_many(self, indexes: Iterable[str], query: str, limit: int) -> Dict[str, List[Dict]]:
+        """search() for several indexes, keyed by index name"""
+        self.maybe_reload()
+        mapped = self._file
+        terms = set(tokenize(query))
+        return {
+            ix: self._search(mapped, ix, terms, limit)
+            for ix in indexes if ix in mapped.meta["indexes"]
+        }
+
+    def _search(self, mapped: _MappedFile, index_name: str, terms: set, limit: int) -> List[Dict]:
+        ix = mapped.meta["indexes"].get(index_name)
+        if ix is None or not ix["docs"]:
+            return []
+        doc_nodes, doc_norms = mapped.index_arrays[index_name]
+        total = ix["docs"]
+        k1 = mapped.meta["k1"]
+
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for term in terms:
+            entry = ix["terms"].get(term)
+            if entry is None:
+                continue
+            at, df = entry
+            weight = math.log(1 + (total - df + 0.5) / (df + 0.5)) * (k1 + 1)
+            postings = mapped._array(at, df * 2, "I")
+            for doc, tf in zip(postings[0::2], postings[1::2]):
+                scores[doc] = get(doc, 0.0) + weight * tf / (tf + doc_norms[doc])
+
+        results = []
+        for doc, score in nlargest(limit, scores.items(), key=itemgetter(1)):
+            node = self._node(mapped, doc_nodes[doc])
+            record = dict(node["props"])
+            record["_id"] = node["id"]
+            record["_index"] = index_name
+            record["_score"] = score
+            results.append(record)
+        return results
+
+    @staticmethod
+    def _node(mapped: _MappedFile, node: int) -> Dict:
+        start = mapped.node_data_at + mapped.node_offsets[node]
+        end = mapped.node_data_at + mapped.node_offsets[node + 1]
+        return json.loads(bytes(mapped.view[start:end]))
+
+def export_fulltext_indexes(driver, indexes: List[str]) -> Dict[str, List[Tuple[str, Dict, str]]]:
+    """
+    Read the nodes behind each fulltext index from Neo4j, with the text of
+    the properties the index covers
+    """
+    exported = {}
+    with driver.session() as session:
+        definitions = {
+            r["name"]: (r["labelsOrTypes"], r["properties"])
+            for r in session.run(SHOW_FULLTEXT_INDEXES_QUERY)
+        }
+        for index_name in indexes:
+            if index_name not in definitions:
+                print(f"Fulltext index {index_name} not found in Neo4j, skipping")
+                continue
+            labels, properties = definitions[index_name]
+            docs = []
+            for r in session.run(INDEX_NODES_QUERY, {"labels": labels}):
+                props = r["props"]
+                text = " ".join(str(props[p]) for p in properties if props.get(p) is not None)
+                if text:
+                    docs.append((r["id"], props, text))
+            exported[index_name] = docs
+    return exported
+
+def rebuild(rag_system, path: Optional[str] = None) -> Dict[str, int]:
+    """Export rag_system's indexes from Neo4j into the local index file"""
+    path = path or rag_system.LOCAL_INDEX_PATH
+    exported = export_fulltext_indexes(rag_system.driver, rag_system.INDEXES)
+    return build_local_index(path, exported, rag_system.get_graph_version())
+
+def compare_with_neo4j(rag_system, local_index: LocalFulltextIndex, questions: List[str],
+                       top_n_each: int = 3) -> Dict[str, object]:
+    """
+    Ranking overlap and retrieval latency of the local index against Neo4j
+    (batched query) over a question set. overlap is |local ∩ neo4j| / |neo4j|
+    of each index's top_n_each node ids; top1 is how often both put the
+    same node first.
+    """
+    overlaps, top1, neo4j_times, local_times = [], [], [], []
+    for question in questions:
+        start = time.perf_counter()
+        with rag_system.driver.session() as session:
+            remote = rag_system._query_indexes_batched(session, rag_system.INDEXES, question, top_n_each)
+        neo4j_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        local = local_index.search_many(rag_system.INDEXES, question, top_n_each)
+        local_times.append(time.perf_counter() - start)
+
+        for index_name, facts in remote.items():
+            if not facts:
+                continue
+            expected = [f["_id"] for f in facts]
+            found = [f["_id"] for f in local.get(index_name, [])]
+            overlaps.append(len(set(expected) & set(found)) / len(expected))
+            top1.append(bool(found) and found[0] == expected[0])
+
+    def ms(values, pct):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000 if ordered else 0.0
+
+    return {
+        "questions": len(questions),
+        "compared_rankings": len(overlaps),
+        f"overlap_at_{top_n_each}": sum(overlaps) / len(overlaps) if overlaps else 0.0,
+        "top1_agreement": sum(top1) / len(top1) if top1 else 0.0,
+        "neo4j_p50_ms": ms(neo4j_times, 50),
+        "neo4j_p95_ms": ms(neo4j_times, 95),
+        "local_p50_ms": ms(local_times, 50),
+        "local_p95_ms": ms(local_times, 95),
+    }
+
+def main(argv: Optional[List[str]] = None):
+    """
+    python -m api.local_index build [--path P]
+    python -m api.local_index compare questions.txt [--path P] [--top-n N]
+    """
+    import argparse
+
+    from dotenv import load_dotenv
+    from api.rag_system import AgricultureRAGSystem
+
+    parser = argparse.ArgumentParser(description="Local fulltext index for the RAG system")
+    parser.add_argument("command", choices=["build", "compare"])
+    parser.add_argument("questions", nargs="?", help="question log for compare, one per line")
+    parser.add_argument("--path", help="index file (default LOCAL_INDEX_PATH)")
+    parser.add_argument("--top-n", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    rag_system = AgricultureRAGSystem()
+    path = args.path or rag_system.LOCAL_INDEX_PATH
+    try:
+        if args.command == "build":
+            start = time.perf_counter()
+            counts = rebuild(rag_system, path)
+            print(f"Built {path}: {counts['nodes']} nodes, {counts['terms']} terms, "
+                  f"{counts['bytes'] / 1024:.0f} KiB in {time.perf_counter() - start:.1f}s")
+        else:
+            if not args.questions:
+                parser.error("compare needs a question file")
+            with open(args.questions, encoding="utf-8") as f:
+                questions = [line.strip() for line in f if line.strip()]
+            report = compare_with_neo4j(rag_system, LocalFulltextIndex(path), questions, args.top_n)
+            print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in report.items()}, indent=2))
+    finally:
+        rag_system.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
+import asyncio
+import json
 import sys
 import os
 from pathlib import Path
+from typing import List
 
 # Add the project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 try:
-    from fastapi import FastAPI, HTTPException
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI, HTTPException, Request, Response
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, StreamingResponse
     from pydantic import BaseModel
     from dotenv import load_dotenv
     import uvicorn
@@ -17,10 +22,33 @@ except ImportError as e:
     print("Please install: pip install fastapi uvicorn python-dotenv")
     sys.exit(1)
 
+from api.circuit_breaker import CircuitOpenError
+from api.formatting import (
+    format_response_header,
+    format_response_with_markdown,
+    sse_event,
+    RESPONSE_FOOTER,
+)
+from api.metrics import REGISTRY, STAGE_SECONDS
+from api.runtime import LazyRAGSystem, configure_logging
+
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Bangladesh Agriculture RAG API", version="1.0.0")
+# LOG_LEVEL applies to the project's loggers only, not the root logger
+configure_logging()
+
+# Largest number of questions accepted by /chat/batch
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release the Neo4j pool and the shared OpenAI HTTP client on shutdown
+    if rag_runtime.instance:
+        await rag_runtime.instance.close()
+
+app = FastAPI(title="Bangladesh Agriculture RAG API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware for frontend integration
 app.add_middleware(
@@ -31,15 +59,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize RAG system with error handling
-rag_system = None
-try:
-    from api.rag_system import AgricultureRAGSystem
-    rag_system = AgricultureRAGSystem()
-    print("✅ RAG System initialized successfully")
-except Exception as e:
-    print(f"⚠️ Warning: Could not initialize RAG system: {e}")
-    print("The API will run in demo mode")
+def create_rag_system():
+    # Imported here so neo4j/openai load on first use, not at import time
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+    return AsyncAgricultureRAGSystem()
+
+# RAG system is created on first use; failures are retried with backoff and
+# the API runs in demo mode meanwhile
+rag_runtime = LazyRAGSystem(create_rag_system)
+
+async def get_rag_system():
+    """The RAG system or None; first-time initialization runs off the event loop"""
+    if rag_runtime.instance is not None:
+        return rag_runtime.instance
+    return await asyncio.to_thread(rag_runtime.get)
 
 class ChatRequest(BaseModel):
     question: str
@@ -51,26 +84,53 @@ class ChatResponse(BaseModel):
     approach: str
     model: str
 
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    approach: str = "GraphRAG"
+    model: str = "GPT-4"
+
 @app.get("/")
 async def root():
     return {"message": "Bangladesh Agriculture RAG API is running"}
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "rag_system": "connected" if rag_system else "demo_mode"
+    """
+    Initializes the RAG system if needed and probes Neo4j with one cheap
+    query. Responds 503 ("degraded") when the probe fails, the Neo4j
+    circuit is open, or the RAG system could not be initialized.
+    """
+    rag_system = await get_rag_system()
+    neo4j = await rag_system.check_health() if rag_system else None
+    healthy = neo4j is not None and neo4j["neo4j"] == "up"
+    content = {
+        "status": "healthy" if healthy else "degraded",
+        "rag_system": rag_runtime.status,
+        "neo4j": neo4j,
+        "answer_cache": rag_system.answer_cache.stats() if rag_system and rag_system.answer_cache else None,
+        "retrieval_cache": rag_system.retrieval_cache.stats() if rag_system and rag_system.retrieval_cache else None,
+        "fact_text_cache": rag_system.fact_texts.stats() if rag_system and rag_system.fact_texts else None,
+        "coalesced_requests": rag_system.in_flight.stats() if rag_system else None,
+        "index_router": rag_system.index_router.stats() if rag_system else None
     }
+    return JSONResponse(content, status_code=200 if healthy else 503)
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage and per-index latency histograms in Prometheus text format"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     try:
+        rag_system = await get_rag_system()
         if rag_system:
-            # Use the original RAG logic
-            raw_answer = rag_system.get_rag_answer(request.question)
+            # Use the original RAG logic, awaited so other requests keep flowing
+            raw_answer = await rag_system.get_rag_answer(request.question)
             
             # Format the answer with markdown for better presentation
-            formatted_answer = format_response_with_markdown(raw_answer, request.question)
+            with STAGE_SECONDS.time(stage="response_format"):
+                formatted_answer = format_response_with_markdown(raw_answer, request.question)
             answer = formatted_answer
         else:
             # Demo response when RAG system is not available
@@ -81,34 +141,125 @@ async def chat(request: ChatRequest):
             approach=request.approach,
             model=request.model
         )
+    except CircuitOpenError as e:
+        # Neo4j is down and nothing relevant is cached: fail fast
+        raise HTTPException(status_code=503, detail=f"Knowledge graph unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
-def format_response_with_markdown(text: str, question: str) -> str:
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
     """
-    Format the response with markdown for better presentation
+    Stream the answer as Server-Sent Events: a "header" event straight away,
+    "token" events as the LLM generates them, then "footer" and "done"
     """
-    # Extract topic from question
-    topic = question.strip().rstrip('?।').split()[-3:]
-    topic = ' '.join(topic)
-    
-    # Create a formatted response with markdown
-    formatted_text = f"""## {topic} সম্পর্কে তথ্য:
+    async def events():
+        yield sse_event("header", format_response_header(request.question))
+        try:
+            rag_system = await get_rag_system()
+            if rag_system:
+                async for token in rag_system.stream_rag_answer(request.question):
+                    yield sse_event("token", token)
+            else:
+                yield sse_event("token", f"[ডেমো মোড] আপনার প্রশ্ন '{request.question}' পেয়েছি। RAG সিস্টেম সংযুক্ত হলে সম্পূর্ণ উত্তর পাবেন।")
+        except Exception as e:
+            yield sse_event("error", f"Error processing request: {str(e)}")
+        yield sse_event("footer", RESPONSE_FOOTER)
+        yield sse_event("done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    Answer many questions in one request. Results stream back as NDJSON, one
+    line per distinct question as soon as it is answered:
+    {"ids": [positions in questions], "question", "response"} or "error"
+    instead of "response". A final {"done": true, ...} line closes the batch.
+    """
+    if len(request.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_MAX_QUESTIONS} questions per batch, got {len(request.questions)}",
+        )
 
-{text}
+    def line(payload: dict) -> str:
+        return json.dumps(payload, ensure_ascii=False) + "\n"
 
----
-*উৎস: বাংলাদেশ কৃষি গবেষণা ইনস্টিটিউট*
-"""
-    return formatted_text
+    async def results():
+        answered = failed = 0
+        try:
+            rag_system = await get_rag_system()
+            if rag_system:
+                async for result in rag_system.answer_batch(request.questions):
+                    if "answer" in result:
+                        with STAGE_SECONDS.time(stage="response_format"):
+                            result["response"] = format_response_with_markdown(result.pop("answer"), result["question"])
+                        answered += 1
+                    else:
+                        result["error"] = f"Error processing request: {result['error']}"
+                        failed += 1
+                    yield line(result)
+            else:
+                positions = {}
+                for position, question in enumerate(request.questions):
+                    positions.setdefault(question, []).append(position)
+                for question, ids in positions.items():
+                    answered += 1
+                    yield line({
+                        "ids": ids,
+                        "question": question,
+                        "response": f"[ডেমো মোড] আপনার প্রশ্ন '{question}' পেয়েছি। RAG সিস্টেম সংযুক্ত হলে সম্পূর্ণ উত্তর পাবেন।",
+                    })
+        except Exception as e:
+            yield line({"error": f"Error processing request: {str(e)}"})
+        yield line({
+            "done": True,
+            "questions": len(request.questions),
+            "answered": answered,
+            "failed": failed,
+            "approach": request.approach,
+            "model": request.model,
+        })
+
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/warmup")
+async def warmup():
+    """
+    Initialize the RAG system, check Neo4j and load the variety catalog, so
+    the first real request does not pay for it. Safe to call repeatedly.
+    """
+    rag_system = await get_rag_system()
+    if not rag_system:
+        return {"status": "demo_mode", **rag_runtime.describe()}
+    try:
+        timings = await rag_system.warm_up()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Warm-up failed: {str(e)}")
+    return {"status": "warm", **rag_runtime.describe(), "timings": timings}
 
 @app.get("/varieties")
-async def get_varieties():
-    """Get all available crop varieties"""
+async def get_varieties(request: Request):
+    """Get all available crop varieties (supports If-None-Match / 304)"""
     try:
+        rag_system = await get_rag_system()
         if rag_system:
-            varieties = rag_system.get_all_varieties()
-            return {"varieties": varieties}
+            await rag_system.get_all_varieties()
+            # Payload and ETag are precomputed when the catalog is refreshed
+            snapshot = rag_system.variety_catalog.snapshot
+            headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+            if request.headers.get("if-none-match") == snapshot.etag:
+                return Response(status_code=304, headers=headers)
+            return Response(content=snapshot.payload, media_type="application/json", headers=headers)
         else:
             # Demo varieties
             demo_varieties = [
@@ -0,0 +1,203 @@
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+
+from api.cache import normalize_question
+from api.index_router import BANGLA_SUFFIXES, INDEX_KEYWORDS
+from api.metrics import REGISTRY, Counter
+
+QUESTION_CLASSES = REGISTRY.register(Counter(
+    "rag_question_class_total",
+    "Questions per class (broad, variety, topic)",
+    ["kind"],
+))
+
+# Asking for a list, a comparison or everything: outweighs topic words
+# ("সব জাতের ফলন" wants every variety's yield, not one fact). Matched as
+# whole words, since "সব" also starts "সবজি".
+LIST_KEYWORDS = (
+    "সব", "সবগুলি", "সবগুলো", "সকল", "সমস্ত", "ধরন", "ধরনের", "প্রকার", "প্রকারের",
+    "কি কি", "কী কী", "কোন কোন", "কোনগুলো", "তালিকা", "তুলনা", "পার্থক্য",
+    "varieties", "list", "enumerate", "compare", "all", "types",
+)
+
+# Generic words from the original broad-question heuristic; they make a
+# question broad only when it names no specific topic ("ধান চাষ কিভাবে
+# করব?" is broad, "ধানের রোগ দমন কিভাবে করব?" is not)
+GENERIC_KEYWORDS = (
+    "কিভাবে", "কেমন", "চাষ", "ধাপ", "করব", "প্রয়োজন", "প্রসঙ্গ", "জাত",
+    "variety", "overall", "abadh", "production", "process",
+)
+
+BROAD = "broad"
+VARIETY = "variety"
+TOPIC = "topic"
+
+# Instruction templates per class, placed before the question
+INSTRUCTIONS = {
+    VARIETY: (
+        "Only answer using context blocks that mention the variety '{variety}'. "
+        "Do not use or mention other varieties in your answer. "
+        "Synthesize a precise answer summarizing all relevant information for that variety only."
+    ),
+    TOPIC: (
+        "Answer the specific question precisely from the most relevant context blocks. "
+        "If the information differs between varieties, say which varieties it applies to."
+    ),
+    BROAD: (
+        "Summarize all relevant information in the context for this broad query. "
+        "If varieties or types are mentioned, list or compare them as appropriate."
+    ),
+}
+
+class QuestionIntent:
+    """Class of one question and the retrieval depth and instruction it gets"""
+
+    def __init__(self, kind: str, variety: Optional[str], top_n_each: int,
+                 matched: Sequence[str] = (), listing: bool = False):
+        self.kind = kind
+        self.variety = variety
+        self.top_n_each = top_n_each
+        self.matched = list(matched)
+        self.listing = listing
+
+    @property
+    def instruction(self) -> str:
+        return INSTRUCTIONS[self.kind].format(variety=self.variety)
+
+class QuestionClassifier:
+    """
+    Labels a question broad/list, variety-specific or topic-specific.
+
+    The list, generic and topic keywords (the index router's intent words)
+    are compiled into one regex, so the normalized question is scanned
+    once. List words match whole words; topic words match like the
+    router's (whole words with an optional inflectional suffix, so "রোগে"
+    hits but "সারাদেশে" does not); generic words match as substrings.
+    Precedence:
+    - a variety found by the variety matcher makes it variety-specific;
+    - otherwise list words make it broad;
+    - otherwise topic words make it topic-specific;
+    - anything else (generic or unmatched) is broad.
+    Broad questions fetch the most hits per index, topic questions the
+    fewest; a variety question that asks for a list gets the broad depth.
+    """
+
+    def __init__(self, top_n: Optional[Dict[str, int]] = None):
+        self.top_n = {BROAD: 6, VARIETY: 5, TOPIC: 3, **(top_n or {})}
+
+        list_words = {normalize_question(word) for word in LIST_KEYWORDS}
+        topic_words = {
+            normalize_question(word) for words in INDEX_KEYWORDS.values() for word in words
+        } - list_words
+        # topic wins over generic ("production")
+        generic_words = {normalize_question(word) for word in GENERIC_KEYWORDS} - list_words - topic_words
+        suffixes = {normalize_question(suffix) for suffix in BANGLA_SUFFIXES}
+
+        def alternation(words):
+            return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)) or "(?!)"
+
+        # One group per kind, tried in this order at each position
+        self._group_kinds = ("list", TOPIC, TOPIC, "generic")
+        self._pattern = re.compile(
+            r"(?<!\S)(" + alternation(list_words) + r")(?!\S)"
+            + r"|(?<!\S)(" + alternation(w for w in topic_words if not w.isascii()) + ")"
+            + "(?:" + alternation(suffixes) + r")?(?!\S)"
+            + r"|\b(" + alternation(w for w in topic_words if w.isascii()) + r")(?:e?s)?\b"
+            + "|(" + alternation(generic_words) + ")"
+        )
+
+    def classify(self, question: str, variety_name: Optional[str] = None) -> QuestionIntent:
+        """Class of question, given the variety the variety matcher found in it (if any)"""
+        matched, found = [], set()
+        for match in self._pattern.finditer(normalize_question(question)):
+            matched.append(match.group(match.lastindex))
+            found.add(self._group_kinds[match.lastindex - 1])
+        listing = "list" in found
+        if variety_name:
+            kind = VARIETY
+            top_n = max(self.top_n[VARIETY], self.top_n[BROAD]) if listing else self.top_n[VARIETY]
+        elif listing:
+            kind, top_n = BROAD, self.top_n[BROAD]
+        elif TOPIC in found:
+            kind, top_n = TOPIC, self.top_n[TOPIC]
+        else:
+            kind, top_n = BROAD, self.top_n[BROAD]
+        QUESTION_CLASSES.inc(kind=kind)
+        return QuestionIntent(kind, variety_name, top_n, matched, listing)
+
+def create_question_classifier() -> QuestionClassifier:
+    """
+    Build the classifier from the environment: hits per index for each
+    class in QUESTION_TOP_N_BROAD, QUESTION_TOP_N_VARIETY, QUESTION_TOP_N_TOPIC
+    """
+    return QuestionClassifier({
+        BROAD: int(os.getenv("QUESTION_TOP_N_BROAD", "6")),
+        VARIETY: int(os.getenv("QUESTION_TOP_N_VARIETY", "5")),
+        TOPIC: int(os.getenv("QUESTION_TOP_N_TOPIC", "3")),
+    })
+
+def benchmark(classifier: QuestionClassifier, matcher, questions: Sequence[str],
+              repeat: int = 200) -> Dict[str, object]:
+    """Class counts and per-question cost of variety matching plus classification"""
+    counts: Dict[str, int] = {}
+    for question in questions:
+        kind = classifier.classify(question, matcher.longest(question)).kind
+        counts[kind] = counts.get(kind, 0) + 1
+
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            classifier.classify(question, matcher.longest(question))
+        timings.append((time.perf_counter() - start) / repeat)
+    timings.sort()
+    return {
+        "questions": len(questions),
+        "classes": counts,
+        "mean_us": sum(timings) / len(timings) * 1e6 if timings else 0.0,
+        "p99_us": timings[min(len(timings) - 1, int(0.99 * len(timings)))] * 1e6 if timings else 0.0,
+        "max_us": timings[-1] * 1e6 if timings else 0.0,
+    }
+
+def main(argv: Optional[List[str]] = None):
+    """python -m api.question_classifier questions.txt: classes and cost per question"""
+    import argparse
+    import json
+
+    from dotenv import load_dotenv
+    from api.variety_matcher import VarietyMatcher
+
+    parser = argparse.ArgumentParser(description="Question classifier report and micro-benchmark")
+    parser.add_argument("questions", help="text file with one question per line")
+    parser.add_argument("--varieties", help="variety names, one per line (default: load from Neo4j)")
+    parser.add_argument("--show", action="store_true", help="print the class of every question")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    with open(args.questions, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+    if args.varieties:
+        with open(args.varieties, encoding="utf-8") as f:
+            varieties = [line.strip() for line in f if line.strip()]
+    else:
+        from api.rag_system import AgricultureRAGSystem
+        rag_system = AgricultureRAGSystem()
+        try:
+            varieties = rag_system.get_all_variety_names()
+        finally:
+            rag_system.close()
+
+    classifier = create_question_classifier()
+    matcher = VarietyMatcher(varieties)
+    if args.show:
+        for question in questions:
+            intent = classifier.classify(question, matcher.longest(question))
+            print(f"{intent.kind:8} top_n={intent.top_n_each}  {question}")
+    report = benchmark(classifier, matcher, questions)
+    print(json.dumps({k: round(v, 2) if isinstance(v, float) else v for k, v in report.items()},
+                     ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
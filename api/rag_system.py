@@ -1,12 +1,84 @@
-from neo4j import GraphDatabase
-import openai
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional
+
+from api.cache import create_answer_cache, create_retrieval_cache, normalize_question
+from api.circuit_breaker import CircuitOpenError, create_neo4j_breaker
+from api.context_builder import (
+    build_context,
+    create_fact_text_cache,
+    dedupe_facts,
+    filter_facts_by_varieties,
+)
+from api.index_router import RoutePlan, create_index_router
+from api.metrics import (
+    INDEX_CONTEXT_FACTS,
+    INDEX_HITS,
+    INDEX_QUERY_SECONDS,
+    INDEX_SCORES,
+    STAGE_SECONDS,
+)
+from api.question_classifier import QuestionIntent, create_question_classifier
+from api.singleflight import SingleFlight
+from api.variety_catalog import create_variety_catalog
+from api.variety_matcher import VarietyMatcher
+
+VARIETY_NAMES_QUERY = "MATCH (n:`Variety Name`) RETURN DISTINCT n.`জাতের নাম` AS name"
+
+# Cheap probe for the variety catalog: a change in the count (or in
+# GRAPH_DATA_VERSION) means the graph was reloaded
+GRAPH_VERSION_QUERY = "MATCH (n:`Variety Name`) RETURN count(n) AS count"
+
+# Cheapest round trip for the /health probe
+HEALTH_QUERY = "RETURN 1 AS ok"
+
+# All fulltext lookups in one round trip. The subquery keeps the per-index
+# LIMIT, and rows come back grouped in $indexes order.
+BATCHED_FULLTEXT_QUERY = """
+UNWIND $indexes AS index_name
+CALL {
+    WITH index_name
+    CALL db.index.fulltext.queryNodes(index_name, $query)
+    YIELD node, score
+    RETURN node, score
+    ORDER BY score DESC
+    LIMIT $limit
+}
+RETURN index_name, node, score
+"""
+
+# Fulltext lookups of many questions in one round trip, one lookup per
+# (question, index) pair. LIMIT cannot refer to a variable, so every lookup
+# uses the largest top_n and callers trim.
+BULK_FULLTEXT_QUERY = """
+UNWIND $lookups AS lookup
+CALL {
+    WITH lookup
+    CALL db.index.fulltext.queryNodes(lookup.index_name, lookup.query)
+    YIELD node, score
+    RETURN node, score
+    ORDER BY score DESC
+    LIMIT $limit
+}
+RETURN lookup.id AS lookup_id, lookup.index_name AS index_name, node, score
+"""
+
+LLM_MODEL = "gpt-4o"
+SYSTEM_PROMPT = "You are an AI assistant that answers questions using the provided context."
+
+logger = logging.getLogger(__name__)
 
 class AgricultureRAGSystem:
     """
     Bangladesh Agriculture RAG System
     Preserves the exact logic from the original final.py file
+
+    Construction only reads configuration; neo4j and openai are imported and
+    their clients created on first use (see connect()), so importing and
+    building the system stays cheap on serverless cold starts.
     """
     
     def __init__(self):
@@ -15,11 +87,51 @@ class AgricultureRAGSystem:
         self.NEO4J_USERNAME = os.getenv("NEO4J_USERNAME") 
         self.NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
         self.NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+
+        # Neo4j connection pool: connections per process, seconds to wait for
+        # a free connection, seconds before a connection is recycled, and
+        # seconds to open a new one
+        self.NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+        self.NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "10"))
+        self.NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+        self.NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "10"))
+        self.NEO4J_HEALTH_TIMEOUT = float(os.getenv("NEO4J_HEALTH_TIMEOUT", "2.0"))
+
+        # Fails Neo4j calls fast after repeated failures instead of sending
+        # every index query to a database that is down
+        self.neo4j_breaker = create_neo4j_breaker()
         self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-        
-        # Set OpenAI API key
-        openai.api_key = self.OPENAI_API_KEY
-        
+
+        # Retrieval mode: "batched" sends every fulltext lookup in one query,
+        # "parallel" runs the per-index queries concurrently on a worker pool,
+        # "sequential" runs the original one-query-per-index loop
+        self.RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "batched").lower()
+        self.RETRIEVAL_MAX_WORKERS = int(os.getenv("RAG_RETRIEVAL_MAX_WORKERS", "8"))
+        self.INDEX_TIMEOUT = float(os.getenv("RAG_INDEX_TIMEOUT", "2.0"))
+        # Parallel mode: seconds a lookup may wait for a free worker (the
+        # pool is shared by every request) before it is dropped unstarted
+        self.RETRIEVAL_QUEUE_TIMEOUT = float(os.getenv("RAG_RETRIEVAL_QUEUE_TIMEOUT", "10"))
+
+        # Retrieval backend: "neo4j" (fulltext queries) or "local" (the
+        # memory-mapped index built by `python -m api.local_index build`)
+        self.RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "neo4j").lower()
+        self.LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/fulltext_index.bin")
+        # Seconds before a local index that failed to open is tried again;
+        # Neo4j serves the lookups meanwhile
+        self.LOCAL_INDEX_RETRY_INTERVAL = float(os.getenv("LOCAL_INDEX_RETRY_INTERVAL", "30"))
+        self._local_index = None
+        self._local_index_retry_at = 0.0
+
+        # Optional dense retrieval fused with the fulltext hits by reciprocal
+        # rank fusion; the embeddings are built by `python -m api.dense_index build`
+        self.DENSE_RETRIEVAL = os.getenv("DENSE_RETRIEVAL", "off").lower() in ("1", "true", "on")
+        self.DENSE_INDEX_PATH = os.getenv("DENSE_INDEX_PATH", "data/dense_index")
+        self._dense_retriever = None
+
+        # Upper bound on context tokens sent to the LLM per question
+        self.CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "6000"))
+
+
         # Fulltext search indexes - preserved from original
         self.INDEXES = [
             "categoryFulltext",
@@ -44,142 +156,608 @@ class AgricultureRAGSystem:
             "biseshUdyantattikBebosthaponaFulltext",
             "mediaFulltext"
         ]
+
+        # Picks the subset of INDEXES worth querying for each question
+        self.index_router = create_index_router(self.INDEXES)
+
+        # Labels questions broad, variety- or topic-specific, which sets the
+        # hits fetched per index and the answer instruction
+        self.question_classifier = create_question_classifier()
         
-        # Initialize Neo4j driver
-        self.driver = GraphDatabase.driver(
+        # Neo4j driver and OpenAI client, created on first use
+        self._driver = None
+        self._llm_client = None
+        self._connect_lock = threading.Lock()
+
+        # Worker pool for parallel retrieval, created on first use
+        self._retrieval_pool = None
+
+        # Variety names with their matcher and /varieties payload, refreshed
+        # in the background and warmed from VARIETY_SNAPSHOT_PATH if set
+        self.GRAPH_DATA_VERSION = os.getenv("GRAPH_DATA_VERSION", "")
+        self.variety_catalog = create_variety_catalog()
+        self._variety_matcher = None
+
+        # Answer cache in front of get_rag_answer. Entries are dropped when the
+        # variety list or GRAPH_DATA_VERSION (bump it after reloading the graph)
+        # changes.
+        self.answer_cache = create_answer_cache()
+
+        # Memoized per-index fulltext hits, shared by every request. Call
+        # retrieval_cache.invalidate() after reloading the knowledge graph.
+        self.retrieval_cache = create_retrieval_cache()
+
+        # Rendered properties and variety search text of each node, shared
+        # by the variety filter and the context builder
+        self.fact_texts = create_fact_text_cache()
+
+        # Coalesces concurrent identical questions into one computation
+        self.in_flight = self._create_single_flight()
+
+    def _create_single_flight(self):
+        """Thread-based single-flight group (the async variant uses asyncio)"""
+        return SingleFlight()
+
+    def connect(self):
+        """
+        Create the Neo4j driver and the OpenAI client if not done yet.
+        Thread-safe; raises if the configuration is unusable.
+        """
+        if self._driver is not None:
+            return
+        with self._connect_lock:
+            if self._driver is not None:
+                return
+            self._llm_client = self._create_llm_client()
+            self._driver = self._create_driver()
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self.connect()
+        return self._driver
+
+    @property
+    def llm_client(self):
+        if self._llm_client is None:
+            self.connect()
+        return self._llm_client
+
+    def _create_llm_client(self):
+        """Create the OpenAI client (overridden by the async variant)"""
+        import openai
+        return openai.OpenAI(api_key=self.OPENAI_API_KEY)
+
+    def _create_driver(self):
+        """Create the Neo4j driver (overridden by the async variant)"""
+        from neo4j import GraphDatabase
+        return GraphDatabase.driver(
             self.NEO4J_URI,
             auth=(self.NEO4J_USERNAME, self.NEO4J_PASSWORD),
-            database=self.NEO4J_DATABASE
+            database=self.NEO4J_DATABASE,
+            **self._driver_options()
         )
-        
-        # Cache variety names for better performance
-        self._variety_names_cache = None
+
+    def _driver_options(self) -> Dict[str, Any]:
+        """Connection pool settings shared by the sync and async drivers"""
+        return {
+            "max_connection_pool_size": self.NEO4J_MAX_POOL_SIZE,
+            "connection_acquisition_timeout": self.NEO4J_ACQUISITION_TIMEOUT,
+            "max_connection_lifetime": self.NEO4J_MAX_CONNECTION_LIFETIME,
+            "connection_timeout": self.NEO4J_CONNECTION_TIMEOUT,
+        }
 
     def get_all_variety_names(self) -> List[str]:
         """
         Fetch all unique variety names from the database dynamically
-        Preserved from original final.py
+        Served from the variety catalog; a stale catalog is refreshed in the
+        background while requests keep using the current names
         """
-        if self._variety_names_cache is not None:
-            return self._variety_names_cache
-            
-        with self.driver.session() as session:
-            result = session.run("MATCH (n:`Variety Name`) RETURN DISTINCT n.`জাতের নাম` AS name")
+        catalog = self.variety_catalog
+        if catalog.snapshot is None:
+            self.refresh_variety_catalog()
+        elif catalog.is_stale():
+            catalog.refresh_in_background(self.refresh_variety_catalog)
+        return catalog.snapshot.names
+
+    def get_graph_version(self) -> str:
+        """Current graph version as seen by the catalog probe"""
+        with self.neo4j_breaker.guard(), self.driver.session() as session:
+            record = session.run(GRAPH_VERSION_QUERY).single()
+        return f"{self.GRAPH_DATA_VERSION}:{record['count']}"
+
+    def refresh_variety_catalog(self, force: bool = False):
+        """
+        Probe the graph version and reload the variety names if it changed or
+        the catalog is older than its reload interval
+        """
+        catalog = self.variety_catalog
+        graph_version = self.get_graph_version()
+        if not force and not catalog.needs_reload(graph_version):
+            catalog.mark_checked()
+            return
+
+        previous = catalog.snapshot
+        with self.neo4j_breaker.guard(), self.driver.session() as session:
+            result = session.run(VARIETY_NAMES_QUERY)
             variety_names = [r["name"] for r in result if r["name"]]
-            self._variety_names_cache = variety_names
-            return variety_names
+        catalog.update(variety_names, graph_version)
+        print(f"Variety catalog loaded {len(variety_names)} names (graph version {graph_version})")
+        if previous is not None and previous.graph_version != graph_version:
+            self.invalidate_caches()
 
     def extract_variety_from_question(self, question: str, all_variety_names: List[str]) -> Optional[str]:
         """
-        Looks up which variety is mentioned in the user's question
-        Preserved from original final.py
+        Looks up which variety is mentioned in the user's question.
+        Uses an Aho-Corasick matcher built once per variety list, and returns
+        the longest match so "ব্রি ধান২" cannot shadow "ব্রি ধান২৮".
         """
-        for v in all_variety_names:
-            if v and v in question:
-                return v
-        return None
+        return self.get_variety_matcher(all_variety_names).longest(question)
+
+    def get_variety_matcher(self, all_variety_names: List[str]) -> VarietyMatcher:
+        """Matcher for the given variety list, rebuilt only when the list changes"""
+        snapshot = self.variety_catalog.snapshot
+        if snapshot is not None and snapshot.names is all_variety_names:
+            return snapshot.matcher
+        cached = self._variety_matcher
+        if cached is None or cached[0] is not all_variety_names:
+            cached = (all_variety_names, VarietyMatcher(all_variety_names))
+            self._variety_matcher = cached
+        return cached[1]
 
     def filter_facts_by_variety(self, facts: List[Dict], variety_name: str) -> List[Dict]:
         """
         Filter facts by variety name
-        Preserved from original final.py
+        Preserved from original final.py; names are now matched in
+        normalized form ("ব্রি ধান-২৮" matches "ব্রি ধান২৮")
         """
-        filtered = []
-        for fact in facts:
-            if any(variety_name in str(v) for k, v in fact.items() if not k.startswith('_')):
-                filtered.append(fact)
-        return filtered
+        return self.filter_facts_by_varieties(facts, [variety_name])[variety_name]
+
+    def filter_facts_by_varieties(self, facts: List[Dict], variety_names: List[str]) -> Dict[str, List[Dict]]:
+        """The facts mentioning each of several varieties, in a single pass"""
+        return filter_facts_by_varieties(facts, variety_names, self.fact_texts)
 
-    def get_relevant_facts(self, user_query: str, top_n_each: int = 4) -> List[Dict]:
+    def get_relevant_facts(self, user_query: str, top_n_each: int = 4,
+                           mode: Optional[str] = None,
+                           indexes: Optional[List[str]] = None) -> List[Dict]:
         """
         Get relevant facts using Neo4j fulltext search
         Preserved from original final.py
+
+        mode: "batched" (one round trip for all indexes), "parallel" (one
+        query per index on a bounded worker pool) or "sequential" (one query
+        per index). Defaults to self.RETRIEVAL_MODE.
+        indexes: the indexes to search (see index_router); defaults to all
+        of self.INDEXES.
+        Per-index results are memoized in self.retrieval_cache, so only the
+        indexes without a fresh cached entry go to Neo4j. While the Neo4j
+        circuit is open, expired cache entries are served instead; with
+        nothing cached, CircuitOpenError is raised.
+        With DENSE_RETRIEVAL on, each index's hits are fused with its
+        nearest embeddings (see _fuse_dense).
+        """
+        results, missing = self._cached_index_results(user_query, top_n_each, indexes)
+        if missing:
+            try:
+                fetched = self._fetch_indexes(missing, user_query, top_n_each, mode)
+            except CircuitOpenError as e:
+                fetched = self._stale_index_results(e, results, missing, user_query, top_n_each)
+            else:
+                if self.retrieval_cache is not None:
+                    self.retrieval_cache.set_many(fetched, user_query, top_n_each)
+            results.update(fetched)
+        self._record_index_hits(results)
+        if self.DENSE_RETRIEVAL:
+            results = self._fuse_dense(results, user_query, top_n_each, indexes)
+        return self._merge_index_results(results)
+
+    @property
+    def dense_retriever(self):
+        """The dense embedding index, memory-mapped on first use; None if unavailable"""
+        if self._dense_retriever is None and self.DENSE_RETRIEVAL:
+            from api.dense_index import create_dense_retriever
+            self._dense_retriever = create_dense_retriever(self.DENSE_INDEX_PATH)
+            if self._dense_retriever is None:
+                self.DENSE_RETRIEVAL = False
+        return self._dense_retriever
+
+    def _fuse_dense(self, results: Dict[str, List[Dict]], user_query: str, top_n_each: int,
+                    indexes: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
         """
-        all_facts = []
+        Rerank each index's fulltext hits together with its top dense hits
+        by reciprocal rank fusion. Paraphrased questions that share no terms
+        with a fact can still reach it through the embeddings.
+        """
+        retriever = self.dense_retriever
+        if retriever is None:
+            return results
+        try:
+            with INDEX_QUERY_SECONDS.time(index="dense"):
+                dense = retriever.search([user_query], self.INDEXES if indexes is None else indexes, top_n_each)[0]
+        except Exception as e:
+            print(f"Dense retrieval failed, using fulltext results only: {e}")
+            return results
+        return retriever.fuse(results, dense, top_n_each)
+
+    def _record_index_hits(self, results: Dict[str, List[Dict]]):
+        """Per-index hit counts and score distributions for /metrics"""
+        for index_name, facts in results.items():
+            INDEX_HITS.inc(len(facts), index=index_name)
+            for fact in facts:
+                INDEX_SCORES.observe(fact["_score"], index=index_name)
+
+    def _cached_index_results(self, user_query: str, top_n_each: int,
+                              indexes: Optional[List[str]] = None):
+        """Split the indexes into cached results and indexes still to query"""
+        indexes = self.INDEXES if indexes is None else indexes
+        if self.retrieval_cache is None:
+            return {}, list(indexes)
+        results = self.retrieval_cache.get_many(indexes, user_query, top_n_each)
+        return results, [ix for ix in indexes if ix not in results]
+
+    def _stale_index_results(self, error: CircuitOpenError, results: Dict[str, List[Dict]],
+                             missing: List[str], user_query: str, top_n_each: int) -> Dict[str, List[Dict]]:
+        """Expired cached hits for the missing indexes; re-raises if nothing is cached at all"""
+        stale = {}
+        if self.retrieval_cache is not None:
+            stale = self.retrieval_cache.get_many(missing, user_query, top_n_each, stale=True)
+        if not results and not stale:
+            raise error
+        logger.info("%s; answering from %d cached index results", error, len(results) + len(stale))
+        return stale
+
+    def _merge_index_results(self, results: Dict[str, List[Dict]]) -> List[Dict]:
+        """
+        Concatenate per-index hits in self.INDEXES order and sort by score;
+        the sort is stable, so ties keep index order whatever the mode
+        """
+        all_facts = [fact for ix in self.INDEXES for fact in results.get(ix, ())]
+        # Sort all results by score descending
+        all_facts.sort(key=lambda x: x["_score"], reverse=True)
+        return all_facts
+
+    def _fetch_indexes(self, indexes: List[str], user_query: str, top_n_each: int,
+                       mode: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Query the given indexes with the selected retrieval mode. Returns hits
+        keyed by index name; indexes that failed are left out. With the
+        local backend, indexes the local file does not hold (a stale or
+        partial build) still go to Neo4j.
+        """
+        if self.RETRIEVAL_BACKEND != "local" or self.local_index is None:
+            return self._fetch_neo4j_indexes(indexes, user_query, top_n_each, mode)
+        try:
+            results = self._query_local_index(indexes, user_query, top_n_each)
+        except Exception as e:
+            print(f"Local fulltext index query failed, querying Neo4j: {e}")
+            return self._fetch_neo4j_indexes(indexes, user_query, top_n_each, mode)
+        remaining = [ix for ix in indexes if ix not in results]
+        if remaining:
+            try:
+                results.update(self._fetch_neo4j_indexes(remaining, user_query, top_n_each, mode))
+            except CircuitOpenError as e:
+                if not results:
+                    raise
+                print(f"{e}; answering from the local index without {len(remaining)} indexes")
+        return results
+
+    def _fetch_neo4j_indexes(self, indexes: List[str], user_query: str, top_n_each: int,
+                             mode: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """The Neo4j half of _fetch_indexes"""
+        self.neo4j_breaker.raise_if_open()
+        mode = (mode or self.RETRIEVAL_MODE).lower()
+        if mode == "parallel":
+            return self._query_indexes_parallel(indexes, user_query, top_n_each)
+
         with self.driver.session() as session:
-            for index_name in self.INDEXES:
-                cypher_query = f"""
-                CALL db.index.fulltext.queryNodes('{index_name}', $query)
-                YIELD node, score
-                RETURN node, score
-                ORDER BY score DESC
-                LIMIT $limit
-                """
+            if mode == "batched":
                 try:
+                    return self._query_indexes_batched(session, indexes, user_query, top_n_each)
+                except CircuitOpenError:
+                    raise
+                except Exception as e:
+                    print(f"Batched fulltext query failed, falling back to per-index queries: {e}")
+            return self._query_indexes_sequential(session, indexes, user_query, top_n_each)
+
+    @property
+    def local_index(self):
+        """
+        The local fulltext index, opened (memory-mapped) on first use; None
+        if it could not be opened. A failed open is retried only after
+        LOCAL_INDEX_RETRY_INTERVAL seconds, not on every request.
+        """
+        if self._local_index is None and time.monotonic() >= self._local_index_retry_at:
+            from api.local_index import LocalFulltextIndex
+            try:
+                self._local_index = LocalFulltextIndex(self.LOCAL_INDEX_PATH)
+            except Exception as e:
+                self._local_index_retry_at = time.monotonic() + self.LOCAL_INDEX_RETRY_INTERVAL
+                print(f"Local fulltext index unavailable, querying Neo4j "
+                      f"(retrying in {self.LOCAL_INDEX_RETRY_INTERVAL:g}s): {e}")
+        return self._local_index
+
+    def _query_local_index(self, indexes: List[str], user_query: str,
+                           top_n_each: int) -> Dict[str, List[Dict]]:
+        """BM25 lookups in the local index; indexes it does not hold are left out"""
+        with INDEX_QUERY_SECONDS.time(index="local"):
+            return self.local_index.search_many(indexes, user_query, top_n_each)
+
+    def _tag_record(self, node, index_name: str, score: float) -> Dict:
+        """Convert a Neo4j node into a fact dict tagged with its index and score"""
+        record = dict(node)
+        record["_id"] = getattr(node, "element_id", None)
+        record["_index"] = index_name
+        record["_score"] = score
+        return record
+
+    def _query_indexes_sequential(self, session, indexes: List[str], user_query: str,
+                                  top_n_each: int) -> Dict[str, List[Dict]]:
+        """
+        One fulltext query per index, one after another (original behaviour)
+        """
+        results = {}
+        for position, index_name in enumerate(indexes):
+            try:
+                with self.neo4j_breaker.guard(), INDEX_QUERY_SECONDS.time(index=index_name):
                     result = session.run(
-                        cypher_query, 
+                        self._index_query(index_name),
                         {"query": user_query, "limit": top_n_each}
                     )
-                    for r in result:
-                        node = r["node"]
-                        record = dict(node)
-                        record["_index"] = index_name
-                        record["_score"] = r["score"]
-                        all_facts.append(record)
-                except Exception as e:
-                    print(f"Neo4j query failed for index {index_name}: {e}")
-                    continue
-        
-        # Sort all results by score descending
-        all_facts.sort(key=lambda x: x["_score"], reverse=True)
-        return all_facts
+                    results[index_name] = [
+                        self._tag_record(r["node"], index_name, r["score"]) for r in result
+                    ]
+            except CircuitOpenError as e:
+                if not results:
+                    # Opened by this request's own failures; let the caller
+                    # serve cached hits instead
+                    raise
+                print(f"{e}; skipping the remaining {len(indexes) - position} indexes")
+                break
+            except Exception as e:
+                print(f"Neo4j query failed for index {index_name}: {e}")
+                continue
+        return results
+
+    def _index_query(self, index_name: str):
+        """Per-index fulltext query with a server-side timeout of INDEX_TIMEOUT"""
+        from neo4j import Query
+        return Query(
+            f"""
+            CALL db.index.fulltext.queryNodes('{index_name}', $query)
+            YIELD node, score
+            RETURN node, score
+            ORDER BY score DESC
+            LIMIT $limit
+            """,
+            timeout=self.INDEX_TIMEOUT,
+        )
+
+    def _query_single_index(self, index_name: str, user_query: str, top_n_each: int) -> List[Dict]:
+        """Run one index lookup in its own session (used by the worker pool)"""
+        with self.neo4j_breaker.guard(), INDEX_QUERY_SECONDS.time(index=index_name), \
+                self.driver.session() as session:
+            result = session.run(
+                self._index_query(index_name),
+                {"query": user_query, "limit": top_n_each}
+            )
+            return [self._tag_record(r["node"], index_name, r["score"]) for r in result]
+
+    def _query_indexes_parallel(self, indexes: List[str], user_query: str,
+                                top_n_each: int) -> Dict[str, List[Dict]]:
+        """
+        Per-index queries on a bounded thread pool, one session per worker.
+        Each index gets INDEX_TIMEOUT from the moment a worker picks it up;
+        indexes that fail or overrun are skipped. The pool is shared, so a
+        straggler never blocks the request. A lookup still queued behind
+        other requests' work is neither slow nor failing: it gets
+        RETRIEVAL_QUEUE_TIMEOUT to start before it is dropped.
+        """
+        if self._retrieval_pool is None:
+            with self._connect_lock:
+                if self._retrieval_pool is None:
+                    self._retrieval_pool = ThreadPoolExecutor(
+                        max_workers=self.RETRIEVAL_MAX_WORKERS,
+                        thread_name_prefix="rag-retrieval",
+                    )
+
+        started = {}
+
+        def run(index_name):
+            started[index_name] = time.monotonic()
+            return self._query_single_index(index_name, user_query, top_n_each)
+
+        futures = {
+            index_name: self._retrieval_pool.submit(run, index_name)
+            for index_name in indexes
+        }
+
+        queue_deadline = time.monotonic() + self.RETRIEVAL_QUEUE_TIMEOUT
+        pending = dict(futures)
+        # Lookups that ran past INDEX_TIMEOUT; skipped even if they finish
+        # before the slowest lookup of this request does
+        overran = set()
+        while pending:
+            now = time.monotonic()
+            for index_name in list(pending):
+                if index_name in started:
+                    expired = now - started[index_name] >= self.INDEX_TIMEOUT
+                    if expired:
+                        overran.add(index_name)
+                else:
+                    # Cancel right away so no worker picks it up later
+                    expired = now >= queue_deadline and pending[index_name].cancel()
+                if expired:
+                    del pending[index_name]
+            if not pending:
+                break
+            next_expiry = min(
+                started[ix] + self.INDEX_TIMEOUT if ix in started else queue_deadline
+                for ix in pending
+            )
+            if len(started) < len(futures):
+                # A queued lookup may start while we wait; wake up often
+                # enough to time it out at most a tenth of INDEX_TIMEOUT late
+                next_expiry = min(next_expiry, now + self.INDEX_TIMEOUT / 10)
+            done, _ = wait(pending.values(), timeout=max(0.0, next_expiry - now),
+                           return_when=FIRST_COMPLETED)
+            for index_name in [ix for ix, f in pending.items() if f in done]:
+                del pending[index_name]
+
+        results = {}
+        rejected = 0
+        timed_out = []
+        for index_name, future in futures.items():
+            if future.cancelled() or future.cancel():
+                print(f"Neo4j query for index {index_name} did not start within "
+                      f"{self.RETRIEVAL_QUEUE_TIMEOUT:g}s, skipping")
+                continue
+            if index_name in overran:
+                print(f"Neo4j query timed out for index {index_name}, skipping")
+                # Cancelled lookups never touch the breaker
+                timed_out.append(index_name)
+                continue
+            try:
+                results[index_name] = future.result()
+            except CircuitOpenError:
+                rejected += 1
+            except Exception as e:
+                print(f"Neo4j query failed for index {index_name}: {e}")
+        if timed_out:
+            # A straggler is a health signal too (the guard only sees it once
+            # the query finally returns), but one slow request fanning out to
+            # many indexes is a single failure, not one per index
+            self.neo4j_breaker.record_failure(TimeoutError(f"{', '.join(timed_out)} timed out"))
+        if rejected:
+            if not results:
+                self.neo4j_breaker.raise_if_open()
+            print(f"Neo4j circuit open; skipped {rejected} indexes")
+        return results
+
+    def _query_indexes_batched(self, session, indexes: List[str], user_query: str,
+                               top_n_each: int) -> Dict[str, List[Dict]]:
+        """
+        All fulltext lookups in a single round trip
+        """
+        with self.neo4j_breaker.guard(), INDEX_QUERY_SECONDS.time(index="batched"):
+            result = session.run(
+                BATCHED_FULLTEXT_QUERY,
+                {"indexes": indexes, "query": user_query, "limit": top_n_each}
+            )
+            results = {index_name: [] for index_name in indexes}
+            for r in result:
+                results[r["index_name"]].append(
+                    self._tag_record(r["node"], r["index_name"], r["score"])
+                )
+        return results
 
     def is_broad_question(self, q: str) -> bool:
         """
-        Heuristic for Bangla/English generic query words
-        Preserved from original final.py
+        Whether q is a broad/list question rather than about one topic
+        (see api.question_classifier; the original generic keywords are
+        among its broad words)
         """
-        generic_keywords = [
-            "সব", "সবগুলি", "সমস্ত", "ধরনের", "প্রকার", "varieties", "variety", "জাত", 
-            "কিভাবে", "কেমন", "overall", "চাষ", "abadh", "production", "process", 
-            "প্রসঙ্গ", "list", "enumerate", "ধাপ", "করব", "প্রয়োজন"
-        ]
-        return any(kw in q for kw in generic_keywords)
+        return self.question_classifier.classify(q).kind == "broad"
 
     def rag_answer(self, user_query: str, variety_list: List[str]) -> str:
         """
         Main RAG answer function - preserved exact logic from original final.py
         """
+        messages = self.retrieve_messages(user_query, variety_list)
+        with STAGE_SECONDS.time(stage="llm_call"):
+            response = self.llm_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages
+            )
+        return response.choices[0].message.content
+
+    def retrieve_messages(self, user_query: str, variety_list: List[str]) -> List[Dict[str, str]]:
+        """
+        Variety extraction and retrieval, returning the chat messages for the LLM
+        """
         # Step 1: Variety extraction
-        variety_name = self.extract_variety_from_question(user_query, variety_list)
-        facts = self.get_relevant_facts(user_query, top_n_each=5 if variety_name else 3)
+        with STAGE_SECONDS.time(stage="variety_lookup"):
+            variety_name = self.extract_variety_from_question(user_query, variety_list)
+        with STAGE_SECONDS.time(stage="classify"):
+            intent = self.question_classifier.classify(user_query, variety_name)
+        plan = self.index_router.route(user_query)
+        with STAGE_SECONDS.time(stage="retrieval"):
+            facts = self.get_relevant_facts(
+                user_query, top_n_each=intent.top_n_each, indexes=plan.indexes
+            )
+        return self.build_messages(user_query, variety_name, facts, plan, intent)
+
+    def stream_rag_answer(self, user_query: str) -> Iterator[str]:
+        """
+        Same as get_rag_answer, but yields the LLM output as it is generated
+        """
+        print(f"Processing streamed query: {user_query}")
+        all_varieties = self.get_all_variety_names()
+        cached = self._cached_answer(user_query)
+        if cached is not None:
+            yield cached
+            return
 
+        messages = self.retrieve_messages(user_query, all_varieties)
+        start = time.perf_counter()
+        stream = self.llm_client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=messages,
+            stream=True
+        )
+        tokens = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not tokens:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_first_token")
+                tokens.append(chunk.choices[0].delta.content)
+                yield tokens[-1]
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_call")
+        if self.answer_cache is not None:
+            self.answer_cache.set(user_query, "".join(tokens))
+
+    def build_messages(self, user_query: str, variety_name: Optional[str],
+                       facts: List[Dict], plan: Optional[RoutePlan] = None,
+                       intent: Optional[QuestionIntent] = None) -> List[Dict[str, str]]:
+        """
+        Build the chat messages from the retrieved facts
+        Preserved from original final.py (shared by the sync and async paths)
+        plan, when given, lets the index router learn which indexes fed the
+        context. intent (classified here if not given) picks the
+        instruction placed before the question.
+        """
+        start = time.perf_counter()
+        if intent is None:
+            intent = self.question_classifier.classify(user_query, variety_name)
+        # The same node often comes back from several indexes
+        facts = dedupe_facts(facts)
         if variety_name:
             filtered_facts = self.filter_facts_by_variety(facts, variety_name)
             if not filtered_facts:
                 filtered_facts = facts  # fallback to all results if nothing matches
-            context = ""
-            for fact in filtered_facts:
-                display_props = ", ".join(f"{k}:{v}" for k, v in fact.items() if not k.startswith('_'))
-                context += f"[{fact['_index']}, Score: {fact['_score']}]: {display_props}\n"
-            cot_instruction = (
-                f"Only answer using context blocks that mention the variety '{variety_name}'. "
-                f"Do not use or mention other varieties in your answer. "
-                f"Synthesize a precise answer summarizing all relevant information for that variety only."
-            )
         else:
-            # Broad/generic question
-            context = ""
-            for fact in facts:
-                display_props = ", ".join(f"{k}:{v}" for k, v in fact.items() if not k.startswith('_'))
-                context += f"[{fact['_index']}, Score: {fact['_score']}]: {display_props}\n"
-            cot_instruction = (
-                "Summarize all relevant information in the context for this broad query. "
-                "If varieties or types are mentioned, list or compare them as appropriate."
-            )
-
-        print(" --------------- this is the context---------------------------------")
-        print(context,"----------------------------------------------")
-        print(" ----------------------------------------------")
+            filtered_facts = facts
 
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an AI assistant that answers questions using the provided context."},
-                {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {user_query}"}
-            ]
+        context, stats = build_context(filtered_facts, self.CONTEXT_TOKEN_BUDGET, self.fact_texts)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="context_build")
+        for index_name, count in stats["packed_by_index"].items():
+            INDEX_CONTEXT_FACTS.inc(count, index=index_name)
+        if plan is not None:
+            self.index_router.observe(user_query, plan, filtered_facts)
+        # Per request, so only with LOG_LEVEL=DEBUG; /metrics has the totals
+        logger.debug(
+            "Context: %d unique of %d facts, %d packed, %d/%d tokens, %d tokens saved",
+            stats["unique_facts"], stats["facts"], stats["packed_facts"],
+            stats["context_tokens"], self.CONTEXT_TOKEN_BUDGET, stats["tokens_saved"],
         )
-        return response.choices[0].message.content
+
+        # The full context is large; only dump it with LOG_LEVEL=DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Context for %r:\n%s", user_query, context)
+
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Context:\n{context}\n\n{intent.instruction}\n\nQuestion: {user_query}"}
+        ]
 
     def get_rag_answer(self, user_query: str) -> str:
         """
@@ -187,14 +765,86 @@ class AgricultureRAGSystem:
         """
         print(f"Processing query: {user_query}")
         
-        # Load variety names (cached after first call)
+        # Load variety names (served from the variety catalog)
         all_varieties = self.get_all_variety_names()
         print(f"Loaded {len(all_varieties)} variety names.")
         
+        cached = self._cached_answer(user_query)
+        if cached is not None:
+            return cached
+
+        # Identical questions already being answered share that computation
+        return self.in_flight.do(
+            normalize_question(user_query),
+            lambda: self._answer_and_cache(user_query, all_varieties),
+        )
+
+    def _answer_and_cache(self, user_query: str, all_varieties: List[str]) -> str:
         # Get answer using original logic
         answer = self.rag_answer(user_query, all_varieties)
+        if self.answer_cache is not None:
+            self.answer_cache.set(user_query, answer)
         return answer
 
+    def _cached_answer(self, user_query: str) -> Optional[str]:
+        """Answer cache lookup, invalidating first if the data version moved"""
+        if self.answer_cache is None:
+            return None
+        self.answer_cache.ensure_version(self.variety_catalog.snapshot.data_version)
+        return self.answer_cache.get(user_query)
+
+    def invalidate_caches(self):
+        """
+        Forget cached retrieval hits, answers and node texts, e.g. after the
+        knowledge graph has been reloaded
+        """
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.invalidate()
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        if self.fact_texts is not None:
+            self.fact_texts.invalidate()
+
+    def check_health(self) -> Dict[str, Any]:
+        """
+        Cheap Neo4j connectivity probe (one RETURN 1 round trip, at most
+        NEO4J_HEALTH_TIMEOUT seconds) for /health. Goes through the circuit
+        breaker, so while the circuit is open it reports that without
+        touching the database, and a successful probe closes it.
+        """
+        from neo4j import Query
+        start = time.perf_counter()
+        health = {"neo4j": "up", "latency_ms": None, "error": None}
+        try:
+            with self.neo4j_breaker.guard(), self.driver.session() as session:
+                session.run(Query(HEALTH_QUERY, timeout=self.NEO4J_HEALTH_TIMEOUT)).single()
+            health["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        except CircuitOpenError:
+            health["neo4j"] = "circuit_open"
+        except Exception as e:
+            health["neo4j"] = "down"
+            health["error"] = str(e) or type(e).__name__
+        health["circuit"] = self.neo4j_breaker.stats()
+        return health
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Connect, check Neo4j is reachable and load the variety catalog.
+        Returns the time each step took, in milliseconds.
+        """
+        timings = {}
+        start = time.perf_counter()
+        self.connect()
+        timings["connect_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        with self.neo4j_breaker.guard():
+            self.driver.verify_connectivity()
+        timings["neo4j_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        self.get_all_variety_names()
+        timings["varieties_ms"] = (time.perf_counter() - start) * 1000
+        return {k: round(v, 1) for k, v in timings.items()}
+
     def get_all_varieties(self) -> List[str]:
         """
         Public method to get all varieties for API endpoint
@@ -203,5 +853,7 @@ class AgricultureRAGSystem:
 
     def close(self):
         """Close the Neo4j driver connection"""
-        if self.driver:
-            self.driver.close() 
\ No newline at end of file
+        if self._retrieval_pool is not None:
+            self._retrieval_pool.shutdown(wait=False, cancel_futures=True)
+        if self._driver is not None:
+            self._driver.close()
@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+def configure_logging():
+    """
+    Apply LOG_LEVEL to the project's "api" loggers (DEBUG also logs the full
+    LLM context of every question). The root logger is left to the host, so
+    importing an entrypoint does not turn on INFO logging for httpx and co.
+    """
+    logger = logging.getLogger("api")
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    # Records propagate to the root logger; give them a handler only when
+    # nobody has configured one (uvicorn and Vercel leave the root bare)
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        logger.addHandler(handler)
+
+class LazyRAGSystem(Generic[T]):
+    """
+    Creates the RAG system on first use instead of at import time.
+
+    A failed initialization does not lock the process into demo mode: the
+    next call after a backoff delay (doubling from RAG_INIT_BACKOFF up to
+    RAG_INIT_MAX_BACKOFF seconds) tries again. Callers get None while the
+    system is unavailable and fall back to demo responses.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self.factory = factory
+        self.instance: Optional[T] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self.base_backoff = float(os.getenv("RAG_INIT_BACKOFF", "1"))
+        self.max_backoff = float(os.getenv("RAG_INIT_MAX_BACKOFF", "60"))
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        """The RAG system, initializing it if needed; None in demo mode"""
+        if self.instance is not None:
+            return self.instance
+        if time.monotonic() < self._retry_at:
+            return None
+        with self._lock:
+            if self.instance is not None:
+                return self.instance
+            if time.monotonic() < self._retry_at:
+                return None
+            try:
+                instance = self.factory()
+                # Create the driver and client now so bad configuration
+                # surfaces here (and is retried) rather than mid-request
+                instance.connect()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+                self._retry_at = time.monotonic() + delay
+                print(f"⚠️ Warning: Could not initialize RAG system: {e} (retrying in {delay:.0f}s)")
+                print("The API will run in demo mode")
+                return None
+            self.instance = instance
+            self.failures = 0
+            self.last_error = None
+            print("✅ RAG System initialized successfully")
+            return instance
+
+    @property
+    def status(self) -> str:
+        if self.instance is not None:
+            return "connected"
+        if self.failures:
+            return "demo_mode"
+        return "not_initialized"
+
+    def describe(self) -> Dict[str, object]:
+        """Initialization state for health and warm-up responses"""
+        return {
+            "rag_system": self.status,
+            "init_failures": self.failures,
+            "last_error": self.last_error,
+        }
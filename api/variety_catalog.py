@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from api.cache import data_version
+from api.variety_matcher import VarietyMatcher
+
+class CatalogSnapshot:
+    """
+    Immutable view of the variety list and everything derived from it.
+    Built completely before it is published, so readers never see a
+    half-built catalog.
+    """
+
+    def __init__(self, names: List[str], graph_version: str = "", loaded_at: Optional[float] = None):
+        self.names = list(names)
+        self.graph_version = graph_version
+        self.loaded_at = time.time() if loaded_at is None else loaded_at
+        self.matcher = VarietyMatcher(self.names)
+        self.data_version = data_version(self.names, graph_version)
+        # Pre-serialized /varieties body and its validator
+        self.payload = json.dumps({"varieties": self.names}, ensure_ascii=False).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.payload).hexdigest() + '"'
+
+class VarietyCatalog:
+    """
+    Holds the current CatalogSnapshot and decides when it needs refreshing.
+    - check_interval: how often the (cheap) graph version probe runs
+    - reload_interval: maximum age before the names are reloaded regardless
+    - snapshot_path: optional JSON file used to warm cold starts
+    """
+
+    def __init__(self, check_interval: float = 60, reload_interval: float = 3600,
+                 snapshot_path: Optional[str] = None):
+        self.check_interval = check_interval
+        self.reload_interval = reload_interval
+        self.snapshot_path = snapshot_path
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.checked_at = 0.0
+        self._refreshing = threading.Lock()
+
+    def update(self, names: List[str], graph_version: str = "") -> CatalogSnapshot:
+        """Build a new snapshot and swap it in with a single assignment"""
+        snapshot = CatalogSnapshot(names, graph_version)
+        self.snapshot = snapshot
+        self.checked_at = snapshot.loaded_at
+        self.save_snapshot_file()
+        return snapshot
+
+    def mark_checked(self):
+        """Record a version probe that found nothing new"""
+        self.checked_at = time.time()
+
+    def is_stale(self) -> bool:
+        """True when the graph version probe is due"""
+        return time.time() - self.checked_at >= self.check_interval
+
+    def needs_reload(self, graph_version: str) -> bool:
+        """True when the names must be reloaded from the graph"""
+        snapshot = self.snapshot
+        return (
+            snapshot is None
+            or graph_version != snapshot.graph_version
+            or time.time() - snapshot.loaded_at >= self.reload_interval
+        )
+
+    def refresh_in_background(self, refresh: Callable[[], None]):
+        """
+        Run refresh() on a daemon thread unless one is already running;
+        requests keep using the current snapshot meanwhile
+        """
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                refresh()
+            except Exception as e:
+                print(f"Variety catalog refresh failed: {e}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="variety-catalog-refresh", daemon=True).start()
+
+    def begin_refresh(self) -> bool:
+        """Claim the refresh slot (for callers scheduling their own task)"""
+        return self._refreshing.acquire(blocking=False)
+
+    def end_refresh(self):
+        self._refreshing.release()
+
+    def load_snapshot_file(self) -> bool:
+        """Warm the catalog from snapshot_path; returns True on success"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.snapshot = CatalogSnapshot(
+                data["varieties"], data.get("graph_version", ""), data.get("loaded_at")
+            )
+            # Probe the graph on the next request rather than trusting the file
+            self.checked_at = 0.0
+            return True
+        except Exception as e:
+            print(f"Could not read variety snapshot {self.snapshot_path}: {e}")
+            return False
+
+    def save_snapshot_file(self):
+        """Write the current snapshot to snapshot_path (atomic rename)"""
+        snapshot = self.snapshot
+        if not self.snapshot_path or snapshot is None:
+            return
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "varieties": snapshot.names,
+                    "graph_version": snapshot.graph_version,
+                    "loaded_at": snapshot.loaded_at,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Could not write variety snapshot {self.snapshot_path}: {e}")
+
+def create_variety_catalog() -> VarietyCatalog:
+    """
+    Build the catalog from the environment:
+    VARIETY_CHECK_INTERVAL, VARIETY_RELOAD_INTERVAL (seconds) and
+    VARIETY_SNAPSHOT_PATH (empty disables the snapshot file)
+    """
+    catalog = VarietyCatalog(
+        check_interval=float(os.getenv("VARIETY_CHECK_INTERVAL", "60")),
+        reload_interval=float(os.getenv("VARIETY_RELOAD_INTERVAL", "3600")),
+        snapshot_path=os.getenv("VARIETY_SNAPSHOT_PATH") or None,
+    )
+    catalog.load_snapshot_file()
+    return catalog
@@ -0,0 +1,122 @@
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from api.cache import DIGIT_FOLD
+
+def normalize_variety_text(text: str) -> str:
+    """
+    Matching form of a variety name or question: Unicode NFC, Bangla digits
+    folded to ASCII, whitespace and punctuation (spaces, hyphens, ?, ।)
+    removed, case folded. "ব্রি ধান-২৮" and "ব্রি ধান২৮" both become "ব্রিধান28".
+    """
+    text = unicodedata.normalize("NFC", text).translate(DIGIT_FOLD)
+    return "".join(
+        ch for ch in text
+        if not ch.isspace() and not unicodedata.category(ch).startswith("P")
+    ).casefold()
+
+class VarietyMatcher:
+    """
+    Aho-Corasick automaton over normalized variety names.
+    Built once per variety list; a lookup is a single pass over the question
+    regardless of how many varieties there are.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        # Trie as a list of transition dicts; state 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Pattern ending at each state, and the nearest pattern-ending state
+        # along the failure chain (output link)
+        self._pattern: List[Optional[int]] = [None]
+        self._output: List[int] = [0]
+        self.names: List[str] = []
+        self._lengths: List[int] = []
+        self._ends_with_digit: List[bool] = []
+
+        seen = set()
+        for name in names:
+            if not name:
+                continue
+            key = normalize_variety_text(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self._add(key, name)
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add(self, key: str, name: str):
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._pattern.append(None)
+                self._output.append(0)
+            state = nxt
+        self._pattern[state] = len(self.names)
+        self.names.append(name)
+        self._lengths.append(len(key))
+        self._ends_with_digit.append(key[-1].isdigit())
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                link = self._fail[nxt]
+                self._output[nxt] = link if self._pattern[link] is not None else self._output[link]
+
+    def _scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """All (start, end, pattern id) matches in the normalized text"""
+        matches = []
+        state = 0
+        goto, fail, pattern, output = self._goto, self._fail, self._pattern, self._output
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = state if pattern[state] is not None else output[state]
+            while hit:
+                pid = pattern[hit]
+                # "ধান২" must not match inside "ধান২৯"
+                if not (self._ends_with_digit[pid] and i + 1 < len(text) and text[i + 1].isdigit()):
+                    matches.append((i + 1 - self._lengths[pid], i + 1, pid))
+                hit = output[hit]
+        return matches
+
+    def find_all(self, question: str) -> List[str]:
+        """
+        Every variety mentioned in the question, in order of appearance.
+        A match lying inside a longer match ("ব্রি ধান২" inside
+        "ব্রি ধান২৮") is dropped in favour of the longer one.
+        """
+        matches = self._scan(normalize_variety_text(question))
+        # Longest first, so a shadowed match always meets its container first
+        matches.sort(key=lambda m: (m[0] - m[1], m[0]))
+        kept = []
+        for start, end, pid in matches:
+            if not any(s <= start and end <= e for s, e, _ in kept):
+                kept.append((start, end, pid))
+        kept.sort()
+        return [self.names[pid] for _, _, pid in kept]
+
+    def longest(self, question: str) -> Optional[str]:
+        """The longest variety name mentioned in the question, if any"""
+        best = None
+        for start, end, pid in self._scan(normalize_variety_text(question)):
+            if best is None or end - start > best[1] - best[0]:
+                best = (start, end, pid)
+        return self.names[best[2]] if best else None
@@ -0,0 +1 @@
+"""Offline benchmark and replay harness (see benchmarks/run.py)"""
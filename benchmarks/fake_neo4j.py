@@ -0,0 +1,241 @@
+import asyncio
+import json
+import math
+import re
+import time
+from heapq import nlargest
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from api.cache import normalize_question
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "crop_nodes.json"
+
+INDEX_NAME_PATTERN = re.compile(r"queryNodes\('([^']+)'")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms: NFC, punctuation to spaces, case folded.
+    Digits are kept as typed, like Neo4j's default fulltext analyzer.
+    """
+    return normalize_question(text, fold_digits=False).split()
+
+class FakeNode(dict):
+    """Node properties plus the element_id the RAG system tags facts with"""
+
+    def __init__(self, element_id: str, labels: List[str], properties: Dict[str, str]):
+        super().__init__(properties)
+        self.element_id = element_id
+        self.labels = frozenset(labels)
+
+class FulltextIndex:
+    """
+    Inverted index over one property of the nodes with a given label,
+    scored like Lucene's classic similarity: sum over matching terms of
+    sqrt(tf) * idf^2 / sqrt(length)
+    """
+
+    def __init__(self, name: str, nodes: List[FakeNode], label: str, property_name: str):
+        self.name = name
+        self.nodes = [node for node in nodes if label in node.labels and node.get(property_name)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.norms: List[float] = []
+        for position, node in enumerate(self.nodes):
+            terms = tokenize(str(node[property_name]))
+            self.norms.append(1 / math.sqrt(len(terms) or 1))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((position, tf))
+        total = len(self.nodes)
+        self.idf = {
+            term: 1 + math.log(total / (len(postings) + 1))
+            for term, postings in self.postings.items()
+        }
+
+    def query(self, text: str, limit: int) -> List[Tuple[FakeNode, float]]:
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            weight = self.idf[term] ** 2
+            for position, tf in postings:
+                scores[position] = scores.get(position, 0.0) + math.sqrt(tf) * weight * self.norms[position]
+        best = nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.nodes[position], round(score, 4)) for position, score in best]
+
+class FakeGraph:
+    """
+    In-memory stand-in for the knowledge graph: variety nodes plus one node
+    per (variety, topic), with a fulltext index per topic property.
+    Answers exactly the Cypher the RAG system sends.
+    """
+
+    def __init__(self, nodes: List[FakeNode], index_definitions: Dict[str, Dict[str, str]]):
+        self.nodes = nodes
+        self.index_definitions = index_definitions
+        self.indexes = {
+            name: FulltextIndex(name, nodes, definition["label"], definition["property"])
+            for name, definition in index_definitions.items()
+        }
+        self.variety_names = sorted({
+            node["জাতের নাম"] for node in nodes if "Variety Name" in node.labels
+        })
+
+    @classmethod
+    def from_fixture(cls, path: Path = FIXTURE_PATH, scale: int = 1) -> "FakeGraph":
+        """
+        Build the graph from the crop fixture. scale > 1 adds synthetic
+        copies of every variety ("<name> লাইন-2", ...) to grow the graph.
+        """
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        nodes = []
+        for crop in fixture["crops"]:
+            crop_props = {k: v for k, v in crop.items() if k not in ("varieties", "topics")}
+            for copy in range(1, scale + 1):
+                for variety in crop["varieties"]:
+                    name = variety if copy == 1 else f"{variety} লাইন-{copy}"
+                    nodes.append(FakeNode(
+                        f"variety:{len(nodes)}", ["Variety Name"],
+                        {**crop_props, "জাতের নাম": name},
+                    ))
+                    for topic, text in crop["topics"].items():
+                        nodes.append(FakeNode(
+                            f"fact:{len(nodes)}", [topic],
+                            {"জাতের নাম": name, topic: text.format(variety=name)},
+                        ))
+        return cls(nodes, fixture["indexes"])
+
+    def run(self, query: str, parameters: Dict) -> List[Dict]:
+        """Rows for one of the RAG system's queries"""
+        if "UNWIND $indexes" in query:
+            return [
+                {"index_name": index_name, "node": node, "score": score}
+                for index_name in parameters["indexes"]
+                for node, score in self._query_index(index_name, parameters["query"], parameters["limit"])
+            ]
+        if "UNWIND $lookups" in query:
+            return [
+                {"lookup_id": lookup["id"], "index_name": lookup["index_name"], "node": node, "score": score}
+                for lookup in parameters["lookups"]
+                for node, score in self._query_index(lookup["index_name"], lookup["query"], parameters["limit"])
+            ]
+        match = INDEX_NAME_PATTERN.search(query)
+        if match:
+            return [
+                {"node": node, "score": score}
+                for node, score in self._query_index(match.group(1), parameters["query"], parameters["limit"])
+            ]
+        if "SHOW FULLTEXT INDEXES" in query:
+            return [
+                {"name": name, "labelsOrTypes": [d["label"]], "properties": [d["property"]]}
+                for name, d in self.index_definitions.items()
+            ]
+        if "$labels" in query:
+            labels = set(parameters["labels"])
+            return [
+                {"id": node.element_id, "props": dict(node)}
+                for node in self.nodes if node.labels & labels
+            ]
+        if "count(n)" in query:
+            return [{"count": len(self.variety_names)}]
+        if query.strip() == "RETURN 1 AS ok":
+            return [{"ok": 1}]
+        if "RETURN DISTINCT" in query:
+            return [{"name": name} for name in self.variety_names]
+        raise ValueError(f"FakeGraph does not support this query: {query.strip()[:80]}")
+
+    def _query_index(self, index_name: str, text: str, limit: int):
+        index = self.indexes.get(index_name)
+        if index is None:
+            raise ValueError(f"There is no such fulltext schema index: {index_name}")
+        return index.query(text, limit)
+
+class FakeResult(list):
+    def single(self) -> Optional[Dict]:
+        return self[0] if self else None
+
+class FakeSession:
+    def __init__(self, graph: FakeGraph, latency: float):
+        self.graph = graph
+        self.latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters: Optional[Dict] = None, **kwargs) -> FakeResult:
+        # Round trip to the server
+        time.sleep(self.latency)
+        return FakeResult(self.graph.run(getattr(query, "text", query), {**(parameters or {}), **kwargs}))
+
+class FakeDriver:
+    """Drop-in for neo4j.GraphDatabase.driver(); latency is per query, in seconds"""
+
+    def __init__(self, graph: FakeGraph, latency: float = 0.005):
+        self.graph = graph
+        self.latency = latency
+        self.closed = False
+
+    def session(self, **kwargs) -> FakeSession:
+        return FakeSession(self.graph, self.latency)
+
+    def verify_connectivity(self):
+        time.sleep(self.latency)
+
+    def close(self):
+        self.closed = True
+
+class AsyncFakeResult:
+    def __init__(self, rows: List[Dict]):
+        self.rows = rows
+
+    async def single(self) -> Optional[Dict]:
+        return self.rows[0] if self.rows else None
+
+    async def __aiter__(self):
+        for row in self.rows:
+            yield row
+
+class AsyncFakeSession:
+    def __init__(self, graph: FakeGraph, latency: float):
+        self.graph = graph
+        self.latency = latency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        pass
+
+    async def run(self, query, parameters: Optional[Dict] = None, **kwargs) -> AsyncFakeResult:
+        await asyncio.sleep(self.latency)
+        return AsyncFakeResult(self.graph.run(getattr(query, "text", query), {**(parameters or {}), **kwargs}))
+
+class AsyncFakeDriver:
+    """Drop-in for neo4j.AsyncGraphDatabase.driver()"""
+
+    def __init__(self, graph: FakeGraph, latency: float = 0.005):
+        self.graph = graph
+        self.latency = latency
+        self.closed = False
+
+    def session(self, **kwargs) -> AsyncFakeSession:
+        return AsyncFakeSession(self.graph, self.latency)
+
+    async def verify_connectivity(self):
+        await asyncio.sleep(self.latency)
+
+    async def close(self):
+        self.closed = True
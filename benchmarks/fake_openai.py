@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+DEFAULT_ANSWER_TOKENS = [
+    "ধান ", "চাষে ", "প্রতি ", "হেক্টরে ", "ইউরিয়া ", "তিন ", "কিস্তিতে ",
+    "উপরি ", "প্রয়োগ ", "করতে ", "হবে।",
+]
+
+class FakeOpenAIServer:
+    """
+    Local HTTP endpoint speaking the Chat Completions API, so the real
+    openai client (and its connection pool) is exercised.
+
+    latency: seconds before the first token; token_delay: seconds between
+    streamed tokens. A non-streamed completion takes
+    latency + token_delay * (tokens - 1), the same as reading the stream.
+    """
+
+    def __init__(self, latency: float = 0.3, token_delay: float = 0.0,
+                 tokens: Optional[List[str]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.tokens = tokens or DEFAULT_ANSWER_TOKENS
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                elif body.get("stream"):
+                    self._stream(body)
+                else:
+                    time.sleep(server.latency + server.token_delay * (len(server.tokens) - 1))
+                    self._send_json(200, {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "gpt-4o"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(server.tokens)},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": len(server.tokens), "total_tokens": len(server.tokens)},
+                    })
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(data: bytes):
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+
+                time.sleep(server.latency)
+                for i, token in enumerate(server.tokens):
+                    if i:
+                        time.sleep(server.token_delay)
+                    chunk = {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "gpt-4o"),
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                    }
+                    write(("data: " + json.dumps(chunk, ensure_ascii=False) + "\n\n").encode("utf-8"))
+                write(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
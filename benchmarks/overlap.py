@@ -0,0 +1,157 @@
+"""
+Load test for request overlap on the FastAPI /chat endpoint: fires a burst
+of concurrent requests and reports the wall time and how many answers were
+being generated at once.
+
+    python -m benchmarks.overlap --requests 20 --llm-latency 0.5
+
+Pipelines:
+- blocking: the sync AgricultureRAGSystem.get_rag_answer called straight
+  from the async endpoint (what /chat did before the async pipeline); it
+  holds the event loop, so requests run one after another
+- async: AsyncAgricultureRAGSystem, awaited; requests overlap
+
+Neo4j and OpenAI are the benchmark stand-ins. Questions are distinct so
+request coalescing does not merge them.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.fake_neo4j import AsyncFakeDriver, FakeDriver, FakeGraph
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.run import QUESTIONS_PATH, configure_environment, with_fake_driver
+
+PIPELINES = ("blocking", "async")
+
+class InFlight:
+    """Counts answers being generated at once"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def enter(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        self.current -= 1
+
+class BlockingRAGSystem:
+    """The sync RAG system behind the async interface /chat expects, without leaving the event loop"""
+
+    def __init__(self, rag_system, in_flight: InFlight):
+        self.rag_system = rag_system
+        self.in_flight = in_flight
+
+    def connect(self):
+        self.rag_system.connect()
+
+    async def get_rag_answer(self, question: str) -> str:
+        self.in_flight.enter()
+        try:
+            return self.rag_system.get_rag_answer(question)
+        finally:
+            self.in_flight.exit()
+
+    async def close(self):
+        self.rag_system.close()
+
+def create_rag_system(pipeline: str, graph: FakeGraph, neo4j_latency: float, in_flight: InFlight):
+    if pipeline == "blocking":
+        from api.rag_system import AgricultureRAGSystem
+        return BlockingRAGSystem(with_fake_driver(AgricultureRAGSystem, FakeDriver(graph, neo4j_latency)), in_flight)
+
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+    rag_system = with_fake_driver(AsyncAgricultureRAGSystem, AsyncFakeDriver(graph, neo4j_latency))
+    get_rag_answer = rag_system.get_rag_answer
+
+    async def counted(question: str) -> str:
+        in_flight.enter()
+        try:
+            return await get_rag_answer(question)
+        finally:
+            in_flight.exit()
+
+    rag_system.get_rag_answer = counted
+    return rag_system
+
+def run_overlap(pipeline: str, graph: FakeGraph, questions: List[str], neo4j_latency: float) -> Dict:
+    """
+    Send every question to /chat at once; the environment must already
+    point at the OpenAI stand-in (see configure_environment).
+    """
+    import httpx
+    from api import main as api_main
+
+    in_flight = InFlight()
+    api_main.rag_runtime.instance = None
+    api_main.rag_runtime.factory = lambda: create_rag_system(pipeline, graph, neo4j_latency, in_flight)
+
+    async def main():
+        transport = httpx.ASGITransport(app=api_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            async def ask(question):
+                response = await client.post("/chat", json={"question": question})
+                response.raise_for_status()
+                if "[ডেমো মোড]" in response.json()["response"]:
+                    raise RuntimeError("RAG system fell back to demo mode")
+
+            # Initialize the system and warm the imports outside the measurement
+            await client.get("/warmup")
+            try:
+                start = time.perf_counter()
+                results = await asyncio.gather(*(ask(q) for q in questions), return_exceptions=True)
+                return time.perf_counter() - start, [repr(r) for r in results if isinstance(r, Exception)]
+            finally:
+                if api_main.rag_runtime.instance:
+                    await api_main.rag_runtime.instance.close()
+                api_main.rag_runtime.instance = None
+
+    elapsed, errors = asyncio.run(main())
+    return {
+        "pipeline": pipeline,
+        "requests": len(questions),
+        "elapsed_s": round(elapsed, 3),
+        "peak_in_flight": in_flight.peak,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Concurrent /chat requests: blocking vs async pipeline")
+    parser.add_argument("--pipeline", choices=PIPELINES, nargs="+", default=list(PIPELINES))
+    parser.add_argument("--questions", default=str(QUESTIONS_PATH), help="question log, one per line")
+    parser.add_argument("--requests", type=int, default=20, help="concurrent requests (distinct questions)")
+    parser.add_argument("--neo4j-latency", type=float, default=0.02, help="seconds per Neo4j query")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per LLM completion")
+    parser.add_argument("--mode", choices=["batched", "parallel", "sequential"], help="RAG_RETRIEVAL_MODE")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = list(dict.fromkeys(line.strip() for line in f if line.strip()))[:args.requests]
+    if len(questions) < args.requests:
+        print(f"Only {len(questions)} distinct questions in {args.questions}; sending those")
+
+    openai_server = FakeOpenAIServer(latency=args.llm_latency).start()
+    configure_environment(argparse.Namespace(mode=args.mode, backend="neo4j", dense=False, caches=False), openai_server)
+    graph = FakeGraph.from_fixture()
+    try:
+        rows = [run_overlap(pipeline, graph, questions, args.neo4j_latency) for pipeline in args.pipeline]
+    finally:
+        openai_server.stop()
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    print(f"{'pipeline':<10} {'requests':>8} {'elapsed':>9} {'peak in flight':>15} {'errors':>7}")
+    for row in rows:
+        print(f"{row['pipeline']:<10} {row['requests']:>8} {row['elapsed_s']:>8.2f}s "
+              f"{row['peak_in_flight']:>15} {row['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Replay a question log against the real RAG code paths, with Neo4j and
+OpenAI replaced by local stand-ins, and report latency percentiles,
+throughput and peak memory.
+
+    python -m benchmarks.run --target answer --qps 20 --requests 200
+    python -m benchmarks.run --target chat --output after.json --compare before.json
+
+Targets:
+- answer: AgricultureRAGSystem.get_rag_answer on a thread pool (Vercel handler path)
+- async: AsyncAgricultureRAGSystem.get_rag_answer on the event loop
+- chat: POST /chat on the FastAPI app, in process
+- batch: AsyncAgricultureRAGSystem.answer_batch (the /chat/batch path) on
+  the whole log at once; latency is the time to each streamed result and
+  --qps does not apply
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.fake_neo4j import FIXTURE_PATH, AsyncFakeDriver, FakeDriver, FakeGraph
+from benchmarks.fake_openai import FakeOpenAIServer
+
+QUESTIONS_PATH = Path(__file__).parent / "fixtures" / "questions.txt"
+
+# Settings that change what is measured; recorded in every report
+CONFIG_PREFIXES = ("RAG_", "INDEX_ROUTING", "ANSWER_CACHE_", "RETRIEVAL_", "OPENAI_MAX_", "DENSE_", "BATCH_")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def with_fake_driver(base_cls, driver):
+    """Instance of a RAG system class whose Neo4j driver is the fake one"""
+    class BenchmarkRAGSystem(base_cls):
+        def _create_driver(self):
+            return driver
+    return BenchmarkRAGSystem()
+
+def configure_environment(args, openai_server: FakeOpenAIServer):
+    """Point the RAG system at the stand-ins; must run before it is built"""
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    os.environ["OPENAI_BASE_URL"] = openai_server.base_url
+    os.environ.setdefault("NEO4J_URI", "neo4j://benchmark")
+    os.environ["VARIETY_SNAPSHOT_PATH"] = ""
+    if args.mode:
+        os.environ["RAG_RETRIEVAL_MODE"] = args.mode
+    if args.backend == "local":
+        os.environ["RETRIEVAL_BACKEND"] = "local"
+    if args.dense:
+        os.environ["DENSE_RETRIEVAL"] = "on"
+    if not args.caches:
+        # Replays repeat questions; measure the pipeline, not the caches
+        os.environ["ANSWER_CACHE_BACKEND"] = "none"
+        os.environ["RETRIEVAL_CACHE_MAX_BYTES"] = "0"
+
+def build_fixture_index(graph: FakeGraph) -> str:
+    """Export the fake graph into a local fulltext index file for RETRIEVAL_BACKEND=local"""
+    from api.local_index import build_local_index, export_fulltext_indexes
+    path = os.path.join(tempfile.mkdtemp(prefix="rag-bench-"), "fulltext_index.bin")
+    build_local_index(path, export_fulltext_indexes(FakeDriver(graph, 0), list(graph.indexes)))
+    os.environ["LOCAL_INDEX_PATH"] = path
+    return path
+
+def build_fixture_dense_index(graph: FakeGraph) -> str:
+    """Embed the fake graph's indexed nodes for DENSE_RETRIEVAL=on"""
+    from api.dense_index import build_dense_index, create_embedder
+    from api.local_index import export_fulltext_indexes
+    prefix = os.path.join(tempfile.mkdtemp(prefix="rag-bench-"), "dense_index")
+    build_dense_index(prefix, export_fulltext_indexes(FakeDriver(graph, 0), list(graph.indexes)), create_embedder())
+    os.environ["DENSE_INDEX_PATH"] = prefix
+    return prefix
+
+def replay_threads(fn, questions: List[str], qps: float, concurrency: int):
+    """
+    Open-loop replay: request i is issued at start + i / qps whether or not
+    earlier ones finished, and its latency counts from that scheduled time,
+    so queueing delay shows up instead of being hidden.
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def call(scheduled, question):
+        try:
+            fn(question)
+            with lock:
+                latencies.append(time.perf_counter() - scheduled)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        for i, question in enumerate(questions):
+            scheduled = start + i / qps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(call, scheduled, question)
+    return latencies, errors, time.perf_counter() - start
+
+async def replay_async(fn, questions: List[str], qps: float):
+    """Open-loop replay on the event loop (see replay_threads)"""
+    latencies, errors = [], []
+
+    async def call(scheduled, question):
+        try:
+            await fn(question)
+            latencies.append(time.perf_counter() - scheduled)
+        except Exception as e:
+            errors.append(repr(e))
+
+    start = time.perf_counter()
+    tasks = []
+    for i, question in enumerate(questions):
+        scheduled = start + i / qps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(call(scheduled, question)))
+    await asyncio.gather(*tasks)
+    return latencies, errors, time.perf_counter() - start
+
+def run_answer(args, graph, questions):
+    from api.rag_system import AgricultureRAGSystem
+    rag_system = with_fake_driver(AgricultureRAGSystem, FakeDriver(graph, args.neo4j_latency))
+    try:
+        rag_system.get_all_variety_names()
+        return replay_threads(rag_system.get_rag_answer, questions, args.qps, args.concurrency)
+    finally:
+        rag_system.close()
+
+def run_async(args, graph, questions):
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+
+    async def main():
+        rag_system = with_fake_driver(AsyncAgricultureRAGSystem, AsyncFakeDriver(graph, args.neo4j_latency))
+        try:
+            await rag_system.get_all_variety_names()
+            return await replay_async(rag_system.get_rag_answer, questions, args.qps)
+        finally:
+            await rag_system.close()
+
+    return asyncio.run(main())
+
+def run_chat(args, graph, questions):
+    import httpx
+    from api import main as api_main
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+
+    api_main.rag_runtime.factory = lambda: with_fake_driver(
+        AsyncAgricultureRAGSystem, AsyncFakeDriver(graph, args.neo4j_latency)
+    )
+
+    async def main():
+        transport = httpx.ASGITransport(app=api_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            async def ask(question):
+                response = await client.post("/chat", json={"question": question})
+                response.raise_for_status()
+                if "[ডেমো মোড]" in response.json()["response"]:
+                    raise RuntimeError("RAG system fell back to demo mode")
+
+            await client.get("/warmup")
+            try:
+                return await replay_async(ask, questions, args.qps)
+            finally:
+                if api_main.rag_runtime.instance:
+                    await api_main.rag_runtime.instance.close()
+
+    return asyncio.run(main())
+
+def run_batch(args, graph, questions):
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+
+    async def main():
+        rag_system = with_fake_driver(AsyncAgricultureRAGSystem, AsyncFakeDriver(graph, args.neo4j_latency))
+        latencies, errors = [], []
+        try:
+            await rag_system.get_all_variety_names()
+            start = time.perf_counter()
+            async for result in rag_system.answer_batch(questions):
+                elapsed = time.perf_counter() - start
+                if "error" in result:
+                    errors.extend([result["error"]] * len(result["ids"]))
+                else:
+                    # Every duplicate of the question is answered by this result
+                    latencies.extend([elapsed] * len(result["ids"]))
+            return latencies, errors, time.perf_counter() - start
+        finally:
+            await rag_system.close()
+
+    return asyncio.run(main())
+
+TARGETS = {"answer": run_answer, "async": run_async, "chat": run_chat, "batch": run_batch}
+
+def stage_snapshot() -> Dict[str, tuple]:
+    from api.metrics import STAGE_SECONDS
+    return {
+        labels[0]: (STAGE_SECONDS.count(stage=labels[0]), STAGE_SECONDS.total(stage=labels[0]))
+        for labels in STAGE_SECONDS.label_values()
+    }
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(args) -> Dict:
+    with open(args.questions, encoding="utf-8") as f:
+        log = [line.strip() for line in f if line.strip()]
+    questions = [log[i % len(log)] for i in range(args.requests)]
+
+    openai_server = FakeOpenAIServer(latency=args.llm_latency, token_delay=args.token_delay).start()
+    configure_environment(args, openai_server)
+    graph = FakeGraph.from_fixture(args.fixture, scale=args.scale)
+    if args.backend == "local":
+        build_fixture_index(graph)
+    if args.dense:
+        build_fixture_dense_index(graph)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    before = stage_snapshot()
+    try:
+        latencies, errors, elapsed = TARGETS[args.target](args, graph, questions)
+    finally:
+        openai_server.stop()
+    after = stage_snapshot()
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    latencies_ms = [x * 1000 for x in latencies]
+    stages = {}
+    for stage, (count, total) in after.items():
+        prev_count, prev_total = before.get(stage, (0, 0.0))
+        if count > prev_count:
+            stages[stage] = round((total - prev_total) / (count - prev_count) * 1000, 3)
+
+    return {
+        "target": args.target,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "offered_qps": args.qps,
+            "concurrency": args.concurrency,
+            "neo4j_latency_ms": args.neo4j_latency * 1000,
+            "llm_latency_ms": args.llm_latency * 1000,
+            "token_delay_ms": args.token_delay * 1000,
+            "graph_nodes": len(graph.nodes),
+            "caches": args.caches,
+            "env": {k: v for k, v in sorted(os.environ.items()) if k.startswith(CONFIG_PREFIXES)},
+        },
+        "completed": len(latencies),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 2),
+            "p95": round(percentile(latencies_ms, 95), 2),
+            "p99": round(percentile(latencies_ms, 99), 2),
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0.0,
+            "max": round(max(latencies_ms, default=0.0), 2),
+        },
+        "stage_mean_ms": stages,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "traced_peak_mb": round(traced_peak / (1024 * 1024), 2) if traced_peak is not None else None,
+    }
+
+def compare(report: Dict, baseline: Dict) -> List[str]:
+    """Side-by-side lines for the headline numbers of two reports"""
+    rows = [("throughput_rps", report["throughput_rps"], baseline["throughput_rps"])]
+    for key in ("p50", "p95", "p99", "mean"):
+        rows.append((f"latency_ms.{key}", report["latency_ms"][key], baseline["latency_ms"][key]))
+    for key in ("peak_rss_mb", "traced_peak_mb"):
+        if report.get(key) is not None and baseline.get(key) is not None:
+            rows.append((key, report[key], baseline[key]))
+    lines = [f"{'metric':<20} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for name, current, before in rows:
+        change = f"{(current - before) / before * 100:+.1f}%" if before else "n/a"
+        lines.append(f"{name:<20} {before:>12} {current:>12} {change:>9}")
+    return lines
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline RAG benchmark with fake Neo4j and OpenAI")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="answer")
+    parser.add_argument("--questions", default=str(QUESTIONS_PATH), help="question log, one per line")
+    parser.add_argument("--fixture", default=str(FIXTURE_PATH), help="crop node fixture (JSON)")
+    parser.add_argument("--scale", type=int, default=1, help="synthetic copies of every variety")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--qps", type=float, default=20.0, help="offered load (requests per second)")
+    parser.add_argument("--concurrency", type=int, default=64, help="worker threads for --target answer")
+    parser.add_argument("--neo4j-latency", type=float, default=0.005, help="seconds per Neo4j query")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds to the first LLM token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between LLM tokens")
+    parser.add_argument("--mode", choices=["batched", "parallel", "sequential"], help="RAG_RETRIEVAL_MODE")
+    parser.add_argument("--backend", choices=["neo4j", "local"], default="neo4j",
+                        help="RETRIEVAL_BACKEND; local builds an index from the fixture first")
+    parser.add_argument("--dense", action="store_true",
+                        help="DENSE_RETRIEVAL=on; embeds the fixture first (DENSE_EMBEDDER, default hashing)")
+    parser.add_argument("--caches", action="store_true", help="keep the answer and retrieval caches on")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python heap peak (slower)")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)))
+
+if __name__ == "__main__":
+    main()
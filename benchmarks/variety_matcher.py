@@ -0,0 +1,88 @@
+"""
+Microbenchmark for variety lookup: the linear substring scan that
+extract_variety_from_question used before, against the VarietyMatcher
+automaton, on synthetic variety lists of growing size.
+
+    python -m benchmarks.variety_matcher
+    python -m benchmarks.variety_matcher --sizes 1000 10000 --repeat 50
+
+Reports, per list size, the build time of the automaton and the time per
+question for both lookups. The default question mentions no variety, which
+is the worst case for the linear scan (every name is tried).
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+from api.variety_matcher import VarietyMatcher
+
+# Prefixes of real variety names; numbered to reach the requested list size
+NAME_PREFIXES = [
+    "ব্রি ধান", "বিনা ধান", "বারি আলু", "বারি টমেটো", "বারি গম", "বারি সরিষা",
+    "বারি মসুর", "বারি বেগুন", "বারি মরিচ", "বিনা সরিষা", "বারি ভুট্টা", "বারি মুগ",
+]
+
+NO_MATCH_QUESTION = "ধানের পাতা হলুদ হয়ে যাচ্ছে এবং গোড়া পচে যাচ্ছে, এখন কী করব?"
+
+def synthetic_names(count: int) -> List[str]:
+    """count distinct names such as "বারি আলু-১২৩", with Bangla digits."""
+    digits = str.maketrans("0123456789", "০১২৩৪৫৬৭৮৯")
+    names = []
+    for i in range(count):
+        prefix = NAME_PREFIXES[i % len(NAME_PREFIXES)]
+        number = str(i // len(NAME_PREFIXES) + 1).translate(digits)
+        names.append(f"{prefix}-{number}" if i % 2 else f"{prefix}{number}")
+    return names
+
+def linear_scan(question: str, names: List[str]) -> Optional[str]:
+    """The lookup extract_variety_from_question did before VarietyMatcher."""
+    for v in names:
+        if v and v in question:
+            return v
+    return None
+
+def _per_call_us(fn, question: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(question)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def run_benchmark(sizes: List[int], question: str, repeat: int) -> List[Dict]:
+    rows = []
+    for size in sizes:
+        names = synthetic_names(size)
+        start = time.perf_counter()
+        matcher = VarietyMatcher(names)
+        build_ms = (time.perf_counter() - start) * 1000
+        # Both lookups must agree on whether anything matched
+        assert (linear_scan(question, names) is None) == (matcher.longest(question) is None)
+        rows.append({
+            "names": size,
+            "linear_scan_us": round(_per_call_us(lambda q: linear_scan(q, names), question, repeat), 1),
+            "automaton_us": round(_per_call_us(matcher.longest, question, repeat), 1),
+            "build_ms": round(build_ms, 1),
+        })
+    return rows
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Linear scan vs automaton variety lookup")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="variety list sizes to measure")
+    parser.add_argument("--question", default=NO_MATCH_QUESTION,
+                        help="question to look up (default mentions no variety)")
+    parser.add_argument("--repeat", type=int, default=20, help="lookups per measurement")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.sizes, args.question, args.repeat)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    print(f"{'names':>8} {'linear scan':>14} {'automaton':>12} {'build':>10}")
+    for row in rows:
+        print(f"{row['names']:>8} {row['linear_scan_us']:>11.1f} us "
+              f"{row['automaton_us']:>9.1f} us {row['build_ms']:>7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to Python path (as api/main.py does)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_neo4j import FakeDriver, FakeGraph
+
+@pytest.fixture(scope="session")
+def fake_graph():
+    """The benchmark crop fixture as an in-memory graph"""
+    return FakeGraph.from_fixture()
+
+@pytest.fixture
+def rag_env(monkeypatch):
+    """Environment for a RAG system backed by the stand-ins, with every cache off"""
+    monkeypatch.setenv("NEO4J_URI", "neo4j://test")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("VARIETY_SNAPSHOT_PATH", "")
+    monkeypatch.setenv("ANSWER_CACHE_BACKEND", "none")
+    monkeypatch.setenv("RETRIEVAL_CACHE_MAX_BYTES", "0")
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "neo4j")
+    monkeypatch.setenv("DENSE_RETRIEVAL", "off")
+    monkeypatch.setenv("INDEX_ROUTING", "off")
+
+@pytest.fixture
+def make_rag_system(rag_env, fake_graph):
+    """Build a RAG system class (sync or async) whose Neo4j driver is a FakeDriver"""
+    from benchmarks.run import with_fake_driver
+
+    created = []
+
+    def make(base_cls=None, latency: float = 0.0, driver=None):
+        if base_cls is None:
+            from api.rag_system import AgricultureRAGSystem as base_cls
+        rag_system = with_fake_driver(base_cls, driver or FakeDriver(fake_graph, latency))
+        created.append(rag_system)
+        return rag_system
+
+    yield make
+    for rag_system in created:
+        if rag_system._retrieval_pool is not None:
+            rag_system._retrieval_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,195 @@
+import pytest
+
+from api.cache import (
+    InMemoryAnswerCache,
+    RetrievalCache,
+    SQLiteAnswerCache,
+    _estimate_size,
+    normalize_question,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_answer_cache(request, clock, tmp_path):
+    def make(ttl=3600, max_entries=1000, path=None):
+        if request.param == "memory":
+            cache = InMemoryAnswerCache(ttl, max_entries, clock=clock)
+        else:
+            cache = SQLiteAnswerCache(path or str(tmp_path / "answers.sqlite3"), ttl, max_entries, clock=clock)
+        cache.ensure_version("v1")
+        return cache
+    return make
+
+def hits(*names):
+    return [{"জাতের নাম": name, "_id": name, "_score": 1.0} for name in names]
+
+def test_retrieval_cache_keys_on_the_exact_query(clock):
+    cache = RetrievalCache(clock=clock)
+    cache.set_many({"ix": hits("বারি আলু-৭")}, "বারি আলু-৭", 3)
+
+    assert cache.get_many(["ix"], "বারি আলু-৭", 3) == {"ix": hits("বারি আলু-৭")}
+    # Lucene treats these differently, so they are different lookups
+    assert cache.get_many(["ix"], "বারি আলু ৭", 3) == {}
+    assert cache.get_many(["ix"], "বারি আলু-৭?", 3) == {}
+    assert cache.get_many(["ix"], "বারি আলু-৭", 5) == {}
+
+def test_retrieval_cache_returns_copies(clock):
+    cache = RetrievalCache(clock=clock)
+    cache.set_many({"ix": hits("a")}, "q", 3)
+    cache.get_many(["ix"], "q", 3)["ix"][0]["_score"] = 99
+    assert cache.get_many(["ix"], "q", 3)["ix"][0]["_score"] == 1.0
+
+def test_retrieval_cache_evicts_least_recently_used_over_budget(clock):
+    size = _estimate_size(hits("a"))
+    cache = RetrievalCache(max_bytes=int(size * 2.5), clock=clock)
+    cache.set_many({"a": hits("a"), "b": hits("b")}, "q", 3)
+    cache.get_many(["a"], "q", 3)
+    cache.set_many({"c": hits("c")}, "q", 3)
+
+    assert set(cache.get_many(["a", "b", "c"], "q", 3)) == {"a", "c"}
+    assert cache.size <= cache.max_bytes
+
+def test_retrieval_cache_skips_entries_larger_than_the_budget(clock):
+    cache = RetrievalCache(max_bytes=100, clock=clock)
+    cache.set_many({"ix": hits("a", "b", "c")}, "q", 3)
+    assert cache.get_many(["ix"], "q", 3) == {}
+    assert cache.size == 0
+
+def test_retrieval_cache_expires_after_ttl_but_serves_stale(clock):
+    cache = RetrievalCache(ttl=600, max_stale=3600, clock=clock)
+    cache.set_many({"ix": hits("a")}, "q", 3)
+
+    clock.advance(601)
+    assert cache.get_many(["ix"], "q", 3) == {}
+    assert cache.get_many(["ix"], "q", 3, stale=True) == {"ix": hits("a")}
+
+def test_retrieval_cache_stops_serving_stale_after_max_stale(clock):
+    cache = RetrievalCache(ttl=600, max_stale=3600, clock=clock)
+    cache.set_many({"ix": hits("a")}, "q", 3)
+
+    clock.advance(600 + 3601)
+    assert cache.get_many(["ix"], "q", 3, stale=True) == {}
+    assert cache.stats()["entries"] == 0
+    assert cache.size == 0
+
+def test_retrieval_cache_sweeps_entries_past_max_stale(clock):
+    cache = RetrievalCache(ttl=600, max_stale=3600, clock=clock)
+    cache.set_many({"old": hits("a")}, "q", 3)
+    clock.advance(600 + 3601)
+    cache.set_many({"new": hits("b")}, "q", 3)
+
+    assert cache.stats()["entries"] == 1
+    assert cache.size == _estimate_size(hits("b"))
+
+@pytest.mark.parametrize("a, b", [
+    ("ব্রি ধান২৮ এর ফলন কত?", "ব্রি ধান28 এর ফলন কত"),
+    ("  ধানের   রোগ।", "ধানের রোগ"),
+    ("Rice Yield?", "rice yield"),
+    ("ব্রি ধান-২৮", "ব্রি ধান ২৮"),
+])
+def test_normalize_question_folds_equivalent_questions(a, b):
+    assert normalize_question(a) == normalize_question(b)
+
+def test_normalize_question_can_keep_digits():
+    assert normalize_question("ধান২৮", fold_digits=False) == "ধান২৮"
+    assert normalize_question("ধান২৮") == "ধান28"
+
+def test_answer_cache_hits_on_a_normalized_question(make_answer_cache):
+    cache = make_answer_cache()
+    cache.set("ব্রি ধান২৮ এর ফলন কত?", "answer")
+    assert cache.get("ব্রি ধান28 এর ফলন কত") == "answer"
+    assert cache.get("ব্রি ধান২৯ এর ফলন কত?") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_answer_cache_expires_after_ttl(make_answer_cache, clock):
+    cache = make_answer_cache(ttl=60)
+    cache.set("q", "answer")
+    clock.advance(60)
+    assert cache.get("q") == "answer"
+    clock.advance(1)
+    assert cache.get("q") is None
+    assert len(cache) == 0
+
+def test_answer_cache_evicts_least_recently_used(make_answer_cache, clock):
+    cache = make_answer_cache(max_entries=2)
+    cache.set("a", "A")
+    clock.advance(1)
+    cache.set("b", "B")
+    clock.advance(1)
+    assert cache.get("a") == "A"
+    clock.advance(1)
+    cache.set("c", "C")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+def test_answer_cache_drops_everything_on_a_new_version(make_answer_cache):
+    cache = make_answer_cache()
+    cache.set("q", "answer")
+    cache.ensure_version("v1")
+    assert cache.get("q") == "answer"
+    cache.ensure_version("v2")
+    assert cache.get("q") is None
+    assert len(cache) == 0
+
+def test_sqlite_workers_do_not_serve_each_others_versions(tmp_path, clock):
+    path = str(tmp_path / "shared.sqlite3")
+    old_worker = SQLiteAnswerCache(path, clock=clock)
+    new_worker = SQLiteAnswerCache(path, clock=clock)
+    old_worker.ensure_version("v1")
+    new_worker.ensure_version("v1")
+    old_worker.set("q", "answer from v1 data")
+
+    # The other worker refreshed its variety list and invalidated the file
+    new_worker.ensure_version("v2")
+    assert new_worker.get("q") is None
+
+    # The old worker has not refreshed yet; what it writes is for v1 only
+    old_worker.ensure_version("v1")
+    old_worker.set("q", "answer from v1 data")
+    assert new_worker.get("q") is None
+    new_worker.set("q", "answer from v2 data")
+    assert old_worker.get("q") is None
+    assert new_worker.get("q") == "answer from v2 data"
+
+def test_sqlite_cache_survives_a_restart(tmp_path, clock):
+    path = str(tmp_path / "answers.sqlite3")
+    cache = SQLiteAnswerCache(path, clock=clock)
+    cache.ensure_version("v1")
+    cache.set("q", "answer")
+
+    reopened = SQLiteAnswerCache(path, clock=clock)
+    reopened.ensure_version("v1")
+    assert reopened.get("q") == "answer"
+
+def test_sqlite_cache_ignores_entries_from_before_per_entry_versions(tmp_path, clock):
+    import sqlite3
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE answers (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                 " created REAL NOT NULL, accessed REAL NOT NULL)")
+    conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("INSERT INTO meta VALUES ('version', 'v1')")
+    conn.execute("INSERT INTO answers VALUES ('q', 'old answer', ?, ?)", (clock(), clock()))
+    conn.commit()
+    conn.close()
+
+    cache = SQLiteAnswerCache(path, clock=clock)
+    cache.ensure_version("v1")
+    assert cache.get("q") is None
+    cache.set("q", "new answer")
+    assert cache.get("q") == "new answer"
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=30.0, clock=clock)
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            with breaker.guard():
+                raise RuntimeError("down")
+
+def succeed(breaker):
+    with breaker.guard():
+        pass
+
+def test_opens_after_threshold_consecutive_failures(breaker):
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    fail(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["last_error"] == "down"
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, 2)
+    succeed(breaker)
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 2
+
+def test_open_circuit_fails_fast_until_reset_timeout(breaker, clock):
+    fail(breaker, 3)
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            calls.append(1)
+    with pytest.raises(CircuitOpenError):
+        breaker.raise_if_open()
+    assert calls == []
+
+    clock.advance(29.9)
+    assert not breaker.allow()
+    assert breaker.stats()["retry_in_s"] == pytest.approx(0.1)
+
+def test_half_open_allows_a_single_trial(breaker, clock):
+    fail(breaker, 3)
+    clock.advance(30)
+
+    # raise_if_open does not claim the trial
+    breaker.raise_if_open()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.raise_if_open()
+
+def test_successful_trial_closes_the_circuit(breaker, clock):
+    fail(breaker, 3)
+    clock.advance(30)
+    succeed(breaker)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+def test_failed_trial_reopens_for_another_reset_timeout(breaker, clock):
+    fail(breaker, 3)
+    clock.advance(30)
+    fail(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+
+def test_cancellation_is_neither_success_nor_failure(breaker):
+    fail(breaker, 2)
+    with pytest.raises(asyncio.CancelledError):
+        with breaker.guard():
+            raise asyncio.CancelledError()
+    assert breaker.failures == 2
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_cancelled_trial_frees_the_trial_slot(breaker, clock):
+    fail(breaker, 3)
+    clock.advance(30)
+    with pytest.raises(KeyboardInterrupt):
+        with breaker.guard():
+            raise KeyboardInterrupt()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Another caller may run the trial; the circuit did not reopen
+    assert breaker.allow()
@@ -0,0 +1,122 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from api.context_builder import (
+    FactTextCache,
+    build_context,
+    dedupe_facts,
+    estimate_tokens,
+    filter_facts_by_varieties,
+    render_fact,
+)
+
+def fact(node_id, index_name, score, **props):
+    return {**props, "_id": node_id, "_index": index_name, "_score": score}
+
+def test_import_does_not_load_the_tokenizer():
+    script = "import api.context_builder as c; print(c._encoding.cache_info().currsize)"
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parent.parent,
+    ).stdout
+    assert output.strip() == "0"
+
+def test_dedupe_keeps_the_best_score_and_every_index():
+    facts = [
+        fact("n1", "sarFulltext", 1.0, name="a"),
+        fact("n2", "rogFulltext", 3.0, name="b"),
+        fact("n1", "rogFulltext", 2.0, name="a"),
+    ]
+    unique = dedupe_facts(facts)
+
+    assert [f["_id"] for f in unique] == ["n2", "n1"]
+    assert unique[1]["_score"] == 2.0
+    assert unique[1]["_index"] == "rogFulltext"
+    assert unique[1]["_indexes"] == ["sarFulltext", "rogFulltext"]
+    # Inputs are not modified, and deduping again is a no-op
+    assert "_indexes" not in facts[0]
+    assert dedupe_facts(unique) == unique
+
+def test_build_context_packs_best_facts_within_the_budget():
+    long_fact = fact("n1", "ix", 3.0, text="ধান " * 200)
+    short_fact = fact("n2", "ix", 2.0, text="সার")
+    dropped_duplicate = fact("n2", "other", 1.0, text="সার")
+    budget = estimate_tokens(render_fact(dedupe_facts([short_fact])[0])) + 5
+
+    context, stats = build_context([long_fact, short_fact, dropped_duplicate], budget)
+
+    # The long top fact does not fit; the shorter one behind it still does
+    assert context.count("\n") == 1
+    assert "সার" in context and "ধান" not in context
+    assert "ix+other" in context
+    assert stats["facts"] == 3
+    assert stats["unique_facts"] == 2
+    assert stats["packed_facts"] == 1
+    assert stats["context_tokens"] <= budget
+    assert stats["tokens_saved"] == stats["raw_tokens"] - stats["context_tokens"]
+    assert stats["packed_by_index"] == {"ix": 1, "other": 1}
+
+def test_build_context_with_no_budget_is_empty():
+    context, stats = build_context([fact("n1", "ix", 1.0, text="ধান")], 0)
+    assert context == ""
+    assert stats["packed_facts"] == 0
+
+def test_build_context_uses_the_fact_text_cache():
+    texts = FactTextCache()
+    facts = [fact("n1", "ix", 1.0, text="ধান")]
+    first, _ = build_context(facts, 100, texts)
+    second, _ = build_context(facts, 100, texts)
+    assert first == second
+    assert texts.stats()["misses"] == 1
+    assert texts.stats()["hits"] == 1
+
+def test_fact_text_cache_builds_search_text_only_when_asked():
+    texts = FactTextCache()
+    node = fact("n1", "ix", 1.0, name="ব্রি ধান-২৮")
+    texts.display(node)
+    assert texts._entries["n1"][1] is None
+    assert texts.search(node) == "ব্রিধান28"
+    assert texts.display(node) == "name:ব্রি ধান-২৮"
+
+def test_fact_text_cache_skips_facts_without_an_id():
+    texts = FactTextCache()
+    assert texts.display({"name": "x", "_index": "ix", "_score": 1.0}) == "name:x"
+    assert texts.stats()["entries"] == 0
+
+def test_fact_text_cache_stays_within_its_budget():
+    texts = FactTextCache(max_bytes=600)
+    for i in range(20):
+        texts.display(fact(f"n{i}", "ix", 1.0, name=f"জাত {i}"))
+    assert 0 < texts.stats()["entries"] < 20
+    assert texts.size <= 600
+    # Oldest entries go first
+    assert "n19" in texts._entries and "n0" not in texts._entries
+
+    texts.invalidate()
+    assert texts.stats()["entries"] == 0 and texts.size == 0
+
+FACTS = [
+    fact("n1", "ix", 1.0, name="ব্রি ধান২৮", note="বোরো মৌসুমে"),
+    fact("n2", "ix", 1.0, name="ব্রি ধান২৯"),
+    fact("n3", "ix", 1.0, name="ব্রি ধান২"),
+    fact("n4", "ix", 1.0, detail="ব্রি ধান ২ এবং ব্রি ধান-২৮ দুটোই"),
+]
+
+def test_filter_respects_the_digit_boundary():
+    filtered = filter_facts_by_varieties(FACTS, ["ব্রি ধান২"])
+    assert [f["_id"] for f in filtered["ব্রি ধান২"]] == ["n3", "n4"]
+
+def test_filter_several_varieties_in_one_pass():
+    names = ["ব্রি ধান২", "ব্রি ধান২৮", "ব্রি ধান-২৮", "বারি আলু-৭"]
+    for texts in (None, FactTextCache()):
+        filtered = filter_facts_by_varieties(FACTS, names, texts)
+        assert [f["_id"] for f in filtered["ব্রি ধান২"]] == ["n3", "n4"]
+        assert [f["_id"] for f in filtered["ব্রি ধান২৮"]] == ["n1", "n4"]
+        # Spelled differently, same normalized name
+        assert filtered["ব্রি ধান-২৮"] == filtered["ব্রি ধান২৮"]
+        assert filtered["বারি আলু-৭"] == []
+
+def test_filter_does_not_match_across_property_values():
+    node = fact("n1", "ix", 1.0, a="ব্রি", b="ধান২৮")
+    assert filter_facts_by_varieties([node], ["ব্রি ধান২৮"])["ব্রি ধান২৮"] == []
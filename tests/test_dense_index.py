@@ -0,0 +1,101 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from api import dense_index
+from api.dense_index import reciprocal_rank_fusion
+
+QUESTION = "ধানের ব্লাস্ট রোগ দমন কিভাবে করব?"
+
+def test_rrf_ranks_items_found_by_both_rankings_first():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert fused["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused["b"] == pytest.approx(1 / 62)
+    assert sorted(fused, key=fused.get, reverse=True) == ["a", "c", "b"]
+
+def test_rrf_ties_score_equally():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "a"]])
+    assert fused["a"] == fused["b"]
+
+def test_hashing_embedder_is_deterministic_across_processes():
+    np = pytest.importorskip("numpy")
+    vector = dense_index.HashingEmbedder(64).embed([QUESTION])[0]
+    assert np.array_equal(vector, dense_index.HashingEmbedder(64).embed([QUESTION])[0])
+    assert float(np.linalg.norm(vector)) == pytest.approx(1.0, abs=1e-6)
+
+    # crc32, not hash(): a fresh interpreter with another hash seed agrees
+    script = (
+        "import json, sys; from api.dense_index import HashingEmbedder; "
+        "print(json.dumps(HashingEmbedder(64).embed([sys.argv[1]])[0].tolist()))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script, QUESTION], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parent.parent, env={"PYTHONHASHSEED": "123", "PATH": ""},
+    ).stdout
+    assert json.loads(output) == vector.tolist()
+
+def test_hashing_embedder_puts_inflected_forms_closer_than_unrelated_words():
+    pytest.importorskip("numpy")
+    base, inflected, unrelated = dense_index.HashingEmbedder().embed(["সার", "সারের", "টমেটো"])
+    assert float(base @ inflected) > float(base @ unrelated)
+
+@pytest.fixture
+def dense_prefix(fake_graph, tmp_path):
+    pytest.importorskip("numpy")
+    from api.local_index import export_fulltext_indexes
+    from benchmarks.fake_neo4j import FakeDriver
+    prefix = str(tmp_path / "dense_index")
+    exported = export_fulltext_indexes(FakeDriver(fake_graph, 0), list(fake_graph.indexes))
+    dense_index.build_dense_index(prefix, exported, dense_index.HashingEmbedder(128))
+    return prefix
+
+def test_fuse_keeps_fulltext_order_on_ties(dense_prefix):
+    retriever = dense_index.DenseRetriever(dense_prefix, dense_index.HashingEmbedder(128))
+    fulltext = {"ix": [{"_id": "a", "_score": 2.0}, {"_id": "b", "_score": 1.0}]}
+    dense = {"ix": [{"_id": "b", "_score": 0.9}, {"_id": "a", "_score": 0.8}]}
+
+    fused = retriever.fuse(fulltext, dense, limit=2)["ix"]
+    assert [fact["_id"] for fact in fused] == ["a", "b"]
+    assert fused[0]["_score"] == fused[1]["_score"]
+    assert fused[0]["_fulltext_score"] == 2.0 and fused[0]["_dense_score"] == 0.8
+
+def test_fuse_adds_dense_only_hits(dense_prefix):
+    retriever = dense_index.DenseRetriever(dense_prefix, dense_index.HashingEmbedder(128))
+    fulltext = {"ix": [{"_id": "a", "_score": 2.0}]}
+    dense = {"ix": [{"_id": "a", "_score": 0.9}, {"_id": "c", "_score": 0.5}], "other": [{"_id": "d", "_score": 0.4}]}
+
+    fused = retriever.fuse(fulltext, dense, limit=3)
+    assert [fact["_id"] for fact in fused["ix"]] == ["a", "c"]
+    assert [fact["_id"] for fact in fused["other"]] == ["d"]
+
+def test_retriever_rejects_an_index_built_with_another_embedder(dense_prefix):
+    with pytest.raises(ValueError):
+        dense_index.DenseRetriever(dense_prefix, dense_index.HashingEmbedder(64))
+
+def test_no_numpy_means_no_dense_retriever(monkeypatch, dense_prefix):
+    monkeypatch.setattr(dense_index, "np", None)
+    assert dense_index.create_dense_retriever(dense_prefix) is None
+
+def test_missing_dense_index_falls_back_to_fulltext_only(make_rag_system, monkeypatch, tmp_path):
+    fulltext_only = make_rag_system().get_relevant_facts(QUESTION, top_n_each=3)
+
+    monkeypatch.setenv("DENSE_RETRIEVAL", "on")
+    monkeypatch.setenv("DENSE_INDEX_PATH", str(tmp_path / "missing"))
+    rag_system = make_rag_system()
+    assert rag_system.get_relevant_facts(QUESTION, top_n_each=3) == fulltext_only
+    assert rag_system.DENSE_RETRIEVAL is False
+
+def test_dense_retrieval_fuses_with_fulltext(make_rag_system, monkeypatch, dense_prefix):
+    monkeypatch.setenv("DENSE_RETRIEVAL", "on")
+    monkeypatch.setenv("DENSE_INDEX_PATH", dense_prefix)
+    monkeypatch.setenv("DENSE_DIM", "128")
+    rag_system = make_rag_system()
+
+    facts = rag_system.get_relevant_facts(QUESTION, top_n_each=3)
+    assert rag_system.dense_retriever is not None
+    assert facts
+    assert all("_fulltext_score" in fact or "_dense_score" in fact for fact in facts)
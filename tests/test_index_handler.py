@@ -0,0 +1,54 @@
+import http.client
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from http.server import HTTPServer
+from pathlib import Path
+
+import pytest
+
+from api.index import Handler
+
+@pytest.mark.parametrize("module", ["api.index", "api.main"])
+def test_import_leaves_the_root_logger_alone(module):
+    script = (
+        f"import logging, {module}; root = logging.getLogger(); "
+        "print(root.level, len(root.handlers), logging.getLogger('api.rag_system').getEffectiveLevel())"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parent.parent, env={**os.environ, "LOG_LEVEL": "INFO"},
+    ).stdout
+    assert output.split() == [str(logging.WARNING), "0", str(logging.INFO)]
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+def post(port, path, body, headers):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.putrequest("POST", path)
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    return response.status, response.getheader("Content-type"), response.read()
+
+@pytest.mark.parametrize("body, headers", [
+    (b"{not json", {"Content-Length": "9"}),
+    (b"[1, 2]", {"Content-Length": "6"}),
+    (b"", {}),
+])
+def test_stream_chat_rejects_a_bad_body_with_a_json_error(server, body, headers):
+    status, content_type, payload = post(server, "/api/chat/stream", body, headers)
+    assert status == 400
+    assert content_type == "application/json"
+    assert "error" in json.loads(payload)
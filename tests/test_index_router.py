@@ -0,0 +1,67 @@
+import pytest
+
+from api.index_router import CORE_INDEXES, INDEX_KEYWORDS, IndexRouter
+
+INDEXES = list(CORE_INDEXES) + sorted(INDEX_KEYWORDS) + ["extraFulltext"]
+
+@pytest.fixture
+def router():
+    return IndexRouter(INDEXES, mode="rules")
+
+@pytest.mark.parametrize("question", [
+    "সারাদেশে ধানের অবস্থা",  # starts with "সার"
+    "Thailand rice",  # contains "land"
+    "Poland potato exports",
+])
+def test_keywords_inside_other_words_do_not_route(router, question):
+    plan = router.route(question)
+    assert plan.decision == "fallback"
+    assert plan.matched == []
+    assert plan.indexes == INDEXES
+
+@pytest.mark.parametrize("question, keyword, index_name", [
+    ("ধানের সারের মাত্রা", "সার", "sarBebosthaponaFulltext"),
+    ("ধানে রোগের লক্ষণ", "রোগ", "rogBalaiFulltext"),
+    ("জমিতে সেচ", "জমি", "stanNirbachonFulltext"),
+    ("এলাকায় ফলন কেমন", "এলাকা", "upojogiElakaFulltext"),
+    ("ধানের পোকামাকড়", "পোকামাকড়", "pokamakorFulltext"),
+    ("rice seeds", "seed", "beejChararHarFulltext"),
+    ("tomato diseases", "disease", "rogBalaiFulltext"),
+])
+def test_inflected_keywords_still_route(router, question, keyword, index_name):
+    plan = router.route(question)
+    assert plan.decision == "routed"
+    assert keyword in plan.matched
+    assert index_name in plan.indexes
+    assert set(CORE_INDEXES) <= set(plan.indexes)
+
+@pytest.mark.parametrize("read", [
+    lambda router: router.route("ধান প্রশ্ন"),
+    lambda router: router.stats(),
+])
+def test_learned_statistics_are_read_under_the_lock(read):
+    import threading
+    router = IndexRouter(INDEXES, mode="adaptive", explore_rate=0.0)
+
+    # observe() mutates the statistics under _lock from other request
+    # threads; a reader must wait for it instead of iterating mid-update
+    with router._lock:
+        reader = threading.Thread(target=read, args=(router,))
+        reader.start()
+        reader.join(0.2)
+        assert reader.is_alive()
+    reader.join(5)
+    assert not reader.is_alive()
+
+def test_routing_is_off_unless_enabled(monkeypatch):
+    from api.index_router import create_index_router
+
+    monkeypatch.delenv("INDEX_ROUTING", raising=False)
+    router = create_index_router(INDEXES)
+    plan = router.route("ধানের সারের মাত্রা")
+    assert router.mode == "off"
+    assert plan.decision == "off"
+    assert plan.indexes == INDEXES
+
+    monkeypatch.setenv("INDEX_ROUTING", "rules")
+    assert create_index_router(INDEXES).route("ধানের সারের মাত্রা").decision == "routed"
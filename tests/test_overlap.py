@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.overlap import run_overlap
+from benchmarks.run import QUESTIONS_PATH
+
+@pytest.fixture
+def openai_server(rag_env, monkeypatch):
+    server = FakeOpenAIServer(latency=0.2).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    yield server
+    server.stop()
+
+@pytest.fixture
+def questions():
+    with open(QUESTIONS_PATH, encoding="utf-8") as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))[:6]
+
+def test_blocking_pipeline_serializes_chat_requests(openai_server, fake_graph, questions):
+    row = run_overlap("blocking", fake_graph, questions, neo4j_latency=0.0)
+    assert row["errors"] == 0
+    assert row["peak_in_flight"] == 1
+    assert row["elapsed_s"] >= 0.2 * len(questions)
+
+def test_async_pipeline_overlaps_chat_requests(openai_server, fake_graph, questions):
+    row = run_overlap("async", fake_graph, questions, neo4j_latency=0.0)
+    assert row["errors"] == 0
+    assert row["peak_in_flight"] == len(questions)
+    assert row["elapsed_s"] < 0.2 * len(questions)
@@ -0,0 +1,30 @@
+import pytest
+
+from api.question_classifier import BROAD, TOPIC, VARIETY, QuestionClassifier
+
+@pytest.fixture(scope="module")
+def classifier():
+    return QuestionClassifier()
+
+@pytest.mark.parametrize("question, variety, kind, top_n", [
+    ("ব্রি ধান২৮ এর ফলন কত?", "ব্রি ধান২৮", VARIETY, 5),
+    ("ব্রি ধান২৮ এর সব রোগ কি কি?", "ব্রি ধান২৮", VARIETY, 6),
+    ("ধানের সারের মাত্রা কত?", None, TOPIC, 3),
+    ("tomato diseases", None, TOPIC, 3),
+    ("ধানের সব জাতের ফলন কত?", None, BROAD, 6),
+    ("কোন কোন ধানের জাত আছে?", None, BROAD, 6),
+    ("ধান চাষ কিভাবে করব?", None, BROAD, 6),
+    # Keywords inside other words are not topic words
+    ("সারাদেশে ধানের অবস্থা", None, BROAD, 6),
+    ("Thailand rice", None, BROAD, 6),
+])
+def test_classify(classifier, question, variety, kind, top_n):
+    intent = classifier.classify(question, variety)
+    assert intent.kind == kind
+    assert intent.top_n_each == top_n
+
+def test_list_words_match_whole_words(classifier):
+    # "সব" starts "সবজি" but does not ask for a list
+    intent = classifier.classify("সবজি চাষে সেচ")
+    assert not intent.listing
+    assert intent.kind == TOPIC
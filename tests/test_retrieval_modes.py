@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+QUESTIONS = [
+    "ব্রি ধান২৮ এর সার ব্যবস্থাপনা কেমন?",
+    "ধানের ব্লাস্ট রোগ দমন কিভাবে করব?",
+    "আলুর মড়ক রোগ হলে কি করব?",
+    "টমেটো চাষের মিডিয়া কিভাবে তৈরি করব?",
+]
+
+@pytest.mark.parametrize("question", QUESTIONS)
+def test_retrieval_modes_return_the_same_facts(make_rag_system, question):
+    rag_system = make_rag_system()
+    assert rag_system.retrieval_cache is None
+
+    batched = rag_system.get_relevant_facts(question, top_n_each=3, mode="batched")
+    sequential = rag_system.get_relevant_facts(question, top_n_each=3, mode="sequential")
+    parallel = rag_system.get_relevant_facts(question, top_n_each=3, mode="parallel")
+
+    assert batched
+    assert batched == sequential
+    assert batched == parallel
+
+def test_retrieval_modes_agree_on_a_subset_of_indexes(make_rag_system):
+    rag_system = make_rag_system()
+    indexes = rag_system.INDEXES[:5]
+
+    results = [
+        rag_system.get_relevant_facts(QUESTIONS[1], top_n_each=5, mode=mode, indexes=indexes)
+        for mode in ("batched", "sequential", "parallel")
+    ]
+
+    assert results[0] == results[1] == results[2]
+    assert {fact["_index"] for fact in results[0]} <= set(indexes)
+
+def test_missing_local_index_is_not_reopened_on_every_request(make_rag_system, monkeypatch, tmp_path):
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_INDEX_PATH", str(tmp_path / "missing.bin"))
+    rag_system = make_rag_system()
+    opens = []
+    import api.local_index
+    original = api.local_index.LocalFulltextIndex
+    monkeypatch.setattr(api.local_index, "LocalFulltextIndex", lambda path: opens.append(path) or original(path))
+
+    first = rag_system.get_relevant_facts(QUESTIONS[0], top_n_each=3, mode="batched")
+    second = rag_system.get_relevant_facts(QUESTIONS[0], top_n_each=3, mode="batched")
+    assert first and first == second
+    assert len(opens) == 1
+
+    # Tried again once the retry interval has passed
+    rag_system._local_index_retry_at = 0.0
+    rag_system.get_relevant_facts(QUESTIONS[0], top_n_each=3, mode="batched")
+    assert len(opens) == 2
+
+def test_parallel_mode_skips_lookups_that_overran(make_rag_system, monkeypatch):
+    monkeypatch.setenv("RAG_INDEX_TIMEOUT", "0.05")
+    monkeypatch.setenv("NEO4J_BREAKER_FAILURES", "1000")
+    # More indexes than workers, so some lookups start only after others overran
+    monkeypatch.setenv("RAG_RETRIEVAL_MAX_WORKERS", "4")
+    rag_system = make_rag_system(latency=0.2)
+
+    assert rag_system.get_relevant_facts(QUESTIONS[1], top_n_each=3, mode="parallel") == []
+
+@pytest.fixture
+def slow_index_env(monkeypatch):
+    """Every per-index lookup overruns RAG_INDEX_TIMEOUT; 3 failures open the breaker"""
+    monkeypatch.setenv("RAG_INDEX_TIMEOUT", "0.05")
+    monkeypatch.setenv("NEO4J_BREAKER_FAILURES", "3")
+
+def test_one_slow_parallel_request_does_not_open_the_breaker(make_rag_system, slow_index_env):
+    rag_system = make_rag_system(latency=0.5)
+    assert len(rag_system.INDEXES) > 3
+
+    assert rag_system.get_relevant_facts(QUESTIONS[1], top_n_each=3, mode="parallel") == []
+    assert rag_system.neo4j_breaker.state == "closed"
+    assert rag_system.neo4j_breaker.failures == 1
+
+def test_one_slow_async_parallel_request_does_not_open_the_breaker(make_rag_system, fake_graph, slow_index_env):
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+    from benchmarks.fake_neo4j import AsyncFakeDriver
+    rag_system = make_rag_system(AsyncAgricultureRAGSystem, driver=AsyncFakeDriver(fake_graph, 0.5))
+
+    facts = asyncio.run(rag_system.get_relevant_facts(QUESTIONS[1], top_n_each=3, mode="parallel"))
+    assert facts == []
+    assert rag_system.neo4j_breaker.state == "closed"
+    assert rag_system.neo4j_breaker.failures == 1
+
+@pytest.fixture
+def partial_local_index(fake_graph, tmp_path):
+    """A local index file holding only the first half of the indexes"""
+    from api.local_index import build_local_index, export_fulltext_indexes
+    from benchmarks.fake_neo4j import FakeDriver
+    indexes = list(fake_graph.indexes)
+    held = indexes[:len(indexes) // 2]
+    path = str(tmp_path / "fulltext_index.bin")
+    build_local_index(path, export_fulltext_indexes(FakeDriver(fake_graph, 0), held))
+    return path, held
+
+def test_indexes_missing_from_the_local_file_go_to_neo4j(make_rag_system, monkeypatch, partial_local_index):
+    path, held = partial_local_index
+    neo4j_system = make_rag_system()
+    rest = [ix for ix in neo4j_system.INDEXES if ix not in held]
+    expected = neo4j_system.get_relevant_facts(QUESTIONS[1], top_n_each=3, indexes=rest)
+    assert expected
+
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_INDEX_PATH", path)
+    local_system = make_rag_system()
+    facts = local_system.get_relevant_facts(QUESTIONS[1], top_n_each=3)
+
+    assert [fact for fact in facts if fact["_index"] in rest] == expected
+    assert any(fact["_index"] in held for fact in facts)
+
+def test_async_bulk_sends_indexes_missing_from_the_local_file_to_neo4j(
+        make_rag_system, fake_graph, monkeypatch, partial_local_index):
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+    from benchmarks.fake_neo4j import AsyncFakeDriver
+    path, held = partial_local_index
+    neo4j_system = make_rag_system(AsyncAgricultureRAGSystem, driver=AsyncFakeDriver(fake_graph, 0.0))
+    rest = [ix for ix in neo4j_system.INDEXES if ix not in held]
+    expected = [
+        asyncio.run(neo4j_system.get_relevant_facts(question, top_n_each=3, indexes=rest))
+        for question in QUESTIONS
+    ]
+
+    monkeypatch.setenv("RETRIEVAL_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_INDEX_PATH", path)
+    local_system = make_rag_system(AsyncAgricultureRAGSystem, driver=AsyncFakeDriver(fake_graph, 0.0))
+    bulk = asyncio.run(local_system.get_relevant_facts_bulk(QUESTIONS, [3] * len(QUESTIONS), [None] * len(QUESTIONS)))
+
+    assert [[fact for fact in facts if fact["_index"] in rest] for facts in bulk] == expected
@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.singleflight import AsyncSingleFlight, SingleFlight
+
+N = 8
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.001)
+
+async def async_wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.001)
+
+def run_threads(target, n: int = N):
+    """Run target(i) on n threads; returns the results (or exceptions) by position"""
+    outcomes = [None] * n
+
+    def run(i):
+        try:
+            outcomes[i] = target(i)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return outcomes
+
+def test_single_flight_coalesces_concurrent_calls():
+    group = SingleFlight()
+    backend_calls = []
+
+    def backend():
+        backend_calls.append(1)
+        # Stay in flight until every other caller has joined
+        wait_until(lambda: group.merged == N - 1)
+        return "answer"
+
+    outcomes = run_threads(lambda i: group.do("key", backend))
+
+    assert outcomes == ["answer"] * N
+    assert len(backend_calls) == 1
+    assert group.calls == 1
+    assert group.merged == N - 1
+    assert group.stats()["in_flight"] == 0
+
+def test_single_flight_shares_the_leaders_exception():
+    group = SingleFlight()
+    error = RuntimeError("backend down")
+
+    def backend():
+        wait_until(lambda: group.merged == N - 1)
+        raise error
+
+    outcomes = run_threads(lambda i: group.do("key", backend))
+
+    assert all(outcome is error for outcome in outcomes)
+    assert group.calls == 1
+    # The failure is not cached: the next call runs the function again
+    assert group.do("key", lambda: "retried") == "retried"
+    assert group.calls == 2
+
+def test_single_flight_keeps_different_keys_apart():
+    group = SingleFlight()
+    outcomes = run_threads(lambda i: group.do(i % 2, lambda: i % 2), n=4)
+    assert sorted(outcomes) == [0, 0, 1, 1]
+
+def test_async_single_flight_coalesces_concurrent_calls():
+    group = AsyncSingleFlight()
+    backend_calls = []
+
+    async def backend():
+        backend_calls.append(1)
+        await async_wait_until(lambda: group.merged == N - 1)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", backend) for _ in range(N)))
+
+    assert asyncio.run(main()) == ["answer"] * N
+    assert len(backend_calls) == 1
+    assert group.calls == 1
+    assert group.merged == N - 1
+    assert group.stats()["in_flight"] == 0
+
+def test_async_single_flight_shares_the_leaders_exception():
+    group = AsyncSingleFlight()
+    error = RuntimeError("backend down")
+
+    async def backend():
+        await async_wait_until(lambda: group.merged == N - 1)
+        raise error
+
+    async def main():
+        return await asyncio.gather(
+            *(group.do("key", backend) for _ in range(N)), return_exceptions=True
+        )
+
+    outcomes = asyncio.run(main())
+    assert all(outcome is error for outcome in outcomes)
+    assert group.calls == 1
+
+def test_async_single_flight_survives_a_cancelled_waiter():
+    group = AsyncSingleFlight()
+    release = None
+
+    async def backend():
+        await release.wait()
+        return "answer"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(group.do("key", backend))
+        second = asyncio.ensure_future(group.do("key", backend))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("answer", True)
+
+# Variants that normalize to the same question
+QUESTIONS = ["ব্রি ধান২৮ এর ফলন কত?", "ব্রি ধান২৮ এর ফলন কত", "ব্রি  ধান২৮ এর ফলন কত ?"]
+
+def test_get_rag_answer_makes_one_backend_call(make_rag_system, monkeypatch):
+    rag_system = make_rag_system()
+    backend_calls = []
+
+    def rag_answer(user_query, variety_list):
+        backend_calls.append(user_query)
+        wait_until(lambda: rag_system.in_flight.merged == N - 1)
+        return "answer"
+
+    monkeypatch.setattr(rag_system, "rag_answer", rag_answer)
+    outcomes = run_threads(lambda i: rag_system.get_rag_answer(QUESTIONS[i % len(QUESTIONS)]))
+
+    assert outcomes == ["answer"] * N
+    assert len(backend_calls) == 1
+    assert rag_system.in_flight.calls == 1
+    assert rag_system.in_flight.merged == N - 1
+
+def test_get_rag_answer_shares_the_leaders_exception(make_rag_system, monkeypatch):
+    rag_system = make_rag_system()
+    error = RuntimeError("LLM unavailable")
+
+    def rag_answer(user_query, variety_list):
+        wait_until(lambda: rag_system.in_flight.merged == N - 1)
+        raise error
+
+    monkeypatch.setattr(rag_system, "rag_answer", rag_answer)
+    outcomes = run_threads(lambda i: rag_system.get_rag_answer(QUESTIONS[0]))
+
+    assert all(outcome is error for outcome in outcomes)
+    assert rag_system.in_flight.calls == 1
+
+@pytest.fixture
+def async_rag_system(make_rag_system, fake_graph):
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+    from benchmarks.fake_neo4j import AsyncFakeDriver
+    return make_rag_system(AsyncAgricultureRAGSystem, driver=AsyncFakeDriver(fake_graph, 0.0))
+
+def test_async_get_rag_answer_makes_one_backend_call(async_rag_system, monkeypatch):
+    rag_system = async_rag_system
+    backend_calls = []
+
+    async def complete(messages):
+        backend_calls.append(messages)
+        await async_wait_until(lambda: rag_system.in_flight.merged == N - 1)
+        return "answer"
+
+    # Retrieval runs for real against the fake graph; only the LLM is stubbed
+    monkeypatch.setattr(rag_system, "_complete", complete)
+
+    async def main():
+        return await asyncio.gather(
+            *(rag_system.get_rag_answer(QUESTIONS[i % len(QUESTIONS)]) for i in range(N))
+        )
+
+    assert asyncio.run(main()) == ["answer"] * N
+    assert len(backend_calls) == 1
+    assert rag_system.in_flight.calls == 1
+    assert rag_system.in_flight.merged == N - 1
+
+def test_async_get_rag_answer_shares_the_leaders_exception(async_rag_system, monkeypatch):
+    rag_system = async_rag_system
+    error = RuntimeError("LLM unavailable")
+
+    async def complete(messages):
+        await async_wait_until(lambda: rag_system.in_flight.merged == N - 1)
+        raise error
+
+    monkeypatch.setattr(rag_system, "_complete", complete)
+
+    async def main():
+        return await asyncio.gather(
+            *(rag_system.get_rag_answer(QUESTIONS[0]) for _ in range(N)), return_exceptions=True
+        )
+
+    outcomes = asyncio.run(main())
+    assert all(outcome is error for outcome in outcomes)
+    assert rag_system.in_flight.calls == 1
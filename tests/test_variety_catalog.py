@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from api.variety_catalog import CatalogSnapshot, VarietyCatalog
+from benchmarks.fake_neo4j import FakeGraph
+
+NAMES = ["ব্রি ধান২৮", "ব্রি ধান২৯", "বারি আলু-৭"]
+
+class BrokenGraph:
+    """Graph whose every query fails, as during a Neo4j outage"""
+
+    def run(self, query, parameters):
+        raise RuntimeError("neo4j down")
+
+def without_variety(graph, name):
+    """Copy of the graph with one variety (and its facts) removed"""
+    nodes = [node for node in graph.nodes if node.get("জাতের নাম") != name]
+    return FakeGraph(nodes, graph.index_definitions)
+
+def test_etag_is_stable_for_unchanged_content():
+    first = CatalogSnapshot(NAMES, "v1", loaded_at=1.0)
+    # Reloading the same names later, or under another graph version, keeps the validator
+    second = CatalogSnapshot(list(NAMES), "v2", loaded_at=2.0)
+    assert first.etag == second.etag
+    assert first.payload == second.payload
+
+def test_etag_changes_with_content():
+    etag = CatalogSnapshot(NAMES).etag
+    assert CatalogSnapshot(NAMES[:-1]).etag != etag
+    assert CatalogSnapshot(NAMES + ["বারি টমেটো-২"]).etag != etag
+    assert CatalogSnapshot(list(reversed(NAMES))).etag != etag
+
+def test_failed_background_refresh_keeps_the_last_snapshot():
+    catalog = VarietyCatalog()
+    snapshot = catalog.update(NAMES, "v1")
+
+    def refresh():
+        raise RuntimeError("neo4j down")
+
+    catalog.refresh_in_background(refresh)
+    # The refresh slot is released once the failed refresh has finished
+    assert catalog._refreshing.acquire(timeout=5)
+    catalog._refreshing.release()
+    assert catalog.snapshot is snapshot
+
+def test_unreadable_snapshot_file_keeps_the_last_snapshot(tmp_path):
+    path = tmp_path / "varieties.json"
+    catalog = VarietyCatalog(snapshot_path=str(path))
+    snapshot = catalog.update(NAMES, "v1")
+
+    restored = VarietyCatalog(snapshot_path=str(path))
+    assert restored.load_snapshot_file()
+    assert restored.snapshot.etag == snapshot.etag
+
+    path.write_text("{not json", encoding="utf-8")
+    assert not catalog.load_snapshot_file()
+    assert catalog.snapshot is snapshot
+
+def test_reload_keeps_the_etag_until_the_names_change(make_rag_system, fake_graph):
+    rag_system = make_rag_system()
+    catalog = rag_system.variety_catalog
+    rag_system.get_all_variety_names()
+    etag = catalog.snapshot.etag
+
+    rag_system.refresh_variety_catalog(force=True)
+    assert catalog.snapshot.etag == etag
+
+    dropped = fake_graph.variety_names[0]
+    rag_system.driver.graph = without_variety(fake_graph, dropped)
+    rag_system.refresh_variety_catalog()
+    assert dropped not in catalog.snapshot.names
+    assert catalog.snapshot.etag != etag
+
+def test_sync_refresh_failure_serves_the_last_names(make_rag_system, fake_graph):
+    rag_system = make_rag_system()
+    catalog = rag_system.variety_catalog
+    names = rag_system.get_all_variety_names()
+    snapshot = catalog.snapshot
+
+    rag_system.driver.graph = BrokenGraph()
+    catalog.checked_at = 0.0
+    assert rag_system.get_all_variety_names() == names
+    assert catalog._refreshing.acquire(timeout=5)
+    catalog._refreshing.release()
+    assert catalog.snapshot is snapshot
+    # Still stale, so the next request tries again
+    assert catalog.is_stale()
+
+def test_async_refresh_failure_serves_the_last_names(make_rag_system, fake_graph):
+    from api.async_rag_system import AsyncAgricultureRAGSystem
+    from benchmarks.fake_neo4j import AsyncFakeDriver
+    rag_system = make_rag_system(AsyncAgricultureRAGSystem, driver=AsyncFakeDriver(fake_graph, 0.0))
+    catalog = rag_system.variety_catalog
+
+    async def scenario():
+        names = await rag_system.get_all_variety_names()
+        snapshot = catalog.snapshot
+        rag_system.driver.graph = BrokenGraph()
+        catalog.checked_at = 0.0
+        assert await rag_system.get_all_variety_names() == names
+        await rag_system._refresh_task
+        assert catalog.snapshot is snapshot
+        assert catalog.begin_refresh()
+        catalog.end_refresh()
+
+    asyncio.run(scenario())
+
+def test_refresh_without_a_snapshot_raises(make_rag_system):
+    rag_system = make_rag_system()
+    rag_system.variety_catalog.snapshot = None
+    rag_system.driver.graph = BrokenGraph()
+    with pytest.raises(RuntimeError):
+        rag_system.get_all_variety_names()
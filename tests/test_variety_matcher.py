@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from api.variety_matcher import VarietyMatcher, normalize_variety_text
+
+def brute_force_matches(names, question):
+    """Every (start, end, name) occurrence, by plain substring search"""
+    text = normalize_variety_text(question)
+    keys = {}
+    for name in names:
+        key = normalize_variety_text(name) if name else ""
+        if key:
+            keys.setdefault(key, name)
+    matches = []
+    for key, name in keys.items():
+        start = text.find(key)
+        while start != -1:
+            end = start + len(key)
+            if not (key[-1].isdigit() and end < len(text) and text[end].isdigit()):
+                matches.append((start, end, name))
+            start = text.find(key, start + 1)
+    return matches
+
+def brute_force_find_all(names, question):
+    matches = brute_force_matches(names, question)
+    kept = [
+        m for m in matches
+        if not any(o[0] <= m[0] and m[1] <= o[1] and o[1] - o[0] > m[1] - m[0] for o in matches)
+    ]
+    return [name for _, _, name in sorted(kept)]
+
+def brute_force_longest_length(names, question):
+    return max((end - start for start, end, _ in brute_force_matches(names, question)), default=None)
+
+NAMES = ["ব্রি ধান২", "ব্রি ধান২৮", "ব্রি ধান২৯", "বারি আলু-৭", "বারি আলু-৭৮", "হাইব্রিড", "ধান"]
+
+@pytest.mark.parametrize("question, longest, found", [
+    ("ব্রি ধান২৮ এর ফলন কত?", "ব্রি ধান২৮", ["ব্রি ধান২৮"]),
+    ("ব্রি ধান২ কোথায় চাষ হয়?", "ব্রি ধান২", ["ব্রি ধান২"]),
+    # ASCII digits and spacing/hyphens fold onto the stored names
+    ("ব্রি ধান 28 আর বারি আলু ৭", "ব্রি ধান২৮", ["ব্রি ধান২৮", "বারি আলু-৭"]),
+    ("বারি আলু-78", "বারি আলু-৭৮", ["বারি আলু-৭৮"]),
+    # "ধান২" must not match inside "ধান২৩" (no such variety)
+    ("ব্রি ধান২৩ এর বীজ", "ধান", ["ধান"]),
+    ("টমেটোর রোগ", None, []),
+])
+def test_known_questions(question, longest, found):
+    matcher = VarietyMatcher(NAMES)
+    assert matcher.longest(question) == longest
+    assert matcher.find_all(question) == found
+
+def test_empty_list_matches_nothing():
+    matcher = VarietyMatcher([])
+    assert len(matcher) == 0
+    assert matcher.longest("ব্রি ধান২৮") is None
+    assert matcher.find_all("ব্রি ধান২৮") == []
+
+def test_blank_and_duplicate_names_are_skipped():
+    matcher = VarietyMatcher(["", None, "ব্রি ধান২৮", "ব্রি ধান-২৮", "ব্রি ধান 28"])
+    assert matcher.names == ["ব্রি ধান২৮"]
+
+def test_agrees_with_brute_force_on_random_texts():
+    rng = random.Random(7)
+    pieces = ["ধান", "ব্রি ", "আলু", "বারি ", "২", "৮", "2", "8", "-", " ", "ক", "x"]
+
+    def random_text(max_pieces):
+        return "".join(rng.choice(pieces) for _ in range(rng.randint(1, max_pieces)))
+
+    for _ in range(200):
+        names = [random_text(4) for _ in range(rng.randint(0, 12))]
+        matcher = VarietyMatcher(names)
+        for _ in range(10):
+            question = random_text(12)
+            assert matcher.find_all(question) == brute_force_find_all(matcher.names, question)
+            longest = matcher.longest(question)
+            expected = brute_force_longest_length(matcher.names, question)
+            if expected is None:
+                assert longest is None
+            else:
+                assert len(normalize_variety_text(longest)) == expected